@@ -1 +1 @@
-from .fbdl import compile
+from .fbdl import compile, Compiler
@@ -0,0 +1,151 @@
+"""
+Module for the cache of parsed files.
+
+Cache entry holds symbols and import statements of a single file.
+Entries are keyed by the hash of the file content and the grammar version,
+so any change of the file or the grammar automatically invalidates them.
+
+Entries are kept on disk, and optionally in memory as pickled bytes.
+Entries in memory are evicted in least recently used order, when their
+total size exceeds the limit. Each load unpickles new symbols, so the cache
+can be shared by compilations running concurrently in many threads.
+"""
+from collections import OrderedDict
+import hashlib
+import logging as log
+import os
+import pickle
+import tempfile
+import threading
+
+from . import idgen
+from .refdict import RefDict
+
+# Must be increased whenever the structure of the parsed symbols changes.
+FORMAT_VERSION = 3
+
+
+class ParseCache:
+    def __init__(self, path, grammar_version, memory_limit=0):
+        """
+        Parameters
+        ----------
+        path
+            Path to the directory for entries. If None, entries are kept only in memory.
+        memory_limit
+            Maximal total size of entries kept in memory, in bytes.
+            If 0, entries are not kept in memory.
+        """
+        self.path = path
+        self.grammar_version = grammar_version
+        self.memory_limit = memory_limit
+
+        # Key is the entry key, value is the pickled entry.
+        # Entries are in order of use, the least recently used first.
+        self.entries = OrderedDict()
+        self.memory_size = 0
+        self.lock = threading.Lock()
+
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def _entry_key(self, code):
+        h = hashlib.sha256()
+        h.update(bytes(f"{FORMAT_VERSION}:{self.grammar_version}:", 'utf8'))
+        h.update(code)
+        return h.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key + '.pickle')
+
+    def _get_in_memory(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+        return data
+
+    def _put_in_memory(self, key, data):
+        if len(data) > self.memory_limit:
+            return
+
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.memory_size -= len(old)
+            self.entries[key] = data
+            self.memory_size += len(data)
+
+            while self.memory_size > self.memory_limit:
+                _, evicted = self.entries.popitem(last=False)
+                self.memory_size -= len(evicted)
+
+    def load(self, code):
+        """Load cache entry for the file content.
+
+        Symbols loaded from the cache keep stale ids. They must get new ids
+        with reassign_ids(), so that ids are the same as if the file was parsed.
+
+        Returns
+        -------
+            Tuple with symbols and import statements or None if entry is missing.
+        """
+        key = self._entry_key(code)
+        data = self._get_in_memory(key)
+        if data is not None:
+            return pickle.loads(data)
+
+        if self.path is None:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            symbols, imports = pickle.loads(data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"Ignoring broken cache entry '{path}': {e}.")
+            return None
+
+        self._put_in_memory(key, data)
+
+        return symbols, imports
+
+    def store(self, code, symbols, imports):
+        """Store symbols and import statements parsed from the file content.
+
+        Top level symbols must not have the 'Parent' key yet,
+        as files and packages are not cached.
+        """
+        key = self._entry_key(code)
+        data = pickle.dumps((symbols, imports), pickle.HIGHEST_PROTOCOL)
+        self._put_in_memory(key, data)
+
+        if self.path is None:
+            return
+
+        path = self._entry_path(key)
+
+        # Write to temporary file first, so that other runs never read partial entry.
+        fd, tmp_path = tempfile.mkstemp(dir=self.path)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            os.remove(tmp_path)
+            log.warning(f"Can't store cache entry '{path}': {e}.")
+
+
+def reassign_ids(symbols):
+    """Assign new ids to symbols in the same order as the parser does."""
+    for _, symbol in symbols.items():
+        symbol['Id'] = idgen.generate()
+
+        if 'Symbols' in symbol:
+            reassign_ids(symbol['Symbols'])
+            # References cache ids, so they must be recreated.
+            for _, sym in symbol['Symbols'].items():
+                sym['Parent'] = RefDict(symbol)
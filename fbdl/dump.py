@@ -0,0 +1,215 @@
+"""
+Module for dumping packages, instantiated and registerified dictionaries.
+
+Dumps are streamed, the dictionary tree is walked and written directly
+to the file, no intermediate string of the whole dump is built.
+"""
+import json
+from pprint import pprint
+import sys
+
+from .packages import Packages
+from .record import Record
+from .refdict import RefDict
+from .reg.access import Access
+from .reg.iters import AddressSpace, RegisterArray
+
+FORMATS = ('python', 'json', 'msgpack')
+
+
+def dump(obj, path, format='python'):
+    """Dump object to the file.
+
+    Parameters
+    ----------
+    obj
+        Object to dump.
+    path
+        Path to the file. If equals '-', object is dumped to the standard output.
+    format
+        One of FORMATS. The 'python' format is the pretty-printed Python representation.
+    """
+    binary = format == 'msgpack'
+
+    if path == '-':
+        f = sys.stdout.buffer if binary else sys.stdout
+        _dump(obj, f, format)
+        f.flush()
+    else:
+        with open(path, 'wb' if binary else 'w') as f:
+            _dump(obj, f, format)
+
+
+def _dump(obj, f, format):
+    if format == 'python':
+        pprint(_to_dicts(obj), stream=f)
+    elif format == 'json':
+        JSONWriter(f).write(obj)
+        f.write('\n')
+    elif format == 'msgpack':
+        MsgpackWriter(f).write(obj)
+    else:
+        raise Exception(f"Invalid dump format '{format}', valid formats are {FORMATS}.")
+
+
+def _to_dicts(obj, converted=None):
+    """Get object with records and accesses replaced with their dictionary form.
+
+    Dictionaries and lists are copied only if they hold any record or access,
+    shared subtrees are converted once.
+    """
+    if converted is None:
+        converted = {}
+
+    type_ = type(obj)
+    if type_ == Access:
+        return obj.to_dict()
+    record = isinstance(obj, Record)
+    if not record and type_ != dict and type_ != Packages and type_ != list:
+        return obj
+
+    new = converted.get(id(obj))
+    if new is not None:
+        return new
+
+    if record:
+        new = {key: _to_dicts(val, converted) for key, val in obj.items()}
+        changed = True
+    elif type_ != list:
+        new = {key: _to_dicts(val, converted) for key, val in obj.items()}
+        changed = type_ != dict or any(new[key] is not val for key, val in obj.items())
+    else:
+        new = [_to_dicts(item, converted) for item in obj]
+        changed = any(n is not o for n, o in zip(new, obj))
+    if not changed:
+        new = obj
+
+    converted[id(obj)] = new
+    return new
+
+
+def _address_space_items(space):
+    return (
+        ('Base Address', space.base_addr),
+        ('Count', space.count),
+        ('Block Size', space.block_size),
+    )
+
+
+def _register_array_items(ra):
+    return (
+        ('Base Address', ra.base_addr),
+        ('Items', ra.count),
+        ('Accesses per Item', ra.accesses_per_item),
+        ('Items per Access', ra.items_per_access),
+        ('Bunch Size', ra.bunch_size),
+        ('Accesses per Bunch', ra.accesses_per_bunch),
+        ('Strategy', ra.strategy),
+        ('Registers Count', ra.registers_count),
+    )
+
+
+class Writer:
+    """Base class for streaming writers.
+
+    Subclasses implement writing of scalars and of map and array delimiters.
+    References (RefDict) are written as maps with the 'Reference' key
+    holding id of the referenced dictionary.
+    """
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, obj):
+        type_ = type(obj)
+
+        if type_ == RefDict:
+            self._write_map((('Reference', obj.id),), 1)
+        elif isinstance(obj, dict):
+            self._write_map(obj.items(), len(obj))
+        elif type_ == list or type_ == tuple:
+            self.begin_array(len(obj))
+            for i, item in enumerate(obj):
+                self.array_item(i)
+                self.write(item)
+            self.end_array()
+        elif type_ == Access or isinstance(obj, Record):
+            items = obj.items()
+            self._write_map(items, len(items))
+        elif type_ == AddressSpace:
+            items = _address_space_items(obj)
+            self._write_map(items, len(items))
+        elif type_ == RegisterArray:
+            items = _register_array_items(obj)
+            self._write_map(items, len(items))
+        elif obj is None or type_ in (bool, int, float, str):
+            self.scalar(obj)
+        else:
+            # Falling back to repr() would dump a string that can't be read back.
+            raise TypeError(f"Object of type '{type_.__name__}' can not be dumped.")
+
+    def _write_map(self, items, length):
+        self.begin_map(length)
+        for i, (key, value) in enumerate(items):
+            self.map_key(i, str(key))
+            self.write(value)
+        self.end_map()
+
+
+class JSONWriter(Writer):
+    def scalar(self, obj):
+        # Infinity and NaN are not valid JSON.
+        self.f.write(json.dumps(obj, allow_nan=False))
+
+    def begin_map(self, length):
+        self.f.write('{')
+
+    def map_key(self, i, key):
+        if i:
+            self.f.write(', ')
+        self.f.write(json.dumps(key) + ': ')
+
+    def end_map(self):
+        self.f.write('}')
+
+    def begin_array(self, length):
+        self.f.write('[')
+
+    def array_item(self, i):
+        if i:
+            self.f.write(', ')
+
+    def end_array(self):
+        self.f.write(']')
+
+
+class MsgpackWriter(Writer):
+    def __init__(self, f):
+        try:
+            import msgpack
+        except ImportError:
+            raise Exception("Dumping in the 'msgpack' format requires the 'msgpack' package.")
+
+        super().__init__(f)
+        self.packer = msgpack.Packer()
+
+    def scalar(self, obj):
+        self.f.write(self.packer.pack(obj))
+
+    def begin_map(self, length):
+        self.f.write(self.packer.pack_map_header(length))
+
+    def map_key(self, i, key):
+        self.f.write(self.packer.pack(key))
+
+    def end_map(self):
+        pass
+
+    def begin_array(self, length):
+        self.f.write(self.packer.pack_array_header(length))
+
+    def array_item(self, i):
+        pass
+
+    def end_array(self):
+        pass
@@ -1,44 +1,115 @@
 """
 Module for code related with expressions.
 
-All build_* and evaluate_* functions are in alphabetical order.
+Expressions are compiled into closures on the first evaluation.
+Compiled form is reused whenever the value must be evaluated again,
+for example for different resolved arguments.
+
+All build_* and compile_* functions are in alphabetical order.
 """
 import logging as log
 import math
+import operator
 import sys
 from pprint import pformat, pprint
 
 this_module = sys.modules[__name__]
 
+from . import profiling, session
 from .packages import Packages
-from .validation import ValidBuiltInFunctions
+from .validation import ValidBuiltInFunctions, ValidElements
+
+
+def change_context():
+    """Invalidate cached values of expressions depending on resolved arguments.
+
+    It must be called whenever resolved arguments of any symbol change.
+    """
+    session.current().context += 1
+
+
+def _in_parametrized_scope(symbol):
+    """Check if symbol lookup from given scope might return resolved argument."""
+    node = symbol
+    while node['Kind'] != 'File':
+        if 'Parameters' in node or 'Resolved Arguments' in node:
+            return True
+        node = node['Parent']
+
+    return False
 
 
 class ExprDict(dict):
     def __init__(self, parser, node, symbol):
         super().__init__()
-        self.parser = parser
+        if profiling.enabled:
+            profiling.count('Nodes Visited')
+        # Parser is not kept, as expressions must be picklable for the parse cache.
         self.symbol = symbol
         self._value = None
 
+        # Value is cached if it is not None.
+        # Values depending on resolved arguments are valid only in the context
+        # they were evaluated in, other values are valid until invalidate() is called.
+        self._cached = False
+        self._context = None
+        # Expressions which values were evaluated using value of this expression.
+        # Key is the id of the expression, as dictionaries are not hashable.
+        self._dependents = {}
+        # Closure returning value of the expression, see compile_expression().
+        self._compiled = None
+
         self['String'] = parser.get_node_string(node)
         self['Kind'] = node.type
 
+    def __copy__(self):
+        c = ExprDict.__new__(ExprDict)
+        c.update(self)
+        c.__dict__.update(self.__dict__)
+        c._dependents = {}
+        return c
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Closures can not be pickled.
+        state['_compiled'] = None
+        return state
+
     @property
     def value(self):
-        # Below cache mechanism had to be removed.
-        # This is because it breaks current mechanism
-        # of parametrized type instantiation.
-        # If already evaluated return.
-        # if self._value:
-        #    return self._value
+        s = session.current()
+        evaluation_stack = s.evaluation_stack
+        if evaluation_stack:
+            dependent = evaluation_stack[-1][0]
+            self._dependents[id(dependent)] = dependent
+
+        if self._cached and (self._context is None or self._context == s.context):
+            if self._context is not None and evaluation_stack:
+                evaluation_stack[-1][1] = True
+            return self._value
 
         kind = self['Kind']
-        log.debug(f"Evaluating {kind}: '{self['String']}'")
-        if kind in ['expression', 'parenthesized_expression', 'primary_expression']:
-            self.value = self['Child'].value
-        else:
-            self.value = getattr(self, 'evaluate_' + kind)()
+        if profiling.enabled:
+            profiling.count('Expression Evaluations')
+        log.debug("Evaluating %s: '%s'", kind, self['String'])
+
+        frame = [self, False]
+        evaluation_stack.append(frame)
+        try:
+            if self._compiled is None:
+                self._compiled = compile_expression(self)
+            val = self._compiled()
+        finally:
+            evaluation_stack.pop()
+
+        self.value = val
+
+        context_dependent = frame[1]
+        if val is not None:
+            self._cached = True
+            self._context = s.context if context_dependent else None
+        if context_dependent and evaluation_stack:
+            evaluation_stack[-1][1] = True
 
         return self._value
 
@@ -47,120 +118,46 @@ class ExprDict(dict):
         self._value = v
         self['Value'] = v
 
-    def evaluate_binary_literal(self):
-        return self._value
-
-    def evaluate_binary_operation(self):
-        left = self['Left'].value
-        operator = self['Operator']
-        right = self['Right'].value
-
-        if left is None or right is None:
-            return None
-
-        if operator == '+':
-            return left + right
-        elif operator == '-':
-            return left - right
-        elif operator == '*':
-            return left * right
-        elif operator == '/':
-            return left / right
-        elif operator == '%':
-            return left % right
-        elif operator == '**':
-            return left ** right
-        elif operator == '<<':
-            return left << right
-        elif operator == '>>':
-            return left >> right
-
-    def evaluate_call(self):
-        func = self['Function']
-        if func == "abs":
-            return abs(self['Arguments'][0].value)
-        if func == "ceil":
-            return math.ceil(self['Arguments'][0].value)
-        if func == "floor":
-            return math.floor(self['Arguments'][0].value)
-        if func == "log":
-            return math.log(self['Arguments'][0].value, self['Arguments'][1].value)
-        if func == "log2":
-            return math.log2(self['Arguments'][0].value)
-        if func == "log10":
-            return math.log10(self['Arguments'][0].value)
-        if func == "remainder":
-            return math.remainder(self['Arguments'][0].value, self['Arguments'][1].value)
-
-    def evaluate_decimal_literal(self):
-        return self._value
-
-    def evaluate_expression_list(self):
-        list_ = []
-
-        for e in self['Expressions']:
-            list_.append(e.value)
-
-        return list_
-
-    def evaluate_false(self):
-        return self._value
-
-    def evaluate_hex_literal(self):
-        return self._value
-
-    def evaluate_identifier(self):
-        sym = Packages.get_symbol(self['String'], self.symbol)
-
-        if 'Value' in sym:
-            val = sym['Value']
-            if type(val) == ExprDict:
-                return val.value
-
-            return val
-
-        return sym.value
-
-    def evaluate_true(self):
-        return self._value
-
-    def evaluate_octal_literal(self):
-        return self._value
-
-    def evaluate_qualified_identifier(self):
-        pkg_name = self['Package']
-        exception_msg = f"File '{self.parser.this_file['Path']}' doesn't import package '{pkg_name}'."
-        if 'Imports' not in self.parser.this_file:
-            raise Exception(exception_msg)
-
-        imported_packages = self.parser.this_file['Imports']
-
-        if pkg_name not in imported_packages:
-            raise Exception(exception_msg)
-        symbols = imported_packages[pkg_name]['Package']['Symbols']
-
-        return symbols[self['Identifier']]['Value'].value
-
-    def evaluate_string_literal(self):
-        return self._value
-
-    def evaluate_subscript(self):
-        sym = Packages.get_symbol(self['Name'], self.symbol)
-        idx = self['Index'].value
-
-        return sym['Value'].value[idx]
-
-    def evaluate_unary_operation(self):
-        operator = self['Operator']
-        operand = self['Operand'].value
-
-        if operator == '+':
-            return operand
-        elif operator == '-':
-            return -operand
-
-    def evaluate_zero_literal(self):
-        return self._value
+    def invalidate(self):
+        """Drop cached value of the expression and of all expressions depending on it.
+
+        Returns
+        -------
+            List of invalidated expressions.
+        """
+        invalidated = []
+        pending = [self]
+        while pending:
+            e = pending.pop()
+            e._cached = False
+            # Compiled form might have symbols bound.
+            e._compiled = None
+            invalidated.append(e)
+            pending.extend(e._dependents.values())
+            e._dependents = {}
+
+        return invalidated
+
+    def get_identifiers(self):
+        """Get names of all symbols referenced in the expression."""
+        identifiers = []
+
+        pending = [self]
+        while pending:
+            e = pending.pop()
+            kind = e['Kind']
+            if kind in ['identifier', 'qualified_identifier']:
+                identifiers.append(e['String'])
+            elif kind == 'subscript':
+                identifiers.append(e['Name'])
+
+            for _, v in e.items():
+                if type(v) == ExprDict:
+                    pending.append(v)
+                elif type(v) == list:
+                    pending += [i for i in v if type(i) == ExprDict]
+
+        return identifiers
 
 
 def build_binary_operation(parser, node, symbol):
@@ -360,3 +357,183 @@ def build_zero_literal(parser, node, symbol):
     z.value = 0
 
     return z
+
+
+_BINARY_OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '**': operator.pow,
+    '<<': operator.lshift,
+    '>>': operator.rshift,
+}
+
+_UNARY_OPERATORS = {
+    '+': operator.pos,
+    '-': operator.neg,
+}
+
+_FUNCTIONS = {
+    'abs': abs,
+    'ceil': math.ceil,
+    'floor': math.floor,
+    'log': math.log,
+    'log2': math.log2,
+    'log10': math.log10,
+    'remainder': math.remainder,
+}
+
+
+def _none(*args):
+    return None
+
+
+def compile_expression(e):
+    """Compile expression into a closure returning its value.
+
+    Symbols referenced from scopes without parameters are resolved once,
+    during compilation. Symbols referenced from parametrized scopes are
+    resolved on every call, as resolved arguments change during instantiation.
+    """
+    kind = e['Kind']
+    if kind in ['expression', 'parenthesized_expression', 'primary_expression']:
+        return compile_expression(e['Child'])
+
+    return getattr(this_module, 'compile_' + kind)(e)
+
+
+def _compile_literal(e):
+    val = e._value
+    return lambda: val
+
+
+def _might_get_resolved_arguments(symbol):
+    """Check if resolved arguments might be attached to any scope on the lookup path."""
+    node = symbol
+    while node['Kind'] != 'File':
+        if (
+            'Parameters' in node
+            or 'Resolved Arguments' in node
+            or ('Type' in node and node['Type'] not in ValidElements)
+        ):
+            return True
+        node = node['Parent']
+
+    return False
+
+
+def _compile_symbol_value(name, scope, get_value):
+    """Compile reference to the symbol. get_value is called with the symbol."""
+    if _might_get_resolved_arguments(scope):
+
+        def symbol_value():
+            if _in_parametrized_scope(scope):
+                session.current().evaluation_stack[-1][1] = True
+            return get_value(Packages.get_symbol(name, scope))
+
+        return symbol_value
+
+    sym = Packages.get_symbol(name, scope)
+    return lambda: get_value(sym)
+
+
+compile_binary_literal = _compile_literal
+
+
+def compile_binary_operation(e):
+    left = compile_expression(e['Left'])
+    right = compile_expression(e['Right'])
+    op = _BINARY_OPERATORS.get(e['Operator'], _none)
+
+    def binary_operation():
+        l = left()
+        r = right()
+        if l is None or r is None:
+            return None
+        return op(l, r)
+
+    return binary_operation
+
+
+def compile_call(e):
+    func = _FUNCTIONS.get(e['Function'], _none)
+    args = [compile_expression(a) for a in e['Arguments']]
+
+    if len(args) == 1:
+        arg = args[0]
+        return lambda: func(arg())
+
+    return lambda: func(*[a() for a in args])
+
+
+compile_decimal_literal = _compile_literal
+
+
+def compile_expression_list(e):
+    items = [compile_expression(i) for i in e['Expressions']]
+    return lambda: [i() for i in items]
+
+
+compile_false = _compile_literal
+
+compile_hex_literal = _compile_literal
+
+
+def _get_value(sym):
+    if 'Value' in sym:
+        val = sym['Value']
+        if type(val) == ExprDict:
+            return val.value
+
+        return val
+
+    return sym.value
+
+
+def compile_identifier(e):
+    return _compile_symbol_value(e['String'], e.symbol, _get_value)
+
+
+compile_octal_literal = _compile_literal
+
+
+def compile_qualified_identifier(e):
+    this_file = session.current().scope_index.get_file(e.symbol)
+
+    pkg_name = e['Package']
+    exception_msg = f"File '{this_file['Path']}' doesn't import package '{pkg_name}'."
+    if 'Imports' not in this_file:
+        raise Exception(exception_msg)
+
+    imported_packages = this_file['Imports']
+
+    if pkg_name not in imported_packages:
+        raise Exception(exception_msg)
+    symbols = imported_packages[pkg_name]['Package']['Symbols']
+
+    val = symbols[e['Identifier']]['Value']
+    return lambda: val.value
+
+
+compile_string_literal = _compile_literal
+
+
+def compile_subscript(e):
+    index = compile_expression(e['Index'])
+    return _compile_symbol_value(
+        e['Name'], e.symbol, lambda sym: sym['Value'].value[index()]
+    )
+
+
+compile_true = _compile_literal
+
+
+def compile_unary_operation(e):
+    operand = compile_expression(e['Operand'])
+    op = _UNARY_OPERATORS.get(e['Operator'], _none)
+    return lambda: op(operand())
+
+
+compile_zero_literal = _compile_literal
@@ -1,13 +1,133 @@
+import threading
+
 from . import pre
+from . import profiling
+from . import session
 from . import ts
+from .cache import ParseCache
 from .inst import inst
 from .reg import reg
 
 
-def compile(main):
-    packages = pre.prepare_packages(main)
-    ts.parse(packages)
-    bus = inst.instantiate(packages)
-    registerified_bus = reg.registerify(bus)
+class Compiler:
+    """Compiler of buses.
+
+    Each compilation runs in its own session, so one compiler can compile
+    many buses concurrently, for example from threads of the ThreadPoolExecutor
+    or with the asyncio loop.run_in_executor(). Compilations share the grammar
+    and the cache of parsed files, so files common to many buses are parsed once.
+    """
+
+    def __init__(
+        self,
+        cache_dir=None,
+        jobs=1,
+        packing_strategy='full-align',
+        reproducible=False,
+        memory_cache_size=0,
+    ):
+        """
+        Parameters
+        ----------
+        cache_dir
+            Path to the directory for the parse cache. If None, parsed files
+            are not cached on disk.
+        jobs
+            Number of processes parsing files in parallel within a single compilation.
+        packing_strategy
+            Strategy of packing functionalities into registers.
+        reproducible
+            Derive ids from paths and names instead of the discovery order.
+            Content ids are opt-in. If False, ids depend on the order of discovery
+            and parsing, so they might change when unrelated files are added.
+        memory_cache_size
+            Maximal total size of parsed files cached in memory, in bytes.
+            If 0, parsed files are not cached in memory.
+        """
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self.packing_strategy = packing_strategy
+        self.reproducible = reproducible
+        self.memory_cache_size = memory_cache_size
+
+        # Cache is created on first use, as it requires the grammar library.
+        self.cache = None
+        self._cache_lock = threading.Lock()
+
+    def _get_cache(self):
+        """Get the parse cache. None is returned if parsed files are not cached."""
+        if not self.cache_dir and not self.memory_cache_size:
+            return None
+
+        with self._cache_lock:
+            if self.cache is None:
+                self.cache = ParseCache(
+                    self.cache_dir, ts.grammar_version(), self.memory_cache_size
+                )
+        return self.cache
+
+    def compile(self, main, profile=None):
+        """
+        Parameters
+        ----------
+        profile
+            Profiler measuring stages of the compilation. Must be already entered.
+            If None, stages are not measured.
+        """
+        with session.Session(
+            content_ids=self.reproducible, packing_strategy=self.packing_strategy
+        ):
+            with profiling.stage(profile, 'pre.prepare_packages'):
+                packages = pre.prepare_packages(main)
+            with profiling.stage(profile, 'ts.parse'):
+                ts.parse(packages, jobs=self.jobs, cache=self._get_cache())
+            with profiling.stage(profile, 'Packages.evaluate'):
+                packages.evaluate()
+            with profiling.stage(profile, 'inst.instantiate'):
+                bus = inst.instantiate(packages)
+            with profiling.stage(profile, 'reg.registerify'):
+                registerified_bus = reg.registerify(bus)
+
+        return registerified_bus
+
+    def compile_many(self, mains, threads=None):
+        """Compile buses concurrently.
+
+        Parameters
+        ----------
+        threads
+            Maximal number of threads. If None, the ThreadPoolExecutor default is used.
+
+        Returns
+        -------
+            List of registerified buses, in order of mains.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(threads) as executor:
+            return list(executor.map(self.compile, mains))
+
 
-    return registerified_bus
+def compile(
+    main,
+    cache_dir=None,
+    jobs=1,
+    profile=None,
+    packing_strategy='full-align',
+    reproducible=False,
+):
+    """
+    Parameters
+    ----------
+    packing_strategy
+        Strategy of packing functionalities into registers.
+    profile
+        Profiler measuring stages of the compilation. Must be already entered.
+        If None, stages are not measured.
+    reproducible
+        Derive ids from paths and names instead of the discovery order.
+        Content ids are opt-in. If False, ids depend on the order of discovery
+        and parsing, so they might change when unrelated files are added.
+    """
+    compiler = Compiler(cache_dir, jobs, packing_strategy, reproducible)
+    return compiler.compile(main, profile)
@@ -0,0 +1,155 @@
+"""
+Module with the directed graph used for dependency analysis.
+"""
+
+
+class Graph:
+    """Directed graph with set based edges.
+
+    Nodes must be hashable. Nodes and successors keep insertion order,
+    so the results do not depend on hashing.
+    """
+
+    def __init__(self, edges=()):
+        # Key is the node, value is the dictionary used as ordered set of successors.
+        self.successors = {}
+        # Components and the topological order are cached until the graph is modified.
+        self._components = None
+        self._topological_order = None
+
+        for u, v in edges:
+            self.add_edge(u, v)
+
+    def add_node(self, node):
+        if node not in self.successors:
+            self.successors[node] = {}
+            self._invalidate()
+
+    def add_edge(self, u, v):
+        self.add_node(u)
+        self.add_node(v)
+        if v not in self.successors[u]:
+            self.successors[u][v] = None
+            self._invalidate()
+
+    def _invalidate(self):
+        self._components = None
+        self._topological_order = None
+
+    def __contains__(self, node):
+        return node in self.successors
+
+    def __len__(self):
+        return len(self.successors)
+
+    def strongly_connected_components(self):
+        """Find strongly connected components with the Tarjan's algorithm.
+
+        Returns
+        -------
+            List of components, each component is a list of nodes.
+            Components are in reverse topological order.
+            The list is cached until the graph is modified.
+        """
+        if self._components is not None:
+            return self._components
+
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+
+        for root in self.successors:
+            if root in index:
+                continue
+
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.successors[root]))]
+            while work:
+                node, succs = work[-1]
+                for succ in succs:
+                    if succ not in index:
+                        index[succ] = lowlink[succ] = len(index)
+                        stack.append(succ)
+                        on_stack.add(succ)
+                        work.append((succ, iter(self.successors[succ])))
+                        break
+                    elif succ in on_stack:
+                        lowlink[node] = min(lowlink[node], index[succ])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            n = stack.pop()
+                            on_stack.remove(n)
+                            component.append(n)
+                            if n == node:
+                                break
+                        component.reverse()
+                        components.append(component)
+
+        self._components = components
+        return components
+
+    def _find_cycle(self, component):
+        """Find single cycle within the strongly connected component."""
+        nodes = set(component)
+        start = component[0]
+
+        # Breadth-first search for the shortest path back to the start node.
+        previous = {}
+        pending = [start]
+        while pending:
+            next_pending = []
+            for node in pending:
+                for succ in self.successors[node]:
+                    if succ not in nodes or succ in previous:
+                        continue
+                    previous[succ] = node
+                    if succ == start:
+                        cycle = [start]
+                        node = previous[start]
+                        while node != start:
+                            cycle.append(node)
+                            node = previous[node]
+                        cycle[1:] = reversed(cycle[1:])
+                        return cycle
+                    next_pending.append(succ)
+            pending = next_pending
+
+    def cycles(self):
+        """Find cycles, one for each strongly connected component containing a cycle.
+
+        Returns
+        -------
+            List of cycles, each cycle is a list of nodes. The first node of the cycle
+            is not repeated at the end.
+        """
+        cycles = []
+        for component in reversed(self.strongly_connected_components()):
+            if len(component) > 1 or component[0] in self.successors[component[0]]:
+                cycles.append(self._find_cycle(component))
+
+        return cycles
+
+    def topological_order(self):
+        """Get nodes in topological order, for each edge u -> v node u precedes v.
+
+        The order is cached until the graph is modified.
+        """
+        if self._topological_order is None:
+            components = self.strongly_connected_components()
+            for c in components:
+                if len(c) > 1 or c[0] in self.successors[c[0]]:
+                    raise Exception("Graph contains cycles, it has no topological order.")
+            self._topological_order = [c[0] for c in reversed(components)]
+
+        return self._topological_order
@@ -1,16 +1,29 @@
 """
 Module for generating ids for symbols in deterministic way.
+
+By default ids are generated from the counter of the session, so they depend on the order
+of discovery and parsing. Content ids are derived from paths and names of
+packages, files and symbols, so they do not change when unrelated files are added.
 """
+import hashlib
+
+from . import session
 
 # Do not start from 0.
 # Starting from greater value makes it easier to search for ids in packages dump.
-current_id = 0xFFF
+FIRST_ID = 0x1000
 
 
 def generate():
-    global current_id
-
-    current_id += 1
+    """Generate id from the counter of the current session."""
+    s = session.current()
+    s.current_id += 1
 
-    hex_val = hex(current_id)
+    hex_val = hex(s.current_id)
     return hex_val[0:2] + hex_val[2:].upper()
+
+
+def content_id(key):
+    """Get id derived from the key, the key must uniquely identify the node."""
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+    return '0x' + digest.upper()
@@ -3,6 +3,7 @@ Module for resolving argument lists.
 """
 from copy import copy
 
+from .. import expr
 from ..validation import ValidElements
 
 
@@ -59,6 +60,7 @@ def resolve_argument_lists_in_symbols(symbols, packages):
             params = packages.get_symbol(symbol['Type'], symbol).get('Parameters')
             if params:
                 symbol['Resolved Arguments'] = resolve_arguments(symbol, params)
+                expr.change_context()
         if 'Symbols' in symbol:
             resolve_argument_lists_in_symbols(symbol['Symbols'], packages)
 
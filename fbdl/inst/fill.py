@@ -3,28 +3,29 @@ Module for code related with filling missing properties.
 """
 import sys
 
+from .. import session
+
 this_module = sys.modules[__name__]
 
-# Bus width must be easy to read globally, as whether access to an element
+# Bus width is kept in the session, as whether access to an element
 # is atomic or not depends on the bus width.
 DEFAULT_WIDTH = 32
-BUS_WIDTH = None
 
 
 def set_bus_width(packages):
-    global BUS_WIDTH
+    s = session.current()
 
     properties = packages['main'][0]['Symbols']['main'].get('Properties')
     if not properties:
-        BUS_WIDTH = DEFAULT_WIDTH
+        s.bus_width = DEFAULT_WIDTH
         return
 
     width = properties.get("width")
     if not width:
-        BUS_WIDTH = DEFAULT_WIDTH
+        s.bus_width = DEFAULT_WIDTH
         return
 
-    BUS_WIDTH = width['Value'].value
+    s.bus_width = width['Value'].value
 
 
 def fill_missing_properties(inst):
@@ -41,7 +42,7 @@ def fill_missing_properties_config(inst):
         inst['Properties']['width'] = DEFAULT_WIDTH
     if 'atomic' not in inst['Properties']:
         val = False
-        if inst['Properties']['width'] > BUS_WIDTH:
+        if inst['Properties']['width'] > session.current().bus_width:
             val = True
         inst['Properties']['atomic'] = val
 
@@ -63,7 +64,7 @@ def fill_missing_properties_bus(inst):
         inst['Properties']['masters'] = 1
 
     if 'width' not in inst['Properties']:
-        inst['Properties']['width'] = BUS_WIDTH
+        inst['Properties']['width'] = session.current().bus_width
 
 
 def fill_missing_properties_mask(inst):
@@ -71,6 +72,6 @@ def fill_missing_properties_mask(inst):
         inst['Properties']['width'] = DEFAULT_WIDTH
     if 'atomic' not in inst['Properties']:
         val = False
-        if inst['Properties']['width'] > BUS_WIDTH:
+        if inst['Properties']['width'] > session.current().bus_width:
             val = True
         inst['Properties']['atomic'] = val
@@ -2,23 +2,37 @@ import logging as log
 from pprint import pformat, pprint
 
 from . import args
+from .. import expr
+from .. import profiling
+from .. import session
+from ..record import Element
 from .check import check_property, check_property_conflict, check_groups
 from .fill import set_bus_width, fill_missing_properties
 from .utils import get_file_path
 from ..validation import ValidElements
 
-packages = None
 
-
-def instantiate(after_parse_packages):
-    global packages
-    packages = after_parse_packages
+def instantiate(after_parse_packages, reuse_instances=False):
+    """
+    Parameters
+    ----------
+    reuse_instances
+        Reuse instances of the previous instantiation kept in the session.
+        Instances depending on changed files must be dropped with drop_instances() first.
+        Instances are not reused if the bus width has changed.
+    """
+    s = session.current()
+    s.packages = packages = after_parse_packages
+    bus_width = s.bus_width
 
     if 'main' not in packages['main'][0]['Symbols']:
         log.warn("Instantiation. There is no main bus. Returning empty dictionary.")
         return {}
 
     set_bus_width(packages)
+    if not reuse_instances or s.bus_width != bus_width:
+        s.instances = {}
+        s.instance_files = {}
 
     args.resolve_argument_lists(packages)
 
@@ -39,14 +53,18 @@ def instantiate(after_parse_packages):
 
                     element = instantiate_element(symbol)
                     # Incorporate constants from package level.
+                    # Instance might be shared, so it is copied first.
+                    element = element.copy()
+                    if 'Constants' in element:
+                        element.constants = dict(element.constants)
                     for name, pkg_symbol in pkg['Symbols'].items():
                         if pkg_symbol['Kind'] == 'Constant':
                             if 'Constants' not in element:
-                                element['Constants'] = {name: pkg_symbol['Value'].value}
+                                element.constants = {name: pkg_symbol['Value'].value}
                             else:
-                                if name in element['Constants']:
+                                if name in element.constants:
                                     continue
-                                element['Constants'][name] = pkg_symbol['Value'].value
+                                element.constants[name] = pkg_symbol['Value'].value
 
                     if pkg_name == 'main' and name == 'main':
                         main_bus = {'main': element}
@@ -58,7 +76,9 @@ def resolve_to_base_type(symbol):
     type_chain = []
 
     if symbol['Type'] not in ValidElements.keys():
-        type_chain += resolve_to_base_type(packages.get_symbol(symbol['Type'], symbol))
+        type_chain += resolve_to_base_type(
+            session.current().packages.get_symbol(symbol['Type'], symbol)
+        )
 
     type_chain.append(symbol)
     return type_chain
@@ -67,43 +87,41 @@ def resolve_to_base_type(symbol):
 def instantiate_type(type, from_type, resolved_arguments):
     if resolved_arguments is not None:
         type['Resolved Arguments'] = resolved_arguments
+        expr.change_context()
 
     from_type_type = "None"
     if from_type is not None:
-        from_type_type = from_type['Previous Type']
-    log.debug(f"Instantiating type '{type['Type']}' from type '{from_type_type}'.")
+        from_type_type = from_type.previous_type
+    log.debug("Instantiating type '%s' from type '%s'.", type['Type'], from_type_type)
 
     if from_type == None:
-        inst = {
-            'Base Type': type['Type'],
-            'Properties': {},
-            'Previous Type': type['Type'],
-        }
+        inst = Element(type['Type'], {})
+        inst.previous_type = type['Type']
     else:
         inst = from_type
 
     properties = type.get('Properties')
     if properties:
         for name, prop in properties.items():
-            if name not in ValidElements[inst['Base Type']]['Valid Properties']:
+            if name not in ValidElements[inst.base_type]['Valid Properties']:
                 raise Exception(
-                    f"Property '{name}' is not valid property for element '{type['Name']}' of base type '{inst['Base Type']}'.\n"
+                    f"Property '{name}' is not valid property for element '{type['Name']}' of base type '{inst.base_type}'.\n"
                     + f"File '{get_file_path(type)}', line {prop['Line Number']}.\n"
-                    + f"Valid properties for '{inst['Base Type']}' are: "
-                    + f"{pformat(ValidElements[inst['Base Type']]['Valid Properties'])}."
+                    + f"Valid properties for '{inst.base_type}' are: "
+                    + f"{pformat(ValidElements[inst.base_type]['Valid Properties'])}."
                 )
 
             check_property(name, prop, type)
             check_property_conflict(name, prop, type, inst)
 
-            if name in inst['Properties']:
+            if name in inst.properties:
                 raise Exception(
                     f"{type['Kind']}, can not set property '{name}' in symbol '{type['Name']}'.\n"
                     + "The property is alrady set in one of the ancestor types.\n"
                     + f"File '{get_file_path(type)}', line {prop['Line Number']}."
                 )
 
-            inst['Properties'][name] = prop['Value'].value
+            inst.properties[name] = prop['Value'].value
 
     symbols = type.get('Symbols')
     if symbols:
@@ -114,27 +132,27 @@ def instantiate_type(type, from_type, resolved_arguments):
             ]:
                 elem = instantiate_element(symbol)
                 if (
-                    elem['Base Type']
-                    not in ValidElements[inst['Base Type']]['Valid Elements']
+                    elem.base_type
+                    not in ValidElements[inst.base_type]['Valid Elements']
                 ):
                     raise Exception(
-                        f"Element '{name}', of base type '{elem['Base Type']}', can not be "
-                        + f"instantiated in element '{type['Name']}' of base type '{inst['Base Type']}'.\n"
+                        f"Element '{name}', of base type '{elem.base_type}', can not be "
+                        + f"instantiated in element '{type['Name']}' of base type '{inst.base_type}'.\n"
                         + f"File '{get_file_path(type)}', line {symbol['Line Number']}.\n"
-                        + f"Valid inner element types for '{inst['Base Type']}' are: "
-                        + f"{pformat(ValidElements[inst['Base Type']]['Valid Elements'])}."
+                        + f"Valid inner element types for '{inst.base_type}' are: "
+                        + f"{pformat(ValidElements[inst.base_type]['Valid Elements'])}."
                     )
 
                 if 'Elements' not in inst:
-                    inst['Elements'] = {}
+                    inst.elements = {}
 
-                if name in inst['Elements']:
+                if name in inst.elements:
                     raise Exception(
                         f"Can not instantiate element '{name}'.\n"
                         + "Element with such name is already instantiated in one of the ancestor types.\n"
                         + f"File '{get_file_path(type)}', line {symbol['Line Number']}."
                     )
-                inst['Elements'][name] = elem
+                inst.elements[name] = elem
 
     return inst
 
@@ -147,7 +165,7 @@ def instantiate_type_chain(type_chain):
             resolved_arguments = type_chain[i + 1]['Resolved Arguments']
         inst = instantiate_type(t, inst, resolved_arguments)
 
-    inst.pop('Previous Type')
+    del inst.previous_type
 
     count = type_chain[-1].get('Count')
     if count:
@@ -166,19 +184,94 @@ def instantiate_type_chain(type_chain):
                 f"File '{get_file_path(type_chain[-1])}', line {type_chain[-1]['Line Number']}."
             )
 
-        inst['Count'] = val
+        inst.count = val
 
     fill_missing_properties(inst)
 
     return inst
 
 
+def _hashable(val):
+    if type(val) == list:
+        return tuple(_hashable(v) for v in val)
+    return val
+
+
+def _instance_key(element):
+    """Get key of the element instance or None if the instance can not be shared.
+
+    Instance depends only on the element symbol and on values of resolved arguments
+    visible from the element. Resolved arguments visible from the element are
+    attached to its ancestors.
+    """
+    args = []
+    node = element['Parent']
+    while node['Kind'] != 'File':
+        resolved_arguments = node.get('Resolved Arguments')
+        if resolved_arguments:
+            try:
+                values = tuple(
+                    (name, _hashable(arg.value)) for name, arg in resolved_arguments.items()
+                )
+                hash(values)
+            except Exception:
+                return None
+            args.append((node['Id'], values))
+        node = node['Parent']
+
+    return element['Id'], tuple(args)
+
+
 def instantiate_element(element):
-    log.debug(f"Instantiating element '{element['Name']}'.")
+    """Instantiate element.
+
+    Instances of elements with equal keys are built once and shared.
+    Shared instances must not be modified, registerification copies them.
+    Paths of files the instance depends on are recorded, so that
+    the instance can be dropped when any of the files changes.
+    """
+    s = session.current()
+    key = _instance_key(element)
+    if key is not None and key in s.instances:
+        files = s.instance_files[key]
+        instance = s.instances[key]
+    else:
+        s.instantiation_files.append(set())
+        try:
+            instance = _instantiate_element(element)
+        finally:
+            files = frozenset(s.instantiation_files.pop())
+        if key is not None:
+            s.instances[key] = instance
+            s.instance_files[key] = files
+
+    # Instance of the enclosing element depends on files of this one.
+    if s.instantiation_files:
+        s.instantiation_files[-1].update(files)
+
+    return instance
+
+
+def drop_instances(paths):
+    """Drop shared instances depending on any of the files."""
+    s = session.current()
+    for key, files in list(s.instance_files.items()):
+        if not files.isdisjoint(paths):
+            del s.instances[key]
+            del s.instance_files[key]
+
+
+def _instantiate_element(element):
+    if profiling.enabled:
+        profiling.count('Elements Instantiated')
+    log.debug("Instantiating element '%s'.", element['Name'])
     type_chain = resolve_to_base_type(element)
+    session.current().instantiation_files[-1].update(
+        get_file_path(t) for t in type_chain
+    )
     instance = instantiate_type_chain(type_chain)
 
-    if instance['Base Type'] in ['bus', 'block']:
+    if instance.base_type in ['bus', 'block']:
         check_type, err  = check_groups(instance)
         if err:
             raise Exception(
@@ -193,8 +286,8 @@ def instantiate_element(element):
         for name, symbol in symbols.items():
             if symbol['Kind'] == 'Constant':
                 if 'Constants' not in instance:
-                    instance['Constants'] = {name: symbol['Value'].value}
+                    instance.constants = {name: symbol['Value'].value}
                 else:
-                    instance['Constants'][name] = symbol['Value'].value
+                    instance.constants[name] = symbol['Value'].value
 
     return instance
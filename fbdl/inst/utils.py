@@ -1,14 +1,9 @@
+from .. import session
+
+
 def get_file_path(symbol):
-    while True:
-        if symbol['Kind'] != 'File':
-            symbol = symbol['Parent']
-        else:
-            return symbol['Path']
+    return session.current().scope_index.get_file(symbol)['Path']
 
 def file_line_msg(symbol):
     line = symbol['Line Number']
-    while True:
-        if symbol['Kind'] != 'File':
-            symbol = symbol['Parent']
-        else:
-            return f"File '{symbol['Path']}', line {line}."
+    return f"File '{get_file_path(symbol)}', line {line}."
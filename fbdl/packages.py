@@ -2,16 +2,34 @@
 Module for packages dictionary.
 """
 import logging as log
+import os
 from pprint import pformat, pprint
-import networkx as nx
 
+from . import idgen
+from . import profiling
+from . import session
+from .graph import Graph
+from .record import Record
 from .refdict import RefDict
 from .validation import ValidElements
 
 
 class Packages(dict):
+    """Dictionary of loaded packages.
+
+    Packages are loaded only if they are imported. All discovered packages,
+    loaded or not, are kept in the discovered dictionary.
+    """
+
     def __init__(self):
         super().__init__()
+        self.discovered = {}
+        # Key is the package path, value is the path of the directory it was discovered in.
+        self.discovery_roots = {}
+        # Graph of constants dependencies built by the check, and constants by ids.
+        # The evaluation reuses the topological order cached by the graph.
+        self.constants_graph = None
+        self.constants = {}
 
     @staticmethod
     def get_pkg_name(path):
@@ -24,13 +42,7 @@ class Packages(dict):
     @staticmethod
     def _get_symbol_foreign_pkg(symbol, start_node):
         pkg_name, sym = symbol.split('.')
-        node = start_node
-
-        while True:
-            if node['Kind'] == 'File':
-                break
-            else:
-                node = node['Parent']
+        node = session.current().scope_index.get_file(start_node)
 
         imports = node.get('Imports')
         if not imports:
@@ -38,16 +50,12 @@ class Packages(dict):
                 f"Reference to the foreign symbol '{symbol}' in file '{node['Path']}', but file does not import any package."
             )
 
-        pkg = None
-        for name, dict_ in imports.items():
-            if name == pkg_name:
-                pkg = dict_['Package']
-                break
-
-        if pkg is None:
+        import_ = imports.get(pkg_name)
+        if import_ is None:
             raise Exception(
                 f"Reference to the foreign symbol '{symbol}' in file '{node['Path']}', but file does not import package '{pkg_name}'."
             )
+        pkg = import_['Package']
 
         if sym not in pkg['Symbols']:
             raise Exception(
@@ -62,11 +70,17 @@ class Packages(dict):
         """Get reference to the symbol. Start searching from given scope."""
         node = scope
 
-        log.debug(f"Looking for symbol '{symbol}', starting from node '{node['Id']}'.")
+        if profiling.enabled:
+            profiling.count('Symbol Lookups')
+        log.debug("Looking for symbol '%s', starting from node '%s'.", symbol, node['Id'])
 
         if '.' in symbol:
             return Packages._get_symbol_foreign_pkg(symbol, node)
 
+        scope_index = session.current().scope_index
+        if scope_index.get_entry(node) is not None:
+            return scope_index.lookup(symbol, node['Id'])
+
         while True:
             if node.get('Symbols'):
                 if symbol in node['Symbols']:
@@ -91,12 +105,12 @@ class Packages(dict):
 
         pkg_name = self.get_pkg_name(path_pattern)
 
-        if pkg_name not in self:
+        if pkg_name not in self.discovered:
             raise Exception(f"Package '{pkg_name}' not found.")
 
-        pkgs = self[pkg_name]
+        pkgs = self.discovered[pkg_name]
         if len(pkgs) == 1:
-            return self[pkg_name][0]
+            return pkgs[0]
 
         found_pkg = None
         for pkg in pkgs:
@@ -116,44 +130,36 @@ class Packages(dict):
 
     def _build_dependency_graph(self):
         """Build directed graph for packages dependency."""
-        used_packages = [self['main'][0]]
-        edges = []
+        main_pkg = self['main'][0]
+        graph = Graph()
+        graph.add_node(main_pkg['Path'])
 
+        used_packages = [main_pkg]
+        used_ids = {main_pkg['Id']}
         for pkg in used_packages:
             for f in pkg['Files']:
                 if 'Imports' not in f:
                     continue
 
                 for _, imported_pkg in f['Imports'].items():
-                    edge = (pkg['Path'], imported_pkg['Package']['Path'])
-                    if edge not in edges:
-                        edges.append(edge)
+                    graph.add_edge(pkg['Path'], imported_pkg['Package']['Path'])
 
-                    if imported_pkg['Package'] not in used_packages:
+                    if imported_pkg['Package']['Id'] not in used_ids:
+                        used_ids.add(imported_pkg['Package']['Id'])
                         used_packages.append(imported_pkg['Package'])
 
-        log.debug(f"Package dependency graph edges:\n{pformat(edges)}")
-        self.dependency_graph = nx.DiGraph(edges)
+        log.debug("Package dependency graph edges:\n%s", pformat(graph.successors))
+        self.dependency_graph = graph
 
     def _check_dependency_graph(self):
         """Check dependency graph for cycles."""
-        cycles = list(nx.simple_cycles(self.dependency_graph))
+        cycles = self.dependency_graph.cycles()
 
         if cycles:
             raise Exception(
                 f"Found following package dependency cycles:\n{pformat(cycles)}."
             )
 
-    def _get_pkgs_in_evaluation_order(self):
-        paths = list(nx.topological_sort(self.dependency_graph))
-        paths.reverse()
-
-        # If path is empty, then there is only the main package.
-        if not paths:
-            paths.append(self['main'][0]['Path'])
-
-        return [self.get_ref_to_pkg(p) for p in paths]
-
     def _get_expressions(self, node):
         from .expr import ExprDict
 
@@ -161,50 +167,111 @@ class Packages(dict):
 
         type_ = type(node)
 
-        if type == list or type_ == tuple:
+        if type_ == list or type_ == tuple:
             for e in node:
                 expressions += self._get_expressions(e)
-        elif type_ == RefDict or type_ == dict:
-            for _, v in node.items():
-                expressions += self._get_expressions(v)
+        elif type_ == RefDict or type_ == dict or isinstance(node, Record):
+            for k, v in node.items():
+                # Parent is not an inner node.
+                if k != 'Parent':
+                    expressions += self._get_expressions(v)
         elif type_ == ExprDict:
             expressions.append(node)
 
         return expressions
 
-    def evaluate(self):
-        """Evaluate expressions within packages."""
-        self._build_dependency_graph()
-        self._check_dependency_graph()
+    def _get_constants(self):
+        """Get constants which values do not depend on resolved arguments.
+
+        Constants placed within parametrized types, or within instantiations
+        of not base types, are skipped, as they are evaluated during instantiation.
+        """
+        constants = []
+
+        def collect(symbols):
+            for _, symbol in symbols.items():
+                if symbol['Kind'] == 'Constant':
+                    constants.append(symbol)
+                elif (
+                    'Symbols' in symbol
+                    and 'Parameters' not in symbol
+                    and symbol['Type'] in ValidElements
+                ):
+                    collect(symbol['Symbols'])
+
+        for _, pkgs in self.items():
+            for pkg in pkgs:
+                for f in pkg['Files']:
+                    collect(f['Symbols'])
 
-        pkgs = self._get_pkgs_in_evaluation_order()
+        return constants
 
-        for pkg in pkgs:
-            log.info(f"Evaluating package '{pkg['Path']}'")
-
-            # Collect expressions to evaluate.
-            expressions = []
-            for _, symbol in pkg['Symbols'].items():
-                expressions += self._get_expressions(symbol)
-
-            # Number of evaluations tries can be arbitraly changed.
-            # The required number depends on the order and nesting of the symbols in expressions.
-            for i in range(16):
-                log.debug(f"Package evaluation iteration number {i}")
-                all_evaluated = True
-
-                for e in expressions:
-                    if e.value == None:
-                        all_evaluated = False
-
-                if all_evaluated:
-                    log.debug(
-                        f"Package '{pkg['Path']}' evaluated after {i + 1} iterations."
-                    )
-                    break
-            else:
+    def _get_constant_dependencies(self, constant):
+        dependencies = []
+        ids = set()
+        for name in constant['Value'].get_identifiers():
+            sym = self.get_symbol(name, constant)
+            if sym['Kind'] == 'Constant' and sym['Id'] not in ids:
+                ids.add(sym['Id'])
+                dependencies.append(sym)
+
+        return dependencies
+
+    @staticmethod
+    def _constant_msg(constant):
+        node = constant
+        while node['Kind'] != 'File':
+            node = node['Parent']
+
+        return f"'{constant['Name']}', file '{node['Path']}', line {constant['Line Number']}"
+
+    def _build_constants_graph(self):
+        """Build directed graph for constants dependency and check it for cycles."""
+        constants = {}
+        graph = Graph()
+        for constant in self._get_constants():
+            constants[constant['Id']] = constant
+            graph.add_node(constant['Id'])
+            for dep in self._get_constant_dependencies(constant):
+                constants.setdefault(dep['Id'], dep)
+                graph.add_edge(dep['Id'], constant['Id'])
+
+        cycles = graph.cycles()
+        if cycles:
+            position = {id_: i for i, id_ in enumerate(constants)}
+            # Report the cycle in the dependency direction, starting from the first defined constant.
+            ids = list(reversed(cycles[0]))
+            first = min(range(len(ids)), key=lambda i: position[ids[i]])
+            cycle = [constants[id_] for id_ in ids[first:] + ids[:first]]
+            raise Exception(
+                "Found constants dependency cycle:\n  "
+                + "\n  ".join(self._constant_msg(c) for c in cycle + cycle[:1])
+            )
+
+        self.constants_graph = graph
+        self.constants = constants
+
+    def _get_constants_in_evaluation_order(self):
+        """Sort constants topologically, each constant succeeds its dependencies.
+
+        The graph built by the check is reused, it is built here only if packages
+        were not checked.
+        """
+        if self.constants_graph is None:
+            self._build_constants_graph()
+
+        return [self.constants[id_] for id_ in self.constants_graph.topological_order()]
+
+    def evaluate(self):
+        """Evaluate constants within packages.
+
+        Constants are evaluated in topological order of their dependencies,
+        so each of them is evaluated only once.
+        """
+        for constant in self._get_constants_in_evaluation_order():
+            if constant['Value'].value is None:
                 raise Exception(
-                    f"Can't evaluate package '{pkg['Path']}'. Try to increase the evaluation tries number."
+                    f"Can't evaluate constant {self._constant_msg(constant)}."
                 )
 
     def _check_instantiations(self):
@@ -231,7 +298,159 @@ class Packages(dict):
                                         + f"File '{f['Path']}', line number {symbol['Line Number']}."
                                     )
 
+    def assign_content_ids(self):
+        """Replace ids of packages, files and symbols with content ids.
+
+        Keys of content ids consist of the package key, the file name and names
+        of the symbol and of its ancestors. Packages within the directory of the main
+        file are keyed by their path relative to that directory. Other packages,
+        for example libraries, are keyed by the package name and their path relative
+        to the directory they were discovered in, so keys do not depend on the location
+        of the main file.
+        """
+        base = os.path.dirname(self['main'][0]['Path'])
+        ids = {}
+
+        def package_key(pkg_name, pkg):
+            if pkg_name == 'main':
+                return 'main'
+            rel_path = os.path.relpath(pkg['Path'], base)
+            root = self.discovery_roots.get(pkg['Path'])
+            if root is None or not (
+                rel_path == os.pardir or rel_path.startswith(os.pardir + os.sep)
+            ):
+                return rel_path
+            return f"{pkg_name}:{os.path.relpath(pkg['Path'], root)}"
+
+        def assign(node, key):
+            id_ = idgen.content_id(key)
+            if id_ in ids:
+                raise Exception(f"Content ids of '{ids[id_]}' and '{key}' collide.")
+            ids[id_] = key
+            node['Id'] = id_
+
+        for pkg_name, pkgs in self.items():
+            for pkg in pkgs:
+                pkg_key = package_key(pkg_name, pkg)
+                assign(pkg, pkg_key)
+                for f in pkg['Files']:
+                    file_key = f"{pkg_key}/{os.path.basename(f['Path'])}"
+                    assign(f, file_key)
+                    pending = [(f, file_key + ':')]
+                    while pending:
+                        node, key = pending.pop()
+                        for name, symbol in node.get('Symbols', {}).items():
+                            assign(symbol, key + name)
+                            if 'Symbols' in symbol:
+                                pending.append((symbol, key + name + '.'))
+
     def check(self):
+        s = session.current()
+        if s.content_ids:
+            self.assign_content_ids()
         self._check_instantiations()
         self._build_dependency_graph()
         self._check_dependency_graph()
+        s.scope_index.build(self)
+        self._build_constants_graph()
+
+
+class ScopeIndex:
+    """Index of scopes built after parsing.
+
+    Scope is any node which symbols lookup might start from or pass through.
+    Scopes are identified by ids of their nodes. Entry of the scope holds the node,
+    the id of the parent scope and the file owning the scope, so lookups
+    do not have to walk references to parents.
+
+    Results of lookups are memoized per scope and symbol name. Resolved arguments
+    change during instantiation, so together with the found symbol the memo keeps
+    nodes passed on the way that might hold resolved arguments shadowing it.
+    """
+
+    def __init__(self):
+        # Key is the scope id, value is a tuple (node, parent scope id, file).
+        self.scopes = {}
+        # Key is a tuple (scope id, symbol name),
+        # value is a tuple (symbol, nodes with possible resolved arguments, package).
+        self.lookups = {}
+
+    def build(self, packages):
+        self.scopes = {}
+        self.lookups = {}
+
+        for _, pkgs in packages.items():
+            for pkg in pkgs:
+                self.scopes[pkg['Id']] = (pkg, None, None)
+                for f in pkg['Files']:
+                    self.scopes[f['Id']] = (f, pkg['Id'], f)
+                    pending = [f]
+                    while pending:
+                        node = pending.pop()
+                        for _, symbol in node.get('Symbols', {}).items():
+                            self.scopes[symbol['Id']] = (symbol, node['Id'], f)
+                            if 'Symbols' in symbol:
+                                pending.append(symbol)
+
+    def get_entry(self, node):
+        """Get entry of the scope or None if the node is not indexed."""
+        entry = self.scopes.get(node.get('Id'))
+        # Index might have been built for other packages with colliding ids.
+        if entry is not None and entry[0] is getattr(node, 'd', node):
+            return entry
+        return None
+
+    def get_file(self, node):
+        """Get the file owning the node."""
+        entry = self.get_entry(node)
+        if entry is not None and entry[2] is not None:
+            return entry[2]
+
+        while node['Kind'] != 'File':
+            node = node['Parent']
+        return node
+
+    @staticmethod
+    def _might_have_resolved_arguments(node):
+        return 'Parameters' in node or (
+            'Type' in node and node['Type'] not in ValidElements
+        )
+
+    def _resolve(self, symbol, scope_id):
+        nodes = []
+        while True:
+            node, parent_id, _ = self.scopes[scope_id]
+
+            symbols = node.get('Symbols')
+            if symbols and symbol in symbols:
+                return symbols[symbol], tuple(nodes), None
+
+            if self._might_have_resolved_arguments(node):
+                nodes.append(node)
+
+            if parent_id is None:
+                return None, tuple(nodes), node
+
+            scope_id = parent_id
+
+    def lookup(self, symbol, scope_id):
+        key = (scope_id, symbol)
+        memo = self.lookups.get(key)
+        if memo is None:
+            memo = self._resolve(symbol, scope_id)
+            self.lookups[key] = memo
+
+        found, nodes, pkg = memo
+
+        for node in nodes:
+            args = node.get('Resolved Arguments')
+            if args and symbol in args:
+                return args[symbol]
+
+        if found is None:
+            raise Exception(
+                f"Can not find symbol '{symbol}' in package '{pkg['Path']}' starting from node 'foo'."
+            )
+
+        return found
+
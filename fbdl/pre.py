@@ -2,7 +2,8 @@
 Module containing code that must or should be run before running the parser.
 It includes:
   1. Package discovery.
-  2. Files sanity checks.
+  2. Loading of imported packages.
+  3. Files sanity checks, run by the parser on the loaded code.
 """
 
 import logging as log
@@ -14,38 +15,63 @@ from .packages import Packages
 from . import idgen
 
 
-def check_path(path, packages):
-    pkg_name = ""
+def check_path(path, packages, root):
+    """Check if path is a package directory.
+
+    Files of the package are not touched, they are loaded only if the package
+    is imported, see load_package().
+
+    Parameters
+    ----------
+    root
+        Path of the directory the package is discovered in.
+    """
+    for f in os.listdir(path):
+        if f.endswith(".fbd") and os.path.isfile(os.path.join(path, f)):
+            break
+    else:
+        return
+
+    pkg_name = Packages.get_pkg_name(os.path.basename(path))
+    if pkg_name == "main":
+        raise Exception(f"Package can not be named 'main': {path}.")
+
+    log.debug(f"Adding package '{pkg_name}', path '{path}'.")
+
+    pkg = {}
+    pkg['Path'] = path
+    pkg['Kind'] = 'Package'
+    packages.discovery_roots[path] = root
+    if pkg_name in packages.discovered:
+        packages.discovered[pkg_name].append(pkg)
+    else:
+        packages.discovered[pkg_name] = [pkg]
+
+
+def load_package(pkg, packages):
+    """Load files of the discovered package and add the package to the packages dictionary.
+
+    Files are only listed, their content is read once, when the file is parsed.
+    """
     files = []
-    ls_files = os.listdir(path)
+    ls_files = os.listdir(pkg['Path'])
     ls_files.sort()
     for f in ls_files:
         file_ = {}
-        file_path = os.path.join(path, f)
+        file_path = os.path.join(pkg['Path'], f)
         if os.path.isfile(file_path) and f.endswith(".fbd"):
-            if not pkg_name:
-                pkg_name = Packages.get_pkg_name(os.path.basename(path))
             file_['Id'] = idgen.generate()
             file_['Kind'] = 'File'
             file_['Path'] = file_path
-            file_['Handle'] = open(file_path, encoding='UTF-8')
             files.append(file_)
 
-    if pkg_name:
-        if pkg_name == "main":
-            raise Exception(f"Package can not be named 'main': {path}.")
+    pkg['Files'] = tuple(files)
+    pkg['Id'] = idgen.generate()
 
-        log.debug(f"Adding package '{pkg_name}', path '{path}'.")
+    pkg_name = Packages.get_pkg_name(os.path.basename(pkg['Path']))
+    log.debug(f"Loading package '{pkg_name}', path '{pkg['Path']}'.")
 
-        pkg = {}
-        pkg['Path'] = path
-        pkg['Files'] = tuple(files)
-        pkg['Id'] = idgen.generate()
-        pkg['Kind'] = 'Package'
-        if pkg_name in packages:
-            packages[pkg_name].append(pkg)
-        else:
-            packages[pkg_name] = [pkg]
+    packages[pkg_name] = packages.get(pkg_name, ()) + (pkg,)
 
 
 def discover_packages():
@@ -77,7 +103,7 @@ def discover_packages():
         paths = [os.path.join(path_to_look, d) for d in dirs]
 
         for p in paths:
-            check_path(p, packages)
+            check_path(p, packages, path_to_look)
 
     log.info(f"Looking for packages in 'fbd-' directories.")
     for p, _, _ in os.walk(cwd):
@@ -88,31 +114,96 @@ def discover_packages():
         if not basename.startswith('fbd-'):
             continue
 
-        check_path(p, packages)
+        check_path(p, packages, cwd)
 
-    for pkg_name, pkgs in packages.items():
-        packages[pkg_name] = tuple(pkgs)
+    for pkg_name, pkgs in packages.discovered.items():
+        packages.discovered[pkg_name] = tuple(pkgs)
 
     return packages
 
 
+def read_file(path):
+    """Read the file content with a single read.
+
+    Line endings are normalized to '\n', as the parser expects.
+
+    Returns
+    -------
+        Bytes with the UTF-8 encoded content of the file.
+    """
+    with open(path, 'rb') as f:
+        code = f.read()
+
+    if b'\r' in code:
+        code = code.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+
+    return code
+
+
 def get_indent(line):
-    indent = 0
-    for char in line:
-        if char == '\t':
-            indent += 1
-        elif char == ' ':
-            return None
-        else:
-            break
+    indent = len(line) - len(line.lstrip(b'\t'))
+    if line[indent : indent + 1] == b' ':
+        return None
     return indent
 
 
-def check_indent(file_):
+# Translation table mapping all bytes except tab and newline to 'x'.
+_INDENT_STRUCTURE = bytes(b if b in b'\t\n' else ord('x') for b in range(256))
+
+
+def _indent_might_be_invalid(code):
+    """Quickly check if indent of the code might be invalid.
+
+    All operations work on the whole buffer, there is no loop over lines.
+    The check never misses an invalid indent, but it might report a false positive.
+    """
+    if code.startswith(b' ') or b'\n ' in code or b'\t ' in code:
+        return True
+
+    # Reduce every line to its leading tabs followed by 'y' if the line has any content.
+    # The '\ny\n' prefix is the virtual line with indent 0 preceding the first line.
+    s = b'\ny\n' + code.translate(_INDENT_STRUCTURE)
+    while b'x\t' in s:
+        s = s.replace(b'x\t', b'x')
+    s = s.replace(b'\nx', b'\ny').replace(b'\tx', b'\ty').translate(None, b'x')
+    # Empty lines are ignored.
+    while b'\n\n' in s:
+        s = s.replace(b'\n\n', b'\n')
+
+    max_indent = 0
+    while b'\t' * (max_indent + 1) in s:
+        max_indent += 1
+
+    # Look for a line with indent greater by at least 2 than indent of the previous line.
+    for indent in range(max_indent - 1):
+        tabs = b'\t' * indent
+        if b'\n' + tabs + b'y\n' + tabs + b'\t\t' in s:
+            return True
+        # Line consisting only of tabs.
+        if indent and b'\n' + tabs + b'\n' + tabs + b'\t\t' in s:
+            return True
+
+    return False
+
+
+def check_indent(code, path):
+    """Check indent of the file code.
+
+    Parameters
+    ----------
+    code
+        Bytes with the file content, as returned by read_file().
+    path
+        Path to the file, used in error messages.
+    """
+    # Lines are checked one by one only to find the line for the error message.
+    if not _indent_might_be_invalid(code):
+        return
+
     current_indent = 0
-    for i, line in enumerate(file_):
+    for i, line in enumerate(code.split(b'\n')):
         # Ignore empty lines.
-        if line == '\n':
+        if not line:
             continue
 
         indent = get_indent(line)
@@ -120,13 +211,13 @@ def check_indent(file_):
             raise Exception(
                 "Space character ' ' is not allowed in indent.\n"
                 + "Use tab character '\\t'.\n"
-                + f"File '{file_.name}', line number {i + 1}."
+                + f"File '{path}', line number {i + 1}."
             )
 
         if indent > current_indent + 1:
             raise Exception(
                 f"Multi indent detected.\n"
-                + f"File '{file_.name}', line number {i + 1}."
+                + f"File '{path}', line number {i + 1}."
             )
         current_indent = indent
 
@@ -150,7 +241,6 @@ def add_main_file(main, packages):
                     'Id': idgen.generate(),
                     'Kind': 'File',
                     'Path': main,
-                    'Handle': open(main, encoding='UTF-8'),
                 }
             ],
             'Path': path,
@@ -175,11 +265,6 @@ def prepare_packages(main):
     packages = discover_packages()
 
     add_main_file(main, packages)
-    log.debug(f"Found following packages:\n{pformat(packages)}")
-
-    for pkg_name, pkgs in packages.items():
-        for pkg in pkgs:
-            for f in pkg['Files']:
-                check_indent(f['Handle'])
+    log.debug(f"Found following packages:\n{pformat(packages.discovered)}")
 
     return packages
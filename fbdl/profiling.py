@@ -0,0 +1,172 @@
+"""
+Module for profiling of the compilation pipeline.
+
+Profiler measures wall time, peak memory and counters of each stage.
+Counters are incremented only while profiling is enabled, so on hot paths
+the cost of disabled profiling is a single check of the 'enabled' flag.
+Visited tree-sitter nodes are nodes the parser builds symbols, scopes or expressions
+from. Nodes visited in worker processes are not counted.
+
+Counters are kept by the stage, so stages of compilations running concurrently
+in other threads do not affect each other. Memory is traced for the whole
+process, so peak memory of concurrent stages includes allocations of each other.
+"""
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+COUNTERS = (
+    'Files Parsed',
+    'Nodes Visited',
+    'Symbol Lookups',
+    'Expression Evaluations',
+    'Elements Instantiated',
+)
+
+# Number of entered profilers.
+enabled = 0
+_enabled_lock = threading.Lock()
+
+# Counters of the stage being measured in the current context.
+_stage_counters = contextvars.ContextVar('fbdl_stage_counters', default=None)
+
+# Available since Python 3.9.
+_reset_peak = getattr(tracemalloc, 'reset_peak', None)
+
+
+def count(name, n=1):
+    """Increment counter of the current stage. Counts outside of stages are ignored."""
+    counters = _stage_counters.get()
+    if counters is not None:
+        counters[name] += n
+
+
+def stage(profiler, name):
+    """Get context manager measuring the stage. Profiler might be None."""
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(name)
+
+
+class Profiler:
+    """
+    Parameters
+    ----------
+    cprofile_path
+        Path to the file for cProfile statistics. If None, cProfile is not used.
+    trace_path
+        Path to the file for Chrome trace events. If None, trace is not written.
+    """
+
+    def __init__(self, cprofile_path=None, trace_path=None):
+        self.cprofile_path = cprofile_path
+        self.trace_path = trace_path
+        self.cprofile = None
+
+        # List of dictionaries with results of stages in order of execution.
+        self.stages = []
+        self.start_time = None
+
+    def __enter__(self):
+        global enabled
+
+        with _enabled_lock:
+            if not enabled:
+                tracemalloc.start()
+            enabled += 1
+
+        if self.cprofile_path:
+            import cProfile
+
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.start_time = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *exc):
+        global enabled
+
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.cprofile_path)
+            self.cprofile = None
+
+        with _enabled_lock:
+            enabled -= 1
+            if not enabled:
+                tracemalloc.stop()
+
+        if self.trace_path:
+            self.write_trace(self.trace_path)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Measure the stage.
+
+        Without tracemalloc.reset_peak() (Python older than 3.9), the peak is known
+        only if it exceeds the peak of previous stages. Otherwise, memory allocated
+        by the stage and not freed is reported.
+        """
+        counters = dict.fromkeys(COUNTERS, 0)
+        token = _stage_counters.set(counters)
+        if _reset_peak is not None:
+            _reset_peak()
+        start_memory, start_peak = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            _stage_counters.reset(token)
+
+            memory, peak = tracemalloc.get_traced_memory()
+            if _reset_peak is not None or peak > start_peak:
+                peak_memory = peak - start_memory
+            else:
+                peak_memory = max(memory - start_memory, 0)
+
+            self.stages.append(
+                {
+                    'Name': name,
+                    'Start': start - self.start_time,
+                    'Time': end - start,
+                    'Peak Memory': peak_memory,
+                    'Counters': {c: n for c, n in counters.items() if n},
+                }
+            )
+
+    def report(self):
+        """Get results of stages as a human readable table."""
+        lines = [f"{'Stage':<24}{'Time [s]':>10}{'Peak Memory [KiB]':>20}  Counters"]
+        for s in self.stages:
+            cnts = ', '.join(f"{c}: {n}" for c, n in s['Counters'].items())
+            lines.append(
+                f"{s['Name']:<24}{s['Time']:>10.4f}{s['Peak Memory'] / 1024:>20.1f}  {cnts}"
+            )
+        return '\n'.join(lines)
+
+    def write_trace(self, path):
+        """Write results of stages in the Chrome trace event format."""
+        events = []
+        for s in self.stages:
+            args = dict(s['Counters'])
+            args['Peak Memory'] = s['Peak Memory']
+            events.append(
+                {
+                    'name': s['Name'],
+                    'ph': 'X',
+                    'ts': s['Start'] * 1e6,
+                    'dur': s['Time'] * 1e6,
+                    'pid': os.getpid(),
+                    'tid': 0,
+                    'args': args,
+                }
+            )
+
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,184 @@
+"""
+Module for records, nodes of the packages and instantiation trees kept in slots.
+
+Symbols and instances are the most numerous nodes, so instead of dictionaries
+they are records with attributes kept in slots. Records support the subset
+of the dictionary interface used by the compiler, with the same keys as the
+dictionaries had. The dictionary form is produced only at the output boundary,
+by dumps and by the parse cache.
+"""
+
+_MISSING = object()
+
+
+class Record:
+    """Base class of records.
+
+    Missing keys are unset attributes. Setting a key not present in KEYS
+    raises KeyError. Items are ordered as KEYS, not in order of insertion.
+    """
+
+    __slots__ = ()
+
+    # Key is the dictionary key, value is the attribute name.
+    KEYS = {}
+
+    def __getitem__(self, key):
+        val = getattr(self, self.KEYS[key], _MISSING)
+        if val is _MISSING:
+            raise KeyError(key)
+        return val
+
+    def __setitem__(self, key, val):
+        setattr(self, self.KEYS[key], val)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self, self.KEYS[key])
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        attr = self.KEYS.get(key)
+        return attr is not None and hasattr(self, attr)
+
+    def get(self, key, default=None):
+        attr = self.KEYS.get(key)
+        if attr is None:
+            return default
+        return getattr(self, attr, default)
+
+    def pop(self, key, default=_MISSING):
+        val = self.get(key, _MISSING)
+        if val is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        del self[key]
+        return val
+
+    def items(self):
+        items = []
+        for key, attr in self.KEYS.items():
+            val = getattr(self, attr, _MISSING)
+            if val is not _MISSING:
+                items.append((key, val))
+        return items
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        return [val for _, val in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.items())
+
+    def to_dict(self):
+        """Get the dictionary form of the record. Values are not converted."""
+        return dict(self.items())
+
+    def copy(self):
+        """Get shallow copy of the record."""
+        copy = self.__class__.__new__(self.__class__)
+        for attr in self.KEYS.values():
+            val = getattr(self, attr, _MISSING)
+            if val is not _MISSING:
+                setattr(copy, attr, val)
+        return copy
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    # Records are pickled in the dictionary form, so pickles, for example
+    # entries of the parse cache, do not depend on names of attributes.
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        for key, val in state.items():
+            self[key] = val
+
+
+class Symbol(Record):
+    """Symbol built by the parser, element type definition, instantiation or constant."""
+
+    __slots__ = (
+        'id',
+        'kind',
+        'line_number',
+        'name',
+        'count',
+        'type',
+        'parameters',
+        'arguments',
+        'properties',
+        'symbols',
+        'value',
+        'parent',
+        'resolved_arguments',
+    )
+
+    KEYS = {
+        'Id': 'id',
+        'Kind': 'kind',
+        'Line Number': 'line_number',
+        'Name': 'name',
+        'Count': 'count',
+        'Type': 'type',
+        'Parameters': 'parameters',
+        'Arguments': 'arguments',
+        'Properties': 'properties',
+        'Symbols': 'symbols',
+        'Value': 'value',
+        'Parent': 'parent',
+        'Resolved Arguments': 'resolved_arguments',
+    }
+
+    def __init__(self, id_, kind, line_number, name):
+        self.id = id_
+        self.kind = kind
+        self.line_number = line_number
+        self.name = name
+
+
+class Element(Record):
+    """Instance of the element built by the instantiation and completed by the registerification."""
+
+    __slots__ = (
+        'base_type',
+        'properties',
+        'previous_type',
+        'elements',
+        'count',
+        'constants',
+        'access',
+        'sizes',
+        'address_space',
+    )
+
+    KEYS = {
+        'Base Type': 'base_type',
+        'Properties': 'properties',
+        'Previous Type': 'previous_type',
+        'Elements': 'elements',
+        'Count': 'count',
+        'Constants': 'constants',
+        'Access': 'access',
+        'Sizes': 'sizes',
+        'Address Space': 'address_space',
+    }
+
+    def __init__(self, base_type, properties):
+        self.base_type = base_type
+        self.properties = properties
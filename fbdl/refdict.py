@@ -2,7 +2,11 @@ class RefDict(dict):
     def __init__(self, d):
         super().__init__()
         self.d = d
-        self.id = self.d['Id']
+
+    @property
+    def id(self):
+        # Ids might be reassigned after the reference is created.
+        return self.d['Id']
 
     def __contains__(self, key):
         if key in self.d:
@@ -13,6 +17,10 @@ class RefDict(dict):
         return f"RD to '{self.id}'"
         # return f"{{'RefDict to' : {self.id}}}"
 
+    def __reduce__(self):
+        # Referenced dictionary might not be complete yet when unpickling.
+        return (RefDict.__new__, (RefDict,), self.__dict__)
+
     def __getitem__(self, key):
         return self.d[key]
 
@@ -1,46 +1,109 @@
 import math
 
 
-def single(bus_width, base_addr, width):
-    access = {
-        'Address': base_addr,
-        'Count': math.ceil(width / bus_width)
+class Access:
+    """Access to the registers of a functionality.
+
+    Access is created for every functionality, so attributes are kept in slots
+    instead of a dictionary. The dictionary form, with the same keys as in the
+    dumps, is available via items() and subscription.
+    """
+
+    __slots__ = (
+        'address',
+        'count',
+        'strategy',
+        'mask',
+        'accesses_per_item',
+        'items_per_access',
+        'bunch_size',
+        'accesses_per_bunch',
+    )
+
+    KEYS = {
+        'Address': 'address',
+        'Count': 'count',
+        'Strategy': 'strategy',
+        'Mask': 'mask',
+        'Accesses per Item': 'accesses_per_item',
+        'Items per Access': 'items_per_access',
+        'Bunch Size': 'bunch_size',
+        'Accesses per Bunch': 'accesses_per_bunch',
     }
 
-    if width > bus_width:
-        access['Strategy'] = "Linear"
-        access['Mask'] = ((width - 1) % bus_width, 0)
+    def __init__(self, address, count=None, strategy=None, mask=None):
+        self.address = address
+        self.count = count
+        self.strategy = strategy
+        self.mask = mask
+        self.accesses_per_item = None
+        self.items_per_access = None
+        self.bunch_size = None
+        self.accesses_per_bunch = None
+
+    def items(self):
+        """Get (key, value) pairs of the dictionary form. Unset attributes are skipped."""
+        items = []
+        for key, attr in self.KEYS.items():
+            val = getattr(self, attr)
+            if val is not None:
+                items.append((key, val))
+        return items
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __getitem__(self, key):
+        val = getattr(self, self.KEYS[key])
+        if val is None:
+            raise KeyError(key)
+        return val
+
+    def __contains__(self, key):
+        return key in self.KEYS and getattr(self, self.KEYS[key]) is not None
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+
+def single(bus_width, base_addr, width, offset=0):
+    """Get access to the functionality starting at given bit offset of the register."""
+    access = Access(base_addr, math.ceil((offset + width) / bus_width))
+
+    if offset + width > bus_width:
+        access.strategy = "Linear"
+        access.mask = ((offset + width - 1) % bus_width, offset)
     else:
-        access['Strategy'] = "Single"
-        access['Mask'] = (width - 1, 0)
+        access.strategy = "Single"
+        access.mask = (offset + width - 1, offset)
 
     return access
 
 
 def array(bus_width, count, base_addr, width):
-    access = {
-        'Address': base_addr,
-        'Accesses per Item': math.ceil(width / bus_width),
-        'Items per Access': math.floor(bus_width / width)
-    }
+    access = Access(base_addr)
+    access.accesses_per_item = math.ceil(width / bus_width)
+    access.items_per_access = math.floor(bus_width / width)
 
-    if access['Accesses per Item'] == 1 and access['Items per Access'] == 1:
-        access['Strategy'] = 'Single'
-        access['Count'] = count
-        access['Mask'] = (width - 1, 0)
-    elif access['Accesses per Item'] == 1 and access['Items per Access'] > 1:
-        access['Strategy'] = 'Multiple'
-        access['Count'] = math.ceil(count / access['Items per Access'])
+    if access.accesses_per_item == 1 and access.items_per_access == 1:
+        access.strategy = 'Single'
+        access.count = count
+        access.mask = (width - 1, 0)
+    elif access.accesses_per_item == 1 and access.items_per_access > 1:
+        access.strategy = 'Multiple'
+        access.count = math.ceil(count / access.items_per_access)
     else:
-        access['Strategy'] = 'Bunch'
-        # TODO: Calculate it correctly.
-        access['Count'] = 0
-        # Number of items in bunch.
-        if (width % bus_width) == 0:
-            access['Bunch Size'] = 1
-        else:
-            access['Bunch Size'] = bus_width // (width % bus_width)
+        access.strategy = 'Bunch'
+        # Items are packed one after another, bunch is the smallest number
+        # of items occupying whole registers.
+        access.bunch_size = bus_width // math.gcd(width, bus_width)
         # Number of accesses for bunch transfer.
-        access['Accesses per Bunch'] = access['Bunch Size'] * width // bus_width + 1
+        access.accesses_per_bunch = access.bunch_size * width // bus_width
+        access.count = math.ceil(count * width / bus_width)
 
     return access
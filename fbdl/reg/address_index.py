@@ -0,0 +1,222 @@
+"""
+Module for reverse lookup of elements by address.
+
+Index is built from the registerified bus, it is not expanded for items of arrays.
+Each block keeps a sorted array of starts of address segments, together with
+elements occupying each segment. Lookup bisects segments of the block and descends
+into subblocks, array indices are computed with the stride arithmetic.
+Lookup takes O(d log n) time, where d is the depth of the bus and n is the number
+of elements within a single block.
+"""
+from bisect import bisect_left, bisect_right
+
+from . import reg
+
+
+class _Scope:
+    """Address segments of the block, addresses are relative to the block base address."""
+
+    __slots__ = ('starts', 'owners')
+
+    def __init__(self, entries):
+        """
+        Parameters
+        ----------
+        entries
+            List of tuples (first address, last address, entry).
+        """
+        bounds = set()
+        for first, last, _ in entries:
+            bounds.add(first)
+            bounds.add(last + 1)
+        self.starts = sorted(bounds)
+
+        owners = [[] for _ in self.starts]
+        for first, last, entry in entries:
+            for i in range(
+                bisect_left(self.starts, first), bisect_left(self.starts, last + 1)
+            ):
+                owners[i].append((first, entry))
+        self.owners = [tuple(o) for o in owners]
+
+    def find(self, addr):
+        """Get tuple of (first address, entry) pairs of entries occupying the address."""
+        i = bisect_right(self.starts, addr) - 1
+        if i < 0:
+            return ()
+        return self.owners[i]
+
+
+class _Block:
+    __slots__ = ('count', 'size', 'scope')
+
+    def __init__(self, count, size, scope):
+        # Count is None if the block is not an array.
+        self.count = count
+        self.size = size
+        self.scope = scope
+
+
+class _Functionality:
+    __slots__ = (
+        'path',
+        'bus_width',
+        'width',
+        'count',
+        'strategy',
+        'items_per_access',
+        'offset',
+    )
+
+    def __init__(self, path, elem, access, bus_width):
+        self.path = path
+        self.bus_width = bus_width
+        self.width = elem['Properties']['width']
+        # Count is None if the functionality is not an array.
+        self.count = elem.get('Count')
+        self.strategy = access['Strategy']
+        self.items_per_access = access.get('Items per Access')
+        self.offset = 0
+        if self.count is None:
+            self.offset = access['Mask'][1]
+
+    def _mask(self, start, reg):
+        """Get mask of the item starting at given bit within the register."""
+        low = start - reg * self.bus_width
+        high = low + self.width - 1
+        return min(high, self.bus_width - 1), max(low, 0)
+
+    def lookup(self, reg, indices, hits):
+        """Add items occupying the register to the hits.
+
+        Parameters
+        ----------
+        reg
+            Register number relative to the access address.
+        """
+        if self.count is None:
+            hits.append(
+                {
+                    'Path': self.path,
+                    'Indices': indices,
+                    'Mask': self._mask(self.offset, reg),
+                }
+            )
+            return
+
+        if self.strategy == 'Bunch':
+            reg_bit = reg * self.bus_width
+            first = reg_bit // self.width
+            last = min((reg_bit + self.bus_width - 1) // self.width, self.count - 1)
+            for i in range(first, last + 1):
+                hits.append(
+                    {
+                        'Path': self.path,
+                        'Indices': indices + (i,),
+                        'Mask': self._mask(i * self.width, reg),
+                    }
+                )
+            return
+
+        ipa = self.items_per_access
+        first = reg * ipa
+        for i in range(first, min(first + ipa, self.count)):
+            low = (i - first) * self.width
+            hits.append(
+                {
+                    'Path': self.path,
+                    'Indices': indices + (i,),
+                    'Mask': (low + self.width - 1, low),
+                }
+            )
+
+
+class AddressIndex:
+    """Index resolving addresses to elements of the registerified bus.
+
+    Results of lookups are lists of dictionaries with the 'Path', 'Indices' and 'Mask' keys,
+    one for each item occupying the address, sorted by the mask lower bit.
+    Indices are indices within arrays on the path, from the outermost one.
+    """
+
+    def __init__(self, bus):
+        self.scope = None
+        if 'main' not in bus:
+            return
+
+        main = bus['main']
+        self.bus_width = main['Properties']['width']
+        self.scope = self._build(main, 'main')
+
+    def _build(self, block, path):
+        entries = []
+        for name, elem in block.get('Elements', {}).items():
+            elem_path = f"{path}.{name}"
+
+            if elem['Base Type'] == 'block':
+                space = elem['Address Space']
+                # Addresses of subblocks are assigned within the last instance of the parent.
+                first = space[0][0] - block['Address Space'][-1][0]
+                if 'Count' in elem:
+                    count, size = space.count, space.block_size
+                else:
+                    count, size = None, space[0][1] - space[0][0] + 1
+
+                scope = self._build(elem, elem_path)
+                last = first + (count if count is not None else 1) * size - 1
+                entries.append((first, last, _Block(count, size, scope)))
+                continue
+
+            for func_path, func in reg.functionalities(elem, elem_path):
+                access = func.get('Access')
+                if access is None or not access['Count']:
+                    continue
+
+                first = access['Address']
+                functionality = _Functionality(func_path, func, access, self.bus_width)
+                entries.append((first, first + access['Count'] - 1, functionality))
+
+        return _Scope(entries)
+
+    def lookup(self, addr):
+        """Get items occupying the address. Empty list is returned for unused addresses."""
+        hits = []
+        if self.scope is not None:
+            self._lookup(self.scope, addr, (), hits)
+        hits.sort(key=lambda h: h['Mask'][1])
+        return hits
+
+    def _lookup(self, scope, addr, indices, hits):
+        for first, entry in scope.find(addr):
+            offset = addr - first
+            if isinstance(entry, _Block):
+                if entry.count is None:
+                    self._lookup(entry.scope, offset, indices, hits)
+                else:
+                    idx, offset = divmod(offset, entry.size)
+                    self._lookup(entry.scope, offset, indices + (idx,), hits)
+            else:
+                entry.lookup(offset, indices, hits)
+
+    def lookup_many(self, addresses):
+        """Get items occupying each of the addresses.
+
+        Results of repeated addresses are computed once. Each address gets
+        its own copy, so results can be modified independently.
+
+        Returns
+        -------
+            List of results, one per address.
+        """
+        results = {}
+        hits = []
+        for addr in addresses:
+            result = results.get(addr)
+            if result is None:
+                result = self.lookup(addr)
+                results[addr] = result
+            else:
+                result = [dict(h) for h in result]
+            hits.append(result)
+
+        return hits
@@ -0,0 +1,151 @@
+"""
+Module for exporting flattened address map of the registerified bus.
+
+Address map has one row for each register occupied by each item of each functionality.
+Arrays of blocks and arrays of functionalities are expanded with broadcasted
+products of strides, there are no per item Python calls.
+
+The module requires the 'numpy' package.
+"""
+
+from . import reg
+
+FIELDS = ('Address', 'Path Id', 'Mask High', 'Mask Low')
+
+
+def _import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise Exception("Exporting address map requires the 'numpy' package.")
+
+    return numpy
+
+
+def _item_start_bits(np, access, count, width, bus_width):
+    """Get start bits of items of functionality, relative to the block base address."""
+    base = access['Address'] * bus_width
+
+    if count is None:
+        return np.array([base + access['Mask'][1]], dtype=np.int64)
+
+    idx = np.arange(count, dtype=np.int64)
+    if access['Strategy'] == 'Bunch':
+        return base + idx * width
+
+    ipa = access['Items per Access']
+    return base + (idx // ipa) * bus_width + (idx % ipa) * width
+
+
+def _registers(np, start_bits, width, bus_width):
+    """Split bit ranges of items into registers.
+
+    Returns
+    -------
+        Tuple (item indexes, addresses, mask high, mask low), one row per register.
+    """
+    end_bits = start_bits + width - 1
+    first = start_bits // bus_width
+    counts = end_bits // bus_width - first + 1
+
+    items = np.repeat(np.arange(len(start_bits)), counts)
+    # Index of the register within the item.
+    steps = np.arange(len(items)) - np.repeat(np.cumsum(counts) - counts, counts)
+    addrs = first[items] + steps
+
+    reg_bits = addrs * bus_width
+    low = np.maximum(start_bits[items] - reg_bits, 0)
+    high = np.minimum(end_bits[items] - reg_bits, bus_width - 1)
+
+    return items, addrs, high, low
+
+
+def _block_bases(np, block, parent, parent_bases):
+    """Get absolute base addresses of all instances of the block."""
+    space = block['Address Space']
+    # Addresses of subblocks are assigned within the last instance of the parent.
+    offset = space[0][0] - parent['Address Space'][-1][0]
+
+    if 'Count' not in block:
+        return parent_bases + offset
+
+    strides = np.arange(space.count, dtype=np.int64) * space.block_size
+    return (parent_bases[:, None] + offset + strides[None, :]).ravel()
+
+
+def address_map(bus):
+    """Get flattened address map of the registerified bus.
+
+    Parameters
+    ----------
+    bus
+        Registerified bus.
+
+    Returns
+    -------
+        Dictionary with 'Paths' list, where index is the path id,
+        and with NumPy arrays for each of FIELDS. Rows are sorted by address
+        and mask low bit.
+    """
+    np = _import_numpy()
+
+    paths = []
+    columns = {field: [] for field in FIELDS}
+
+    if 'main' in bus:
+        main = bus['main']
+        bus_width = main['Properties']['width']
+
+        pending = [(main, 'main', np.zeros(1, dtype=np.int64))]
+        while pending:
+            block, path, bases = pending.pop()
+            for name, elem in block.get('Elements', {}).items():
+                elem_path = f"{path}.{name}"
+
+                if elem['Base Type'] == 'block':
+                    pending.append((elem, elem_path, _block_bases(np, elem, block, bases)))
+                    continue
+
+                for func_path, func in reg.functionalities(elem, elem_path):
+                    access = func.get('Access')
+                    if access is None:
+                        continue
+
+                    width = func['Properties']['width']
+                    start_bits = _item_start_bits(
+                        np, access, func.get('Count'), width, bus_width
+                    )
+                    start_bits = (
+                        bases[:, None] * bus_width + start_bits[None, :]
+                    ).ravel()
+                    _, addrs, high, low = _registers(np, start_bits, width, bus_width)
+
+                    columns['Address'].append(addrs)
+                    columns['Path Id'].append(
+                        np.full(len(addrs), len(paths), dtype=np.int64)
+                    )
+                    columns['Mask High'].append(high)
+                    columns['Mask Low'].append(low)
+                    paths.append(func_path)
+
+    addr_map = {'Paths': paths}
+    for field, arrays in columns.items():
+        addr_map[field] = np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+
+    order = np.lexsort((addr_map['Mask Low'], addr_map['Address']))
+    for field in FIELDS:
+        addr_map[field] = addr_map[field][order]
+
+    return addr_map
+
+
+def save(bus, path):
+    """Save flattened address map of the registerified bus to the NumPy .npz file."""
+    np = _import_numpy()
+
+    addr_map = address_map(bus)
+    np.savez(
+        path,
+        **{field.lower().replace(' ', '_'): addr_map[field] for field in FIELDS},
+        paths=np.array(addr_map['Paths'], dtype=str),
+    )
@@ -0,0 +1,95 @@
+"""
+Module for structural hashing of the instantiated bus.
+
+The tree is walked once and its canonical encoding is streamed into the hash,
+element by element, so the whole tree is never materialized as a single string.
+Elements are encoded as compact JSON, which is self-delimiting, so different
+trees can not produce the same stream. The encoding depends neither on the
+Python version nor on the hash seed.
+
+Digests of blocks are computed separately and cached, so blocks shared
+between many places of the tree are walked only once.
+"""
+import hashlib
+import json
+
+from .access import Access
+from .iters import AddressSpace
+from ..record import Record
+
+# Maximal size for the BLAKE2b, so buses up to 512 bits wide get full width UUIDs.
+DIGEST_SIZE = 64
+
+
+def _default(obj):
+    """Encode objects not supported by the JSON encoder.
+
+    Only types with stable encodings are supported. Falling back to repr()
+    could embed memory addresses, so digests would differ between runs.
+    """
+    type_ = type(obj)
+    if type_ == Access or isinstance(obj, Record):
+        return obj.to_dict()
+    if type_ == AddressSpace:
+        return [obj.base_addr, obj.count, obj.block_size]
+    raise TypeError(
+        f"Object of type '{type_.__name__}' can not be encoded for the bus digest."
+    )
+
+
+_encode = json.JSONEncoder(
+    separators=(',', ':'), check_circular=False, default=_default
+).encode
+
+
+# Number of encoded elements flushed into the hash at once.
+CHUNK_SIZE = 1024
+
+
+class _Hasher:
+    def __init__(self):
+        # Key is the id of the block, value is its digest.
+        self.digests = {}
+
+    def update_elements(self, h, elements):
+        h.update(b'E%d:' % len(elements))
+        # Elements are encoded in chunks of [name, element] pairs.
+        # Blocks are replaced with hex strings of their digests, elements are never strings.
+        chunk = []
+        for name, elem in elements.items():
+            if 'Elements' in elem:
+                chunk.append((name, self.block_digest(elem).hex()))
+            else:
+                chunk.append((name, elem))
+
+            if len(chunk) >= CHUNK_SIZE:
+                h.update(_encode(chunk).encode())
+                chunk.clear()
+        h.update(_encode(chunk).encode())
+
+    def block_digest(self, block):
+        digest = self.digests.get(id(block))
+        if digest is None:
+            h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+            h.update(b'%d:' % len(block))
+            for key, val in block.items():
+                h.update(_encode(key).encode())
+                if key == 'Elements':
+                    self.update_elements(h, val)
+                else:
+                    h.update(_encode(val).encode())
+            digest = h.digest()
+            self.digests[id(block)] = digest
+        return digest
+
+
+def digest(elements):
+    """Get structural digest of the dictionary of elements, for example of the bus."""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    _Hasher().update_elements(h, elements)
+    return h.digest()
+
+
+def uuid(bus, width):
+    """Get bus UUID, the structural digest of the bus truncated to the given width."""
+    return int.from_bytes(digest(bus), 'big') & (2 ** width - 1)
@@ -1,7 +1,21 @@
+from array import array
 import math
 
 
 class RegisterArray:
+    __slots__ = (
+        'bus_width',
+        'count',
+        'base_addr',
+        'width',
+        'accesses_per_item',
+        'items_per_access',
+        'bunch_size',
+        'accesses_per_bunch',
+        'strategy',
+        'registers_count',
+    )
+
     def __init__(self, bus_width, count, base_addr, width):
         self.bus_width = bus_width
         self.count = count
@@ -10,13 +24,10 @@ class RegisterArray:
 
         self.accesses_per_item = math.ceil(width / bus_width)
         self.items_per_access = math.floor(bus_width / width)
-        # Number of items in bunch.
-        if (width % bus_width) == 0:
-            self.bunch_size = 1
-        else:
-            self.bunch_size = bus_width // (width % bus_width)
+        # Number of items in bunch, items of bunch occupy whole registers.
+        self.bunch_size = bus_width // math.gcd(width, bus_width)
         # Number of accesses for bunch transfer.
-        self.accesses_per_bunch = self.bunch_size * width // bus_width + 1
+        self.accesses_per_bunch = self.bunch_size * width // bus_width
 
         if self.accesses_per_item == 1 and self.items_per_access == 1:
             self.strategy = 'single'
@@ -26,7 +37,7 @@ class RegisterArray:
             self.registers_count = math.ceil(count / self.items_per_access)
         else:
             self.strategy = 'bunch'
-            self.registers_count = 0
+            self.registers_count = math.ceil(count * width / bus_width)
 
     def __repr__(self):
         repr = (
@@ -45,35 +56,29 @@ class RegisterArray:
         return self.count
 
     def __getitem__(self, idx):
+        """Get registers of the item.
+
+        Returns
+        -------
+            Tuple of (address, (mask upper bit, mask lower bit)) pairs,
+            one for each register the item occupies.
+        """
+        if idx < 0:
+            idx += self.count
         if idx < 0 or self.count <= idx:
             raise IndexError()
 
         if self.strategy == 'single':
             return self._get_item_single(idx)
+        elif self.strategy == 'multiple':
+            return self._get_item_multiple(idx)
 
-        # item_addr = self.base_addr + self.item_width * idx
-
-        # registers = []
-        # for i in self.item_width:
-        #    registers.append(
-        #        [
-        #            item_addr,
-        #            (
-        #                self.bus_width - 1
-        #                if self.width - i * self.bus_width > self.bus_width
-        #                else self.width - 1 - i * self.bus_width,
-        #                0,
-        #            ),
-        #        ]
-        #    )
-        #    item_addr += 1
-
-        # return tuple(registers)
+        return self._get_item_bunch(idx)
 
     def _get_item_single(self, idx):
         item_addr = self.base_addr + idx
 
-        return ((item_addr, (self.width, 0)),)
+        return ((item_addr, (self.width - 1, 0)),)
 
     def _get_item_multiple(self, idx):
         item_addr = self.base_addr + idx // self.items_per_access
@@ -86,8 +91,116 @@ class RegisterArray:
             ),
         )
 
+    def _get_item_bunch(self, idx):
+        bus_width = self.bus_width
+        start = idx * self.width
+        end = start + self.width - 1
+
+        registers = []
+        for reg in range(start // bus_width, end // bus_width + 1):
+            low = max(start - reg * bus_width, 0)
+            high = min(end - reg * bus_width, bus_width - 1)
+            registers.append((self.base_addr + reg, (high, low)))
+
+        return tuple(registers)
+
+    def bunches(self):
+        """Iterate over bunches of items occupying whole registers.
+
+        Only the last bunch might be incomplete and occupy part of its last register.
+        Single and multiple strategies have bunches of single register.
+
+        Returns
+        -------
+            Iterator of tuples (first register address, accesses count, first item index, items count).
+        """
+        if self.strategy == 'bunch':
+            bunch_size = self.bunch_size
+            accesses = self.accesses_per_bunch
+        else:
+            bunch_size = self.items_per_access
+            accesses = 1
+
+        addr = self.base_addr
+        for idx in range(0, self.count, bunch_size):
+            items = min(bunch_size, self.count - idx)
+            if items < bunch_size:
+                accesses = math.ceil(items * self.width / self.bus_width)
+            yield addr, accesses, idx, items
+            addr += accesses
+
+    def _check_indices(self, indices):
+        if indices is None:
+            return range(self.count)
+
+        if len(indices) and (min(indices) < 0 or self.count <= max(indices)):
+            raise IndexError()
+
+        return indices
+
+    def addresses(self, indices=None):
+        """Get addresses of many items at once.
+
+        Parameters
+        ----------
+        indices
+            Sequence of item indices. If None, addresses of all items are returned.
+
+        Returns
+        -------
+            Typed array with addresses, one per index. For the bunch strategy
+            it is the address of the first register of the item.
+        """
+        indices = self._check_indices(indices)
+
+        if self.strategy == 'single':
+            if type(indices) == range:
+                return array('Q', range(self.base_addr, self.base_addr + self.count))
+            return array('Q', (self.base_addr + i for i in indices))
+        elif self.strategy == 'multiple':
+            ipa = self.items_per_access
+            return array('Q', (self.base_addr + i // ipa for i in indices))
+
+        width = self.width
+        bus_width = self.bus_width
+        return array('Q', (self.base_addr + i * width // bus_width for i in indices))
+
+    def masks(self, indices=None):
+        """Get masks of many items at once.
+
+        Parameters
+        ----------
+        indices
+            Sequence of item indices. If None, masks of all items are returned.
+
+        Returns
+        -------
+            Tuple of two typed arrays, with upper and lower mask bits, one per index.
+            For the bunch strategy masks are relative to the first register of the item,
+            so the upper bit exceeds the bus width.
+        """
+        indices = self._check_indices(indices)
+
+        if self.strategy == 'single':
+            return (
+                array('I', [self.width - 1]) * len(indices),
+                array('I', [0]) * len(indices),
+            )
+
+        width = self.width
+        if self.strategy == 'multiple':
+            ipa = self.items_per_access
+            low = array('I', (width * (i % ipa) for i in indices))
+        else:
+            bus_width = self.bus_width
+            low = array('I', (i * width % bus_width for i in indices))
+        high = array('I', (l + width - 1 for l in low))
+        return high, low
+
 
 class AddressSpace:
+    __slots__ = ('base_addr', 'count', 'block_size')
+
     def __init__(self, base_addr, count, block_size):
         self.base_addr = base_addr
         self.count = count
@@ -105,6 +218,8 @@ class AddressSpace:
         return self.count
 
     def __getitem__(self, idx):
+        if idx < 0:
+            idx += self.count
         if idx < 0 or self.count <= idx:
             raise IndexError()
 
@@ -112,3 +227,24 @@ class AddressSpace:
         end = beginning + self.block_size - 1
 
         return beginning, end
+
+    def beginnings(self, indices=None):
+        """Get beginning addresses of many blocks at once.
+
+        Parameters
+        ----------
+        indices
+            Sequence of block indices. If None, addresses of all blocks are returned.
+
+        Returns
+        -------
+            Typed array with addresses, one per index.
+        """
+        if indices is None:
+            end = self.base_addr + self.count * self.block_size
+            return array('Q', range(self.base_addr, end, self.block_size))
+
+        if len(indices) and (min(indices) < 0 or self.count <= max(indices)):
+            raise IndexError()
+
+        return array('Q', (self.base_addr + i * self.block_size for i in indices))
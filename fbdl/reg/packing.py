@@ -0,0 +1,253 @@
+"""
+Module for packing functionalities into registers.
+
+Functionalities narrower than the bus are packed together into shared registers.
+Functionalities wider than the bus always start at the register boundary.
+Registers are never shared between functionalities of different base types,
+or between functionalities with different value of the 'once' property.
+
+Functionalities sharing any group are packed in order of declaration
+into their own registers, so that each group occupies consecutive registers.
+Registers holding atomic functionalities are not shared with other functionalities.
+
+Supported strategies:
+  compact - best fit decreasing, minimizes the number of registers,
+  block-aligned - fields are placed at bit offsets being multiples of their
+    widths rounded up to the power of 2, so items never straddle such blocks,
+  full-align - each functionality has its own registers, nothing is packed.
+    It is the default strategy.
+
+Parameters of a func are always placed in order of declaration, in consecutive
+registers, as the func is called by the write of the last of them.
+
+All strategies run in O(n log n) time, where n is the number of functionalities.
+"""
+import math
+
+from . import access
+
+STRATEGIES = ('compact', 'block-aligned', 'full-align')
+
+
+def _align_to_power_of_2(val):
+    return 1 << (val - 1).bit_length()
+
+
+class _Registers:
+    """Allocator of bits within registers, starting from given address.
+
+    Registers which are not full are kept in bins indexed by the number
+    of free bits. Bits are always allocated from the lowest free bit.
+    """
+
+    def __init__(self, bus_width, addr):
+        self.bus_width = bus_width
+        self.addr = addr
+        # Index is the number of free upper bits, value is the list of register addresses.
+        self.bins = [[] for _ in range(bus_width)]
+
+    def new(self, count=1):
+        """Allocate new registers. Return address of the first one."""
+        addr = self.addr
+        self.addr += count
+        return addr
+
+    def release(self, addr, free):
+        """Make free upper bits of the register available for other functionalities."""
+        if 0 < free < self.bus_width:
+            self.bins[free].append(addr)
+
+    def best_fit(self, width):
+        """Allocate width bits in the register with the least sufficient free bits.
+
+        Returns
+        -------
+            Tuple (address, offset).
+        """
+        for free in range(width, self.bus_width):
+            if self.bins[free]:
+                addr = self.bins[free].pop()
+                self.release(addr, free - width)
+                return addr, self.bus_width - free
+
+        addr = self.new()
+        self.release(addr, self.bus_width - width)
+        return addr, 0
+
+
+def _set_access(func, bus_width, addr, offset=0):
+    func['Access'] = access.single(bus_width, addr, func['Properties']['width'], offset)
+
+
+def _place_wide(func, registers):
+    """Place functionality wider than the bus. Return free bits in its last register."""
+    bus_width = registers.bus_width
+    width = func['Properties']['width']
+    count = math.ceil(width / bus_width)
+    addr = registers.new(count)
+    _set_access(func, bus_width, addr)
+
+    if func['Properties'].get('atomic', False):
+        return addr + count - 1, 0
+    return addr + count - 1, count * bus_width - width
+
+
+def _place_in_order(funcs, registers, strategy):
+    """Place functionalities in consecutive registers, keeping the given order."""
+    bus_width = registers.bus_width
+    addr = None
+    offset = bus_width
+
+    for func in funcs:
+        width = func['Properties']['width']
+        if width > bus_width:
+            addr, free = _place_wide(func, registers)
+            offset = bus_width - free
+            continue
+
+        atomic = func['Properties'].get('atomic', False)
+        if atomic:
+            offset = bus_width
+        elif strategy == 'block-aligned':
+            size = _align_to_power_of_2(width)
+            offset = -(-offset // size) * size
+        if strategy == 'full-align' or offset + width > bus_width:
+            addr = registers.new()
+            offset = 0
+
+        _set_access(func, bus_width, addr, offset)
+        offset += width
+        if atomic:
+            offset = bus_width
+
+
+def _pack_ungrouped(funcs, registers, strategy):
+    bus_width = registers.bus_width
+
+    if strategy == 'full-align':
+        _place_in_order(funcs, registers, strategy)
+        return
+
+    # Wider functionalities first, so that narrower ones fill the gaps.
+    funcs = sorted(funcs, key=lambda f: f['Properties']['width'], reverse=True)
+
+    narrow = []
+    for func in funcs:
+        width = func['Properties']['width']
+        if width > bus_width:
+            addr, free = _place_wide(func, registers)
+            if strategy == 'compact':
+                registers.release(addr, free)
+        elif func['Properties'].get('atomic', False):
+            _set_access(func, bus_width, registers.new())
+        else:
+            narrow.append(func)
+
+    if strategy == 'block-aligned':
+        # Sizes are powers of 2 in decreasing order, so the next offset is always aligned.
+        _place_in_order(narrow, registers, strategy)
+        return
+
+    for func in narrow:
+        addr, offset = registers.best_fit(func['Properties']['width'])
+        _set_access(func, bus_width, addr, offset)
+
+
+def _get_clusters(funcs):
+    """Split functionalities into clusters of functionalities sharing any group.
+
+    Returns
+    -------
+        Tuple with the list of clusters and the list of functionalities without groups.
+        Functionalities within clusters are in order of declaration.
+    """
+    # Union-find over indexes of functionalities.
+    parents = list(range(len(funcs)))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    first_member = {}
+    for i, func in enumerate(funcs):
+        for group in func['Properties'].get('groups', ()):
+            if group in first_member:
+                parents[find(i)] = find(first_member[group])
+            else:
+                first_member[group] = i
+
+    clusters = {}
+    ungrouped = []
+    for i, func in enumerate(funcs):
+        if func['Properties'].get('groups'):
+            clusters.setdefault(find(i), []).append(func)
+        else:
+            ungrouped.append(func)
+
+    return list(clusters.values()), ungrouped
+
+
+def pack(funcs, bus_width, strategy, addr):
+    """Assign accesses to functionalities.
+
+    Parameters
+    ----------
+    funcs
+        Functionalities in order of declaration. Arrays must not be included.
+    bus_width
+        Width of the bus.
+    strategy
+        One of the STRATEGIES.
+    addr
+        Address of the first register.
+
+    Returns
+    -------
+        Address succeeding the last allocated register.
+    """
+    if strategy not in STRATEGIES:
+        raise Exception(
+            f"Invalid packing strategy '{strategy}', valid strategies are: {STRATEGIES}."
+        )
+
+    classes = {}
+    for func in funcs:
+        key = (func['Base Type'], func['Properties'].get('once', False))
+        classes.setdefault(key, []).append(func)
+
+    for _, class_funcs in classes.items():
+        registers = _Registers(bus_width, addr)
+
+        clusters, ungrouped = _get_clusters(class_funcs)
+        for cluster in clusters:
+            _place_in_order(cluster, registers, strategy)
+        _pack_ungrouped(ungrouped, registers, strategy)
+
+        addr = registers.addr
+
+    return addr
+
+
+def pack_params(params, bus_width, strategy, addr):
+    """Assign accesses to parameters of the func.
+
+    Parameters
+    ----------
+    params
+        Parameters in order of declaration. Arrays must not be included.
+
+    Returns
+    -------
+        Address succeeding the last allocated register.
+    """
+    if strategy not in STRATEGIES:
+        raise Exception(
+            f"Invalid packing strategy '{strategy}', valid strategies are: {STRATEGIES}."
+        )
+
+    registers = _Registers(bus_width, addr)
+    _place_in_order(params, registers, strategy)
+
+    return registers.addr
@@ -1,108 +1,228 @@
 """
 Module for packing functionalities into registers and assigning addresses.
 
-Current implemenation is very trivial.
-Optinal implemenation is not an easy task.
+Packing of functionalities within registers is implemented in the packing module.
 """
 
 import logging as log
 import math
+import os
 import time
-import zlib
 
 from . import access
+from . import digest
 from . import iters
+from . import packing
+from .. import session
+from ..record import Element
 
+# Base types of functionalities packed into registers.
+FIELD_TYPES = ('config', 'mask', 'status')
 
-BUS_WIDTH = None
+
+def functionalities(elem, path):
+    """Get (path, functionality) pairs of the element.
+
+    Functionalities of the func are its parameters,
+    other elements are functionalities themselves.
+    """
+    if elem['Base Type'] == 'func':
+        params = elem.get('Elements', {})
+        return [(f"{path}.{name}", param) for name, param in params.items()]
+    return [(path, elem)]
 
 
 def align_to_power_of_2(val):
     return 2 ** math.ceil(math.log(val, 2))
 
 
-def registerify(bus):
-    global BUS_WIDTH
+def get_timestamp():
+    """Get timestamp of the build.
+
+    If the SOURCE_DATE_EPOCH environment variable is set, its value is used
+    instead of the current time, so that builds are reproducible.
+    """
+    epoch = os.environ.get('SOURCE_DATE_EPOCH')
+    if epoch is None:
+        return int(time.time())
+
+    try:
+        return int(epoch)
+    except ValueError:
+        raise Exception(
+            f"Invalid SOURCE_DATE_EPOCH value '{epoch}', it must be an integer."
+        )
+
+
+def registerify(bus, packing_strategy=None):
+    """Pack functionalities into registers and assign addresses.
 
+    Instances are not modified, the main bus in the bus dictionary is replaced
+    with its registerified copy. Registerified copies of blocks are kept
+    in the session, so instances of blocks reused by the next instantiation
+    are not registerified again.
+
+    Parameters
+    ----------
+    packing_strategy
+        Strategy of packing functionalities into registers, one of packing.STRATEGIES.
+        If None, the packing strategy of the current session is used.
+    """
     if 'main' not in bus:
         log.warn("Registerification. There is no main bus. Returning empty dictionary.")
         return {}
 
-    BUS_WIDTH = bus['main']['Properties']['width']
+    s = session.current()
+    s.bus_width = bus['main']['Properties']['width']
+    if packing_strategy is not None and packing_strategy != s.packing_strategy:
+        s.packing_strategy = packing_strategy
+        s.registerified = {}
+    bus_width = s.bus_width
+
+    # Drop copies of blocks which are no longer instantiated.
+    instances = {id(inst) for inst in s.instances.values()}
+    s.registerified = {
+        id_: entry for id_, entry in s.registerified.items() if id_ in instances
+    }
+
+    main = _copy_block(bus['main'])
+    bus['main'] = main
 
     # addr is current block internal access address, not global address.
     # 0 and 1 are reserved for x_uuid_x and x_timestamp_x.
     addr = 2
 
-    addr = _registerify_functionalities(bus['main'], addr)
+    addr = _registerify_functionalities(main, addr)
     sizes = {'Block Aligned': 0, 'Own': addr, 'Compact': addr}
 
-    if 'Elements' not in bus['main']:
-        bus['main']['Elements'] = {}
+    if 'Elements' not in main:
+        main['Elements'] = {}
 
-    for _, element in bus['main']['Elements'].items():
+    for name, element in main['Elements'].items():
         if element['Base Type'] == 'block':
-            elem_sizes = registerify_block(element)
+            element = registerify_block(element)
+            main['Elements'][name] = element
             count = element.get('Count', 1)
-            sizes['Compact'] += count * elem_sizes['Compact']
-            sizes['Block Aligned'] += count * elem_sizes['Block Aligned']
-
-    bus['main']['Elements']['x_uuid_x'] = {
-        'Access': access.single(BUS_WIDTH, 0, BUS_WIDTH),
-        'Base Type': 'status',
-        'Properties': {
-            'default': zlib.adler32(bytes(repr(bus), 'utf-8')) & (2 ** BUS_WIDTH - 1),
-            'width': BUS_WIDTH,
-        },
-    }
-    bus['main']['Elements']['x_timestamp_x'] = {
-        'Access': access.single(BUS_WIDTH, 1, BUS_WIDTH),
-        'Base Type': 'status',
-        'Properties': {
-            'default': int(time.time()) & (2 ** BUS_WIDTH - 1),
-            'width': BUS_WIDTH,
-        },
-    }
+            sizes['Compact'] += count * element['Sizes']['Compact']
+            sizes['Block Aligned'] += count * element['Sizes']['Block Aligned']
+
+    uuid = Element(
+        'status', {'default': digest.uuid(bus, bus_width), 'width': bus_width}
+    )
+    uuid.access = access.single(bus_width, 0, bus_width)
+    main['Elements']['x_uuid_x'] = uuid
+
+    timestamp = Element(
+        'status',
+        {'default': get_timestamp() & (2 ** bus_width - 1), 'width': bus_width},
+    )
+    timestamp.access = access.single(bus_width, 1, bus_width)
+    main['Elements']['x_timestamp_x'] = timestamp
 
     sizes['Block Aligned'] = align_to_power_of_2(sizes['Own'] + sizes['Block Aligned'])
-    bus['main']['Sizes'] = sizes
+    main['Sizes'] = sizes
 
     # Currently base address property is not yet supported so it starts from 0.
-    assign_global_access_addresses(bus['main'], 0)
+    assign_global_access_addresses(main, 0)
 
     return bus
 
 
 def _registerify_functionalities(element, start_addr):
     """Function grouping functionalities registerification functions."""
-    addr = registerify_statuses(element, start_addr)
+    addr = registerify_fields(element, start_addr)
 
     return addr
 
 
-def registerify_statuses(block, addr):
-    """This is extremely trivial approach. Even groups are not respected."""
+def registerify_fields(block, addr):
+    """Registerify configs, masks, statuses and parameters of funcs.
+
+    Arrays get their own registers. Other functionalities are packed
+    into registers with the packing strategy. Parameters of each func are
+    placed in consecutive registers after all other functionalities.
+
+    With the 'full-align' strategy, statuses keep the layout from before
+    other functionalities were registerified. They are placed first,
+    in order of declaration, each in its own registers, groups are not
+    respected. Configs and masks are placed after them.
+
+    Functionalities are copied before accesses are assigned,
+    as their instances might be shared.
+    """
     elements = block.get('Elements')
     if not elements:
         return addr
 
-    statuses = [elem for _, elem in elements.items() if elem['Base Type'] == 'status']
+    s = session.current()
+    full_align = s.packing_strategy == 'full-align'
 
-    for status in statuses:
-        registers = []
-        width = status['Properties']['width']
-
-        if 'Count' in status:
-            status['Access'] = access.array(BUS_WIDTH, status['Count'], addr, width)
-            addr += status['Access']['Count']
+    names = [
+        name for name, elem in elements.items() if elem['Base Type'] in FIELD_TYPES
+    ]
+    if full_align:
+        names.sort(key=lambda name: elements[name]['Base Type'] != 'status')
+
+    fields = []
+    for name in names:
+        elem = elements[name].copy()
+        elements[name] = elem
+
+        width = elem['Properties']['width']
+        if 'Count' in elem:
+            elem['Access'] = access.array(s.bus_width, elem['Count'], addr, width)
+            addr += elem['Access'].count
+        elif full_align and (
+            elem['Base Type'] == 'status' or not elem['Properties'].get('groups')
+        ):
+            elem['Access'] = access.single(s.bus_width, addr, width)
+            addr += elem['Access'].count
         else:
-            status['Access'] = access.single(BUS_WIDTH, addr, width)
-            addr += status['Access']['Count']
+            fields.append(elem)
+
+    addr = packing.pack(fields, s.bus_width, s.packing_strategy, addr)
+
+    for name, elem in elements.items():
+        if elem['Base Type'] == 'func':
+            elem = _copy_func(elem)
+            elements[name] = elem
+            params = elem.get('Elements', {})
+            for param_name, param in params.items():
+                if 'Count' in param:
+                    raise Exception(
+                        f"Parameter '{param_name}' of func '{name}' is an array, "
+                        + "arrays of parameters are not supported."
+                    )
+            addr = packing.pack_params(
+                list(params.values()), s.bus_width, s.packing_strategy, addr
+            )
 
     return addr
 
 
+def _copy_func(func):
+    """Copy func together with its parameters, as its instance might be shared."""
+    copy = func.copy()
+    if 'Elements' in copy:
+        copy['Elements'] = {
+            name: param.copy() for name, param in copy['Elements'].items()
+        }
+    return copy
+
+
 def registerify_block(block):
+    """Get registerified copy of the block instance.
+
+    Instance of the block might be shared, it is registerified only once.
+    """
+    s = session.current()
+    entry = s.registerified.get(id(block))
+    if entry is not None:
+        return entry[1]
+
+    instance = block
+    block = _copy_block(instance)
+
     # addr is current block internal access address, not global address.
     addr = 0
 
@@ -110,18 +230,31 @@ def registerify_block(block):
     sizes = {'Block Aligned': 0, 'Own': addr, 'Compact': addr}
 
     if 'Elements' in block:
-        for _, element in block['Elements'].items():
+        for name, element in block['Elements'].items():
             if element['Base Type'] == 'block':
-                elem_sizes = registerify_block(element)
+                element = registerify_block(element)
+                block['Elements'][name] = element
                 count = element.get('Count', 1)
-                sizes['Compact'] += count * elem_sizes['Compact']
-                sizes['Block Aligned'] += count * elem_sizes['Block Aligned']
+                sizes['Compact'] += count * element['Sizes']['Compact']
+                sizes['Block Aligned'] += count * element['Sizes']['Block Aligned']
 
     sizes['Block Aligned'] = align_to_power_of_2(addr + sizes['Block Aligned'])
 
     block['Sizes'] = sizes
 
-    return sizes
+    # Instance is kept together with the copy, so that its id is not reused.
+    s.registerified[id(instance)] = (instance, block)
+
+    return block
+
+
+def _copy_block(block):
+    """Copy block without global addresses. Inner elements are shared."""
+    copy = block.copy()
+    copy.pop('Address Space', None)
+    if 'Elements' in copy:
+        copy['Elements'] = dict(copy['Elements'])
+    return copy
 
 
 def assign_global_access_addresses(element, base_addr):
@@ -136,9 +269,16 @@ def assign_global_access_addresses(element, base_addr):
             (base_addr, base_addr + element['Sizes']['Block Aligned'] - 1),
         )
 
-    subblocks = [
-        elem for _, elem in element['Elements'].items() if elem['Base Type'] == 'block'
-    ]
+    subblocks = []
+    for name, elem in element['Elements'].items():
+        if elem['Base Type'] != 'block':
+            continue
+        # Registerified block might be shared with other elements and it is kept
+        # in the session. Addresses of each placement are different,
+        # so the block is always copied.
+        elem = _copy_block(elem)
+        element['Elements'][name] = elem
+        subblocks.append(elem)
 
     if not subblocks:
         return
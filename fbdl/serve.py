@@ -0,0 +1,230 @@
+"""
+Module for the long-running compilation mode.
+
+Packages dictionary, trees of parsed files and the bus are kept in memory.
+When a file changes, only this file is parsed again. Parsing is incremental,
+the tree of the previous version of the file is reused by the tree-sitter.
+Only instances depending on changed files are instantiated again, other
+instances, together with their registerified copies, are reused.
+Adding or removing a file of a package triggers compilation from scratch.
+Server has its own session, so many servers can run in one process.
+"""
+import logging as log
+import os
+import time
+
+from . import pre
+from . import session
+from . import ts
+from .cache import ParseCache
+from .inst import inst
+from .reg import reg
+
+
+class Server:
+    def __init__(
+        self, main, cache_dir=None, packing_strategy='full-align', reproducible=False
+    ):
+        self.main = main
+        self.session = session.Session(
+            content_ids=reproducible, packing_strategy=packing_strategy
+        )
+        self.cache = None
+        if cache_dir:
+            self.cache = ParseCache(cache_dir, ts.grammar_version())
+
+        self.packages = None
+        self.bus = None
+        self.registerified_bus = None
+
+        # Results of files parsing, key is the file path, value is (code, tree) tuple.
+        self.parsed = {}
+        # Modification times of files, key is the file path.
+        self.mtimes = {}
+        # False if the last compilation failed and state kept in memory is not consistent.
+        self.complete = False
+
+    def _files(self):
+        for _, pkgs in self.packages.items():
+            for pkg in pkgs:
+                for f in pkg['Files']:
+                    yield f, pkg
+
+    def _files_added(self):
+        """Check if any .fbd file was added to directories of packages."""
+        for pkg_name, pkgs in self.packages.items():
+            # Main package consists of the main file only.
+            if pkg_name == 'main':
+                continue
+            for pkg in pkgs:
+                paths = {f['Path'] for f in pkg['Files']}
+                try:
+                    ls_files = os.listdir(pkg['Path'])
+                except FileNotFoundError:
+                    return True
+                for f in ls_files:
+                    path = os.path.join(pkg['Path'], f)
+                    if f.endswith('.fbd') and path not in paths and os.path.isfile(path):
+                        return True
+
+        return False
+
+    def _mtime(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def compile(self):
+        """Compile everything from scratch."""
+        with self.session:
+            self._compile()
+
+    def _compile(self):
+        self.complete = False
+        self.parsed = {}
+        # Main file is tracked even if preparing packages fails.
+        self.mtimes = {self.main: self._mtime(self.main)}
+        self.packages = None
+        self.packages = pre.prepare_packages(self.main)
+
+        self._parse_packages()
+        self.packages.check()
+
+        self._instantiate(reuse_instances=False)
+        self.complete = True
+
+    def _parse_packages(self):
+        """Parse files of packages imported for the first time and start tracking them."""
+        try:
+            ts.parse_packages(self.packages, self.cache, self.parsed)
+        finally:
+            for f, _ in self._files():
+                if f['Path'] not in self.mtimes:
+                    self.mtimes[f['Path']] = self._mtime(f['Path'])
+
+    def _instantiate(self, reuse_instances=True):
+        self.packages.evaluate()
+        self.bus = inst.instantiate(self.packages, reuse_instances)
+        # Registerification replaces the main bus with its registerified copy.
+        self.registerified_bus = reg.registerify(dict(self.bus))
+
+    def _reparse(self, this_file, this_pkg):
+        """Parse the file again.
+
+        Returns
+        -------
+            Set of paths of files with expressions depending on the previous version of the file.
+        """
+        log.info(f"Reparsing file '{this_file['Path']}'.")
+
+        # Values of expressions from other files might depend on the previous version of the file.
+        affected = set()
+        for e in self.packages._get_expressions(this_file['Symbols']):
+            for invalidated in e.invalidate():
+                node = invalidated.symbol
+                while node['Kind'] != 'File':
+                    node = node['Parent']
+                affected.add(node['Path'])
+
+        # Remove symbols of the previous version of the file from the package.
+        for name, symbol in this_file['Symbols'].items():
+            pkg_symbol = this_pkg['Symbols'].get(name)
+            if pkg_symbol is not None and pkg_symbol.d is symbol:
+                this_pkg['Symbols'].pop(name)
+
+        self.parsed[this_file['Path']] = ts.parse_file(
+            this_file,
+            this_pkg,
+            self.packages,
+            self.cache,
+            self.parsed.get(this_file['Path']),
+        )
+
+        return affected
+
+    def update(self):
+        """Recompile if any of the files has changed.
+
+        Returns
+        -------
+            True if recompilation took place, False otherwise.
+        """
+        with self.session:
+            return self._update()
+
+    def _update(self):
+        if self.packages is None:
+            if self._mtime(self.main) == self.mtimes[self.main]:
+                return False
+            self.compile()
+            return True
+
+        if self._files_added():
+            log.info("Files added, compiling from scratch.")
+            self.compile()
+            return True
+
+        changed = []
+        for f, pkg in self._files():
+            mtime = self._mtime(f['Path'])
+            if mtime is None:
+                log.info(f"File '{f['Path']}' removed, compiling from scratch.")
+                self.compile()
+                return True
+
+            if mtime != self.mtimes[f['Path']]:
+                self.mtimes[f['Path']] = mtime
+                changed.append((f, pkg))
+
+        if not changed:
+            return False
+
+        if not self.complete:
+            self.compile()
+            return True
+
+        try:
+            affected = set()
+            for f, pkg in changed:
+                affected.add(f['Path'])
+                affected.update(self._reparse(f, pkg))
+            self._parse_packages()
+            self.packages.check()
+
+            inst.drop_instances(affected)
+            self._instantiate()
+        except Exception:
+            # Invalidated expressions, removed symbols and edited trees can't be
+            # restored, so the next change triggers compilation from scratch.
+            self.complete = False
+            raise
+
+        return True
+
+    def serve(self, on_compile, interval=0.5):
+        """Watch files and recompile on changes.
+
+        Parameters
+        ----------
+        on_compile
+            Function called with the server after each successful compilation.
+        interval
+            Time in seconds between checks of files modification times.
+        """
+        first = True
+        while True:
+            try:
+                if first:
+                    first = False
+                    self.compile()
+                    compiled = True
+                else:
+                    compiled = self.update()
+            except Exception as e:
+                log.error(e)
+            else:
+                if compiled:
+                    on_compile(self)
+
+            time.sleep(interval)
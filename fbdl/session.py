@@ -0,0 +1,66 @@
+"""
+Module for the compilation session.
+
+Session owns the state of a single compilation, which used to be kept
+in module globals. Each thread, and each asyncio task, has its own current
+session, so independent buses can be compiled concurrently in one process.
+Sessions are entered with the with statement, entering is reentrant.
+"""
+import contextvars
+
+_current = contextvars.ContextVar('fbdl_session')
+
+
+class Session:
+    def __init__(self, content_ids=False, packing_strategy='full-align'):
+        from . import idgen
+        from .packages import ScopeIndex
+
+        # Last generated id, see idgen.generate().
+        self.current_id = idgen.FIRST_ID - 1
+        # If True, ids generated from the counter are replaced with content ids after parsing.
+        self.content_ids = content_ids
+
+        # Identifier of the current context of resolved arguments.
+        self.context = 0
+        # Stack of expressions being evaluated.
+        # Each item is a list with the expression and the context dependency flag.
+        self.evaluation_stack = []
+
+        self.scope_index = ScopeIndex()
+
+        # Packages being instantiated.
+        self.packages = None
+        # Instances shared between elements, key is returned by inst._instance_key().
+        self.instances = {}
+        # Paths of files each instance depends on, key is the instance key.
+        self.instance_files = {}
+        # Sets of paths of files, one for each element being instantiated.
+        self.instantiation_files = []
+        # Registerified copies of block instances, key is the id of the instance,
+        # value is the tuple (instance, copy).
+        self.registerified = {}
+
+        # Width of the bus, whether access to an element is atomic depends on it.
+        self.bus_width = None
+        self.packing_strategy = packing_strategy
+
+        # Tokens of the context variable, one for each entering of the session.
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_current.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _current.reset(self._tokens.pop())
+
+
+def current():
+    """Get the current session."""
+    session = _current.get(None)
+    if session is None:
+        raise Exception(
+            "No compilation session, the compilation must run within 'with Session():'."
+        )
+    return session
@@ -0,0 +1,88 @@
+import tempfile
+import unittest
+
+from fbdl.cache import ParseCache, reassign_ids
+from fbdl.record import Symbol
+from fbdl.refdict import RefDict
+from fbdl.tests.utils import enter_session
+
+
+def make_symbols():
+    nested = Symbol('0x2', 'Constant', 3, 'C')
+    block = Symbol('0x1', 'Element Type Definition', 2, 'B')
+    block['Symbols'] = {'C': nested}
+    nested['Parent'] = RefDict(block)
+    return {'A': Symbol('0x0', 'Constant', 1, 'A'), 'B': block}
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+        self.dir = tempfile.TemporaryDirectory()
+        self.cache = ParseCache(self.dir.name, 'grammar')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_missing_entry(self):
+        self.assertEqual(self.cache.load(b'const A = 1'), None)
+
+    def test_other_grammar_version(self):
+        self.cache.store(b'code', make_symbols(), [])
+        cache = ParseCache(self.dir.name, 'other grammar')
+        self.assertEqual(cache.load(b'code'), None)
+
+    def test_store_and_load(self):
+        imports = [('foo', 'fbd-foo')]
+        self.cache.store(b'code', make_symbols(), imports)
+
+        symbols, cached_imports = self.cache.load(b'code')
+        self.assertEqual(cached_imports, imports)
+        self.assertEqual(list(symbols.keys()), ['A', 'B'])
+
+        reassign_ids(symbols)
+
+        a_id = int(symbols['A']['Id'], 16)
+        self.assertEqual(int(symbols['B']['Id'], 16), a_id + 1)
+        c = symbols['B']['Symbols']['C']
+        self.assertEqual(int(c['Id'], 16), a_id + 2)
+        self.assertEqual(c['Parent']['Id'], symbols['B']['Id'])
+        self.assertEqual(c['Parent'].id, symbols['B']['Id'])
+
+    def test_records(self):
+        self.cache.store(b'code', make_symbols(), [])
+
+        symbols, _ = self.cache.load(b'code')
+        self.assertIsInstance(symbols['B'], Symbol)
+        self.assertEqual(symbols['B']['Line Number'], 2)
+        c = symbols['B']['Symbols']['C']
+        self.assertIs(c['Parent'].d, symbols['B'])
+
+    def test_memory_only(self):
+        cache = ParseCache(None, 'grammar', 1 << 20)
+        cache.store(b'code', make_symbols(), [])
+
+        symbols, _ = cache.load(b'code')
+        other, _ = cache.load(b'code')
+        self.assertIsNot(symbols['B'], other['B'])
+        self.assertEqual(ParseCache(None, 'grammar', 1 << 20).load(b'code'), None)
+
+    def test_memory_disabled_by_default(self):
+        self.cache.store(b'code', make_symbols(), [])
+        self.assertEqual(len(self.cache.entries), 0)
+        self.assertNotEqual(self.cache.load(b'code'), None)
+
+    def test_memory_limit(self):
+        cache = ParseCache(None, 'grammar')
+        cache.memory_limit = 3 * 400
+        for code in [b'a', b'b', b'c', b'd']:
+            cache.store(code, {'A': {'Name': 'x' * 300}}, [])
+        # The least recently used entry is evicted first.
+        cache.load(b'b')
+        cache.store(b'e', {'A': {'Name': 'x' * 300}}, [])
+
+        self.assertLessEqual(cache.memory_size, cache.memory_limit)
+        self.assertEqual(cache.load(b'a'), None)
+        self.assertEqual(cache.load(b'c'), None)
+        self.assertNotEqual(cache.load(b'b'), None)
+        self.assertNotEqual(cache.load(b'e'), None)
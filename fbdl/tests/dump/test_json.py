@@ -0,0 +1,58 @@
+import io
+import json
+import unittest
+
+from fbdl.dump import JSONWriter
+from fbdl.record import Element
+from fbdl.refdict import RefDict
+from fbdl.reg.access import single
+from fbdl.reg.iters import AddressSpace
+
+
+class TestJSONWriter(unittest.TestCase):
+    def write(self, obj):
+        f = io.StringIO()
+        JSONWriter(f).write(obj)
+        return json.loads(f.getvalue())
+
+    def test_nested(self):
+        obj = {'a': [1, (2, 3)], 'b': {'c': None, 'd': True, 'e': "s\"tr"}}
+        self.assertEqual(
+            self.write(obj),
+            {'a': [1, [2, 3]], 'b': {'c': None, 'd': True, 'e': "s\"tr"}},
+        )
+
+    def test_reference(self):
+        pkg = {'Id': '0x1001', 'Kind': 'Package'}
+        obj = {'Parent': RefDict(pkg)}
+        self.assertEqual(self.write(obj), {'Parent': {'Reference': '0x1001'}})
+
+    def test_address_space(self):
+        obj = {'Address Space': AddressSpace(16, 4, 8)}
+        self.assertEqual(
+            self.write(obj),
+            {'Address Space': {'Base Address': 16, 'Count': 4, 'Block Size': 8}},
+        )
+
+    def test_access(self):
+        obj = {'Access': single(32, 4, 8)}
+        self.assertEqual(
+            self.write(obj),
+            {'Access': {'Address': 4, 'Count': 1, 'Strategy': 'Single', 'Mask': [7, 0]}},
+        )
+
+    def test_element(self):
+        obj = {'a': Element('status', {'width': 8})}
+        self.assertEqual(
+            self.write(obj),
+            {'a': {'Base Type': 'status', 'Properties': {'width': 8}}},
+        )
+
+    def test_non_finite_float(self):
+        for value in (float('inf'), float('nan')):
+            with self.assertRaises(ValueError):
+                self.write({'a': value})
+
+    def test_unsupported_type(self):
+        with self.assertRaisesRegex(TypeError, "'object' can not be dumped"):
+            self.write({'a': object()})
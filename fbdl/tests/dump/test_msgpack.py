@@ -0,0 +1,50 @@
+import io
+import unittest
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from fbdl.dump import MsgpackWriter
+from fbdl.refdict import RefDict
+from fbdl.reg.access import single
+from fbdl.reg.iters import AddressSpace, RegisterArray
+
+
+@unittest.skipIf(msgpack is None, "msgpack is not installed")
+class TestMsgpackWriter(unittest.TestCase):
+    def write(self, obj):
+        f = io.BytesIO()
+        MsgpackWriter(f).write(obj)
+        return msgpack.unpackb(f.getvalue())
+
+    def test_nested(self):
+        obj = {'a': [1, (2, 3)], 'b': {'c': None, 'd': True, 'e': 1.5}}
+        self.assertEqual(
+            self.write(obj), {'a': [1, [2, 3]], 'b': {'c': None, 'd': True, 'e': 1.5}}
+        )
+
+    def test_reference(self):
+        pkg = {'Id': '0x1001', 'Kind': 'Package'}
+        self.assertEqual(
+            self.write({'Parent': RefDict(pkg)}), {'Parent': {'Reference': '0x1001'}}
+        )
+
+    def test_access(self):
+        self.assertEqual(
+            self.write({'Access': single(32, 4, 8)}),
+            {'Access': {'Address': 4, 'Count': 1, 'Strategy': 'Single', 'Mask': [7, 0]}},
+        )
+
+    def test_address_space(self):
+        self.assertEqual(
+            self.write(AddressSpace(16, 4, 8)),
+            {'Base Address': 16, 'Count': 4, 'Block Size': 8},
+        )
+
+    def test_register_array(self):
+        written = self.write(RegisterArray(32, 4, 16, 8))
+        self.assertEqual(written['Base Address'], 16)
+        self.assertEqual(written['Items'], 4)
+        self.assertEqual(written['Items per Access'], 4)
@@ -0,0 +1,47 @@
+import io
+import unittest
+
+from fbdl.dump import _dump
+from fbdl.record import Element, Symbol
+from fbdl.refdict import RefDict
+from fbdl.reg.access import single
+
+
+class TestPythonDump(unittest.TestCase):
+    def test_access(self):
+        f = io.StringIO()
+        _dump({'Access': single(32, 4, 8)}, f, 'python')
+        self.assertEqual(
+            f.getvalue(),
+            "{'Access': {'Address': 4, 'Count': 1, 'Mask': (7, 0), 'Strategy': 'Single'}}\n",
+        )
+
+    def test_shared_subtree(self):
+        elem = {'Access': single(32, 0, 8)}
+        bus = {'a': elem, 'b': elem, 'c': {'width': 8}}
+        f = io.StringIO()
+        _dump(bus, f, 'python')
+        self.assertEqual(f.getvalue().count("'Strategy': 'Single'"), 2)
+
+    def test_records(self):
+        main = Symbol('0x1', 'Element Anonymous Instantiation', 1, 'main')
+        main['Type'] = 'bus'
+        const = Symbol('0x2', 'Constant', 2, 'A')
+        const['Parent'] = RefDict(main)
+        main['Symbols'] = {'A': const}
+
+        elem = Element('status', {'width': 8})
+        elem['Access'] = single(32, 0, 8)
+
+        records = io.StringIO()
+        _dump({'main': main, 'a': elem}, records, 'python')
+        dicts = io.StringIO()
+        _dump(
+            {
+                'main': dict(main.to_dict(), Symbols={'A': const.to_dict()}),
+                'a': dict(elem.to_dict(), Access=elem['Access'].to_dict()),
+            },
+            dicts,
+            'python',
+        )
+        self.assertEqual(records.getvalue(), dicts.getvalue())
@@ -0,0 +1,89 @@
+import pickle
+import unittest
+
+from fbdl import expr
+from fbdl.expr import ExprDict
+from fbdl.tests.utils import (
+    NodeMock,
+    binary_operation,
+    enter_session,
+    identifier,
+    literal,
+    parser,
+)
+
+
+def unary_operation(operator, operand, symbol):
+    e = ExprDict(parser, NodeMock('unary_operation', ''), symbol)
+    e['Operator'] = operator
+    e['Operand'] = operand
+    return e
+
+
+def call(function, arguments, symbol):
+    e = ExprDict(parser, NodeMock('call', ''), symbol)
+    e['Function'] = function
+    e['Arguments'] = arguments
+    return e
+
+
+class TestCompile(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+        self.file = {'Id': '0x0', 'Kind': 'File', 'Path': 'bus.fbd'}
+        self.pkg = {'Id': '0x1', 'Kind': 'Package', 'Path': '.'}
+        self.file['Parent'] = self.pkg
+
+    def constant(self, name, parent):
+        sym = {'Id': name, 'Kind': 'Constant', 'Name': name, 'Parent': parent}
+        parent.setdefault('Symbols', {})[name] = sym
+        return sym
+
+    def test_operations(self):
+        a = self.constant('A', self.file)
+        e = binary_operation(
+            unary_operation('-', literal(3, a), a),
+            '+',
+            call('log', [literal(8, a), literal(2, a)], a),
+            a,
+        )
+        self.assertEqual(e.value, 0)
+
+    def test_operand_none(self):
+        a = self.constant('A', self.file)
+        e = binary_operation(literal(None, a), '*', literal(2, a), a)
+        self.assertIsNone(e.value)
+
+    def test_compiled_once(self):
+        a = self.constant('A', self.file)
+        a['Value'] = binary_operation(literal(1, a), '<<', literal(4, a), a)
+
+        self.assertEqual(a['Value'].value, 16)
+        compiled = a['Value']._compiled
+        a['Value']._cached = False
+        self.assertEqual(a['Value'].value, 16)
+        self.assertIs(a['Value']._compiled, compiled)
+
+    def test_resolved_arguments_looked_up_on_each_evaluation(self):
+        t = {'Id': 'T', 'Kind': 'Element Type Definition', 'Name': 'T', 'Type': 'block'}
+        t['Parent'] = self.file
+        t['Parameters'] = [{'Name': 'P'}]
+        c = self.constant('C', t)
+        c['Value'] = binary_operation(identifier('P', c), '+', literal(1, c), c)
+
+        t['Resolved Arguments'] = {'P': literal(1, t)}
+        expr.change_context()
+        self.assertEqual(c['Value'].value, 2)
+
+        t['Resolved Arguments'] = {'P': literal(5, t)}
+        expr.change_context()
+        self.assertEqual(c['Value'].value, 6)
+
+    def test_pickle_drops_compiled_form(self):
+        a = self.constant('A', self.file)
+        a['Value'] = binary_operation(literal(1, a), '+', literal(2, a), a)
+        self.assertEqual(a['Value'].value, 3)
+
+        e = pickle.loads(pickle.dumps(a['Value']))
+        self.assertIsNone(e._compiled)
+        self.assertEqual(e.value, 3)
@@ -0,0 +1,57 @@
+import unittest
+
+from fbdl import expr
+from fbdl.expr import ExprDict
+from fbdl.tests.utils import (
+    binary_operation,
+    enter_session,
+    identifier,
+    literal,
+)
+
+
+class TestEvaluationCache(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+        self.file = {'Id': '0x0', 'Kind': 'File', 'Path': 'bus.fbd'}
+        self.pkg = {'Id': '0x1', 'Kind': 'Package', 'Path': '.'}
+        self.file['Parent'] = self.pkg
+
+    def constant(self, name, parent):
+        sym = {'Id': name, 'Kind': 'Constant', 'Name': name, 'Parent': parent}
+        parent.setdefault('Symbols', {})[name] = sym
+        return sym
+
+    def test_constant_is_cached_until_invalidated(self):
+        a = self.constant('A', self.file)
+        a['Value'] = literal(1, a)
+        b = self.constant('B', self.file)
+        b['Value'] = binary_operation(identifier('A', b), '+', literal(2, b), b)
+
+        self.assertEqual(b['Value'].value, 3)
+
+        # Change value behind the cache back.
+        a['Value']._value = 10
+        self.assertEqual(b['Value'].value, 3)
+
+        a['Value'].invalidate()
+        self.assertEqual(b['Value'].value, 12)
+
+    def test_parameter_depends_on_context(self):
+        type_ = {
+            'Id': 'T',
+            'Kind': 'Element Type Definition',
+            'Name': 'T',
+            'Parameters': ({'Name': 'W'},),
+            'Parent': self.file,
+        }
+        e = binary_operation(identifier('W', type_), '*', literal(2, type_), type_)
+
+        type_['Resolved Arguments'] = {'W': literal(1, self.file)}
+        expr.change_context()
+        self.assertEqual(e.value, 2)
+
+        type_['Resolved Arguments'] = {'W': literal(5, self.file)}
+        self.assertEqual(e.value, 2)
+        expr.change_context()
+        self.assertEqual(e.value, 10)
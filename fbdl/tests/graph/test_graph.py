@@ -0,0 +1,53 @@
+import unittest
+
+from fbdl.graph import Graph
+
+
+class TestGraph(unittest.TestCase):
+    def test_topological_order(self):
+        g = Graph([('a', 'b'), ('b', 'c'), ('a', 'c'), ('d', 'b')])
+        order = g.topological_order()
+        self.assertEqual(sorted(order), ['a', 'b', 'c', 'd'])
+        for u, v in [('a', 'b'), ('b', 'c'), ('a', 'c'), ('d', 'b')]:
+            self.assertLess(order.index(u), order.index(v))
+
+    def test_topological_order_cache(self):
+        g = Graph([('a', 'b')])
+        self.assertIs(g.topological_order(), g.topological_order())
+        g.add_edge('b', 'c')
+        self.assertEqual(g.topological_order(), ['a', 'b', 'c'])
+
+    def test_components_cache(self):
+        g = Graph([('a', 'b')])
+        components = g.strongly_connected_components()
+        self.assertEqual(g.cycles(), [])
+        self.assertIs(g.strongly_connected_components(), components)
+        g.add_edge('b', 'a')
+        self.assertEqual(g.strongly_connected_components(), [['a', 'b']])
+
+    def test_duplicated_edges(self):
+        g = Graph([('a', 'b'), ('a', 'b')])
+        self.assertEqual(list(g.successors['a']), ['b'])
+
+    def test_no_cycles(self):
+        g = Graph([('a', 'b'), ('b', 'c')])
+        self.assertEqual(g.cycles(), [])
+
+    def test_self_loop(self):
+        g = Graph([('a', 'b'), ('b', 'b')])
+        self.assertEqual(g.cycles(), [['b']])
+
+    def test_one_cycle_per_component(self):
+        # Component {a, b, c} has many cycles, only one is reported.
+        g = Graph(
+            [('a', 'b'), ('b', 'a'), ('b', 'c'), ('c', 'a'), ('c', 'd'), ('d', 'e'), ('e', 'd')]
+        )
+        cycles = g.cycles()
+        self.assertEqual(len(cycles), 2)
+        self.assertEqual(cycles[0], ['a', 'b'])
+        self.assertEqual(sorted(cycles[1]), ['d', 'e'])
+
+    def test_topological_order_with_cycle(self):
+        g = Graph([('a', 'b'), ('b', 'a')])
+        with self.assertRaises(Exception):
+            g.topological_order()
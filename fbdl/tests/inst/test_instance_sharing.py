@@ -0,0 +1,55 @@
+import unittest
+
+from fbdl import session
+from fbdl.inst import inst
+from fbdl.refdict import RefDict
+
+
+class ValueMock:
+    def __init__(self, value):
+        self.value = value
+
+
+class TestInstanceKey(unittest.TestCase):
+    def setUp(self):
+        self.file = {'Id': 'file', 'Kind': 'File'}
+        self.type = {
+            'Id': 'type',
+            'Kind': 'Element Type Definition',
+            'Parent': RefDict(self.file),
+        }
+        self.elem = {
+            'Id': 'elem',
+            'Kind': 'Element Anonymous Instantiation',
+            'Parent': RefDict(self.type),
+        }
+
+    def test_not_parametrized(self):
+        self.assertEqual(inst._instance_key(self.elem), ('elem', ()))
+
+    def test_resolved_arguments(self):
+        self.type['Resolved Arguments'] = {'W': ValueMock(1)}
+        key1 = inst._instance_key(self.elem)
+        self.type['Resolved Arguments'] = {'W': ValueMock(2)}
+        key2 = inst._instance_key(self.elem)
+        self.assertNotEqual(key1, key2)
+
+        self.type['Resolved Arguments'] = {'W': ValueMock([1, [2]])}
+        self.assertEqual(
+            inst._instance_key(self.elem), ('elem', (('type', (('W', (1, (2,))),)),))
+        )
+
+
+class TestDropInstances(unittest.TestCase):
+    def test_drop(self):
+        with session.Session() as s:
+            s.instances = {'a': {}, 'b': {}, 'c': {}}
+            s.instance_files = {
+                'a': frozenset(['a.fbd']),
+                'b': frozenset(['a.fbd', 'b.fbd']),
+                'c': frozenset(['c.fbd']),
+            }
+            inst.drop_instances({'a.fbd'})
+
+            self.assertEqual(list(s.instances), ['c'])
+            self.assertEqual(list(s.instance_files), ['c'])
@@ -0,0 +1,85 @@
+import unittest
+
+from fbdl.inst import inst
+from fbdl.packages import Packages
+from fbdl.record import Element, Symbol
+from fbdl.refdict import RefDict
+from fbdl.reg import reg
+from fbdl.tests.utils import enter_session, literal
+
+
+def make_packages():
+    """Make main package with the bus holding a status and a block with a config."""
+    file = {'Id': 'file', 'Kind': 'File', 'Path': 'bus.fbd', 'Symbols': {}}
+    pkg = {
+        'Id': 'pkg',
+        'Kind': 'Package',
+        'Path': 'bus.fbd',
+        'Files': [file],
+        'Symbols': {},
+    }
+    file['Parent'] = RefDict(pkg)
+
+    main = Symbol('main', 'Element Anonymous Instantiation', 1, 'main')
+    main['Type'] = 'bus'
+    main['Parent'] = RefDict(file)
+
+    s = Symbol('s', 'Element Anonymous Instantiation', 2, 's')
+    s['Type'] = 'status'
+    s['Properties'] = {'width': {'Value': literal(8, s), 'Line Number': 3}}
+
+    b = Symbol('b', 'Element Anonymous Instantiation', 4, 'b')
+    b['Type'] = 'block'
+    c = Symbol('c', 'Element Anonymous Instantiation', 5, 'c')
+    c['Type'] = 'config'
+    c['Count'] = literal(2, c)
+    c['Parent'] = RefDict(b)
+    b['Symbols'] = {'c': c}
+
+    const = Symbol('C', 'Constant', 6, 'C')
+    const['Value'] = literal(1, const)
+
+    main['Symbols'] = {'s': s, 'b': b, 'C': const}
+    for sym in (s, b, const):
+        sym['Parent'] = RefDict(main)
+
+    file['Symbols']['main'] = main
+    pkg['Symbols']['main'] = RefDict(main)
+
+    packages = Packages()
+    packages['main'] = [pkg]
+    packages.check()
+    packages.evaluate()
+    return packages
+
+
+class TestRecords(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+
+    def test_instances(self):
+        bus = inst.instantiate(make_packages())
+
+        main = bus['main']
+        self.assertIsInstance(main, Element)
+        self.assertEqual(main['Constants'], {'C': 1})
+        self.assertNotIn('Previous Type', main)
+
+        s = main['Elements']['s']
+        self.assertIsInstance(s, Element)
+        self.assertEqual(
+            s, {'Base Type': 'status', 'Properties': {'width': 8, 'atomic': False}}
+        )
+
+        c = main['Elements']['b']['Elements']['c']
+        self.assertEqual(c['Count'], 2)
+
+    def test_registerified_instances(self):
+        bus = reg.registerify(inst.instantiate(make_packages()))
+
+        elements = bus['main']['Elements']
+        self.assertIsInstance(elements['x_uuid_x'], Element)
+        self.assertEqual(elements['x_uuid_x']['Access']['Address'], 0)
+        self.assertEqual(elements['s']['Access']['Address'], 2)
+        self.assertIsInstance(elements['b'], Element)
+        self.assertIn('Address Space', elements['b'])
@@ -0,0 +1,89 @@
+import unittest
+
+from fbdl import idgen
+from fbdl.packages import Packages
+from fbdl.refdict import RefDict
+from fbdl.tests.utils import enter_session
+
+
+def make_packages(extra_files=(), main_path='/prj/bus.fbd', lib_path='/prj/lib'):
+    """Make packages with the main package and the 'lib' package."""
+    packages = Packages()
+
+    main_file = {'Id': idgen.generate(), 'Kind': 'File', 'Path': main_path}
+    main_pkg = {
+        'Id': idgen.generate(),
+        'Kind': 'Package',
+        'Path': main_path,
+        'Files': [main_file],
+    }
+    main_file['Parent'] = RefDict(main_pkg)
+    main_file['Symbols'] = {}
+    packages['main'] = [main_pkg]
+
+    files = []
+    for name in sorted(('a.fbd',) + tuple(extra_files)):
+        path = f"{lib_path}/{name}"
+        files.append({'Id': idgen.generate(), 'Kind': 'File', 'Path': path})
+    lib_pkg = {
+        'Id': idgen.generate(),
+        'Kind': 'Package',
+        'Path': lib_path,
+        'Files': files,
+    }
+    packages.discovery_roots[lib_path] = lib_path.rsplit('/', 1)[0]
+    packages['lib'] = (lib_pkg,)
+
+    a_file = [f for f in files if f['Path'].endswith('a.fbd')][0]
+    block = {'Id': idgen.generate(), 'Kind': 'Element Type Definition', 'Name': 'B'}
+    const = {'Id': idgen.generate(), 'Kind': 'Constant', 'Name': 'C'}
+    const['Parent'] = RefDict(block)
+    block['Symbols'] = {'C': const}
+    block['Parent'] = RefDict(a_file)
+    a_file['Symbols'] = {'B': block}
+
+    return packages
+
+
+def ids(packages):
+    lib_pkg = packages['lib'][0]
+    a_file = [f for f in lib_pkg['Files'] if f['Path'].endswith('a.fbd')][0]
+    block = a_file['Symbols']['B']
+    return [lib_pkg['Id'], a_file['Id'], block['Id'], block['Symbols']['C']['Id']]
+
+
+class TestContentIds(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+
+    def test_stable_under_unrelated_files(self):
+        packages = make_packages()
+        packages.assign_content_ids()
+
+        other = make_packages(extra_files=('0.fbd',))
+        other.assign_content_ids()
+
+        self.assertEqual(ids(packages), ids(other))
+
+    def test_unique(self):
+        packages = make_packages(extra_files=('b.fbd',))
+        packages.assign_content_ids()
+        all_ids = ids(packages) + [f['Id'] for f in packages['lib'][0]['Files']]
+        all_ids.append(packages['main'][0]['Id'])
+        self.assertEqual(len(set(all_ids)), 5 + 1)
+
+    def test_references_follow_ids(self):
+        packages = make_packages()
+        packages.assign_content_ids()
+        const = packages['lib'][0]['Files'][0]['Symbols']['B']['Symbols']['C']
+        self.assertEqual(repr(const['Parent']), f"RD to '{ids(packages)[2]}'")
+
+    def test_library_independent_of_main_location(self):
+        lib_path = '/home/user/.local/lib/fbd/lib'
+        packages = make_packages(main_path='/prj/bus.fbd', lib_path=lib_path)
+        packages.assign_content_ids()
+
+        other = make_packages(main_path='/work/a/b/bus.fbd', lib_path=lib_path)
+        other.assign_content_ids()
+
+        self.assertEqual(ids(packages), ids(other))
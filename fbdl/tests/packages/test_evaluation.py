@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+from fbdl.expr import ExprDict
+from fbdl.packages import Packages
+from fbdl.refdict import RefDict
+from fbdl.tests.utils import NodeMock, enter_session, identifier, literal, parser
+
+
+def increment(name, symbol):
+    e = ExprDict(parser, NodeMock('binary_operation', name + ' + 1'), symbol)
+    e['Left'] = identifier(name, symbol)
+    e['Operator'] = '+'
+    e['Right'] = literal(1, symbol)
+    return e
+
+
+class TestEvaluation(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+        self.file = {'Id': 'file', 'Kind': 'File', 'Path': 'bus.fbd', 'Symbols': {}}
+        self.pkg = {
+            'Id': 'pkg',
+            'Kind': 'Package',
+            'Path': '.',
+            'Files': [self.file],
+            'Symbols': {},
+        }
+        self.file['Parent'] = RefDict(self.pkg)
+
+        self.packages = Packages()
+        self.packages['main'] = [self.pkg]
+
+    def add_constant(self, name, value):
+        sym = {
+            'Id': name,
+            'Kind': 'Constant',
+            'Line Number': len(self.file['Symbols']) + 1,
+            'Name': name,
+            'Parent': RefDict(self.file),
+        }
+        sym['Value'] = value(sym)
+        self.file['Symbols'][name] = sym
+        self.pkg['Symbols'][name] = RefDict(sym)
+
+    def test_constants_order(self):
+        self.add_constant('C', lambda s: increment('B', s))
+        self.add_constant('A', lambda s: literal(1, s))
+        self.add_constant('B', lambda s: increment('A', s))
+
+        order = self.packages._get_constants_in_evaluation_order()
+        self.assertEqual([c['Name'] for c in order], ['A', 'B', 'C'])
+
+        self.packages.evaluate()
+        self.assertEqual(self.file['Symbols']['C']['Value'].value, 3)
+
+    def test_order_reused_after_check(self):
+        self.add_constant('B', lambda s: increment('A', s))
+        self.add_constant('A', lambda s: literal(1, s))
+
+        self.packages.check()
+        with mock.patch.object(self.packages, '_build_constants_graph') as build:
+            self.packages.evaluate()
+            build.assert_not_called()
+        self.assertEqual(self.file['Symbols']['B']['Value'].value, 2)
+
+    def test_long_chain(self):
+        # Chain longer than the recursion limit.
+        n = 5000
+        for i in range(n, 0, -1):
+            self.add_constant(f'C{i}', lambda s, i=i: increment(f'C{i - 1}', s))
+        self.add_constant('C0', lambda s: literal(0, s))
+
+        self.packages.evaluate()
+        self.assertEqual(self.file['Symbols'][f'C{n}']['Value'].value, n)
+
+    def test_cycle(self):
+        self.add_constant('A', lambda s: increment('C', s))
+        self.add_constant('B', lambda s: increment('A', s))
+        self.add_constant('C', lambda s: increment('B', s))
+
+        with self.assertRaises(Exception) as cm:
+            self.packages.evaluate()
+
+        self.assertEqual(
+            str(cm.exception),
+            "Found constants dependency cycle:\n"
+            + "  'A', file 'bus.fbd', line 1\n"
+            + "  'C', file 'bus.fbd', line 3\n"
+            + "  'B', file 'bus.fbd', line 2\n"
+            + "  'A', file 'bus.fbd', line 1",
+        )
+
+    def test_cycle_found_by_check(self):
+        self.add_constant('A', lambda s: increment('B', s))
+        self.add_constant('B', lambda s: increment('A', s))
+
+        with self.assertRaisesRegex(Exception, "Found constants dependency cycle"):
+            self.packages.check()
@@ -0,0 +1,80 @@
+import unittest
+
+from fbdl.packages import Packages, ScopeIndex
+from fbdl.refdict import RefDict
+
+
+def add_symbol(parent, symbol):
+    symbol['Parent'] = RefDict(parent)
+    parent.setdefault('Symbols', {})[symbol['Name']] = symbol
+    return symbol
+
+
+class TestScopeIndex(unittest.TestCase):
+    def setUp(self):
+        self.file = {'Id': 'file', 'Kind': 'File', 'Path': 'pkg/a.fbd', 'Symbols': {}}
+        self.pkg = {
+            'Id': 'pkg',
+            'Kind': 'Package',
+            'Path': 'pkg',
+            'Files': [self.file],
+            'Symbols': {},
+        }
+        self.file['Parent'] = RefDict(self.pkg)
+
+        self.const = add_symbol(
+            self.file, {'Id': 'const', 'Kind': 'Constant', 'Name': 'C'}
+        )
+        self.type = add_symbol(
+            self.file,
+            {
+                'Id': 'type',
+                'Kind': 'Element Type Definition',
+                'Name': 'T',
+                'Type': 'block',
+                'Parameters': [{'Name': 'W'}],
+            },
+        )
+        self.status = add_symbol(
+            self.type,
+            {
+                'Id': 'status',
+                'Kind': 'Element Anonymous Instantiation',
+                'Name': 's',
+                'Type': 'status',
+            },
+        )
+        for name in ['C', 'T']:
+            self.pkg['Symbols'][name] = RefDict(self.file['Symbols'][name])
+
+        packages = Packages()
+        packages['pkg'] = (self.pkg,)
+        self.index = ScopeIndex()
+        self.index.build(packages)
+
+    def test_lookup(self):
+        self.assertIs(self.index.lookup('C', 'status'), self.const)
+        self.assertIs(self.index.lookup('s', 'status'), self.status)
+
+    def test_resolved_arguments(self):
+        self.type['Resolved Arguments'] = {'W': 1, 'C': 2}
+        self.assertEqual(self.index.lookup('W', 'status'), 1)
+        self.assertEqual(self.index.lookup('C', 'status'), 2)
+
+        # Resolved arguments change during instantiation, memoized lookups must see it.
+        self.type['Resolved Arguments'] = {'W': 3}
+        self.assertEqual(self.index.lookup('W', 'status'), 3)
+        self.assertIs(self.index.lookup('C', 'status'), self.const)
+
+    def test_missing_symbol(self):
+        with self.assertRaises(Exception):
+            self.index.lookup('X', 'status')
+
+    def test_get_file(self):
+        self.assertIs(self.index.get_file(self.status), self.file)
+        self.assertIs(self.index.get_file(RefDict(self.status)), self.file)
+
+    def test_not_indexed_node(self):
+        node = {'Id': 'status', 'Kind': 'File'}
+        self.assertIsNone(self.index.get_entry(node))
+        self.assertIs(self.index.get_file(node), node)
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from fbdl import pre
+
+
+class TestIndent(unittest.TestCase):
+    def test_valid(self):
+        pre.check_indent(b"main bus\n\n\tb block\n\t\ts status\n\tc config\n", 'bus.fbd')
+
+    def test_space(self):
+        with self.assertRaisesRegex(Exception, "line number 2"):
+            pre.check_indent(b"main bus\n\t s status\n", 'bus.fbd')
+
+    def test_multi_indent(self):
+        with self.assertRaisesRegex(Exception, "Multi indent.*\n.*'bus.fbd', line number 3"):
+            pre.check_indent(b"main bus\n\n\t\ts status\n", 'bus.fbd')
+
+    def test_only_tabs_line(self):
+        pre.check_indent(b"a\n\tb\n\t\t\n\t\t\tc\n", 'bus.fbd')
+        with self.assertRaisesRegex(Exception, "line number 4"):
+            pre.check_indent(b"a\n\tb\n\t\t\n\t\t\t\tc\n", 'bus.fbd')
+
+    def test_tabs_and_spaces_within_line(self):
+        pre.check_indent(b"a\tb\n\tc\t d\n\t\te\n", 'bus.fbd')
+
+    def test_multi_indent_after_dedent(self):
+        with self.assertRaisesRegex(Exception, "line number 5"):
+            pre.check_indent(b"a\n\tb\n\t\tc\n\td\n\t\t\te\n", 'bus.fbd')
+
+
+class TestReadFile(unittest.TestCase):
+    def test_line_endings(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'bus.fbd')
+            with open(path, 'wb') as f:
+                f.write(b"main bus\r\n\r\n\ts status\r")
+
+            self.assertEqual(pre.read_file(path), b"main bus\n\n\ts status\n")
@@ -3,11 +3,15 @@ import os
 path_prefix = '/'.join(os.path.abspath(__file__).split('/')[:-4]) + '/'
 
 from fbdl import pre
+from fbdl.tests.utils import enter_session
 
 from pprint import pprint
 
 
 class TestPackageDiscovery(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+
     def test_package_discovery(self):
         test_dir = os.path.dirname(os.path.realpath(__file__))
         dummy_project_dir = os.path.join(test_dir, "dummy_project")
@@ -52,14 +56,18 @@ class TestPackageDiscovery(unittest.TestCase):
             ],
         }
 
+        # Packages are only discovered, not loaded.
+        self.assertEqual(len(packages), 0)
+
         for pkg_name, pkgs in expected.items():
-            self.assertEqual(pkg_name in packages, True)
+            self.assertEqual(pkg_name in packages.discovered, True)
             for i, pkg in enumerate(pkgs):
-                self.assertEqual(pkg['Path'], packages[pkg_name][i]['Path'])
+                discovered_pkg = packages.discovered[pkg_name][i]
+                self.assertEqual(pkg['Path'], discovered_pkg['Path'])
+                self.assertEqual('Files' in discovered_pkg, False)
+
+                pre.load_package(discovered_pkg, packages)
                 for j, f in enumerate(pkg['Files']):
-                    self.assertEqual(f['Path'], packages[pkg_name][i]['Files'][j]['Path'])
+                    self.assertEqual(f['Path'], discovered_pkg['Files'][j]['Path'])
 
-        for pkg_name, pkgs in packages.items():
-            for pkg in pkgs:
-                for f in pkg['Files']:
-                    f['Handle'].close()
+            self.assertEqual(len(packages[pkg_name]), len(pkgs))
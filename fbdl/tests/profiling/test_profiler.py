@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from fbdl import profiling
+from fbdl.tests.utils import binary_operation, literal
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stage_counters(self):
+        with profiling.Profiler() as profiler:
+            with profiler.stage('first'):
+                profiling.count('Symbol Lookups')
+                profiling.count('Symbol Lookups')
+            with profiler.stage('second'):
+                profiling.count('Elements Instantiated', 3)
+                data = [0] * 10000
+
+        self.assertFalse(profiling.enabled)
+        self.assertEqual([s['Name'] for s in profiler.stages], ['first', 'second'])
+        self.assertEqual(profiler.stages[0]['Counters'], {'Symbol Lookups': 2})
+        self.assertEqual(profiler.stages[1]['Counters'], {'Elements Instantiated': 3})
+        self.assertGreaterEqual(profiler.stages[1]['Peak Memory'], 8 * 9000)
+
+    def test_count_outside_stage(self):
+        with profiling.Profiler() as profiler:
+            profiling.count('Files Parsed')
+            with profiler.stage('stage'):
+                pass
+
+        self.assertEqual(profiler.stages[0]['Counters'], {})
+
+    def test_concurrent_stages(self):
+        barrier = threading.Barrier(2)
+
+        def run(profiler, n):
+            with profiler.stage('stage'):
+                barrier.wait()
+                profiling.count('Symbol Lookups', n)
+                barrier.wait()
+
+        with profiling.Profiler() as first, profiling.Profiler() as second:
+            threads = [
+                threading.Thread(target=run, args=(first, 1)),
+                threading.Thread(target=run, args=(second, 2)),
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertFalse(profiling.enabled)
+        self.assertEqual(first.stages[0]['Counters'], {'Symbol Lookups': 1})
+        self.assertEqual(second.stages[0]['Counters'], {'Symbol Lookups': 2})
+
+    def test_peak_memory_without_reset_peak(self):
+        with mock.patch.object(profiling, '_reset_peak', None):
+            with profiling.Profiler() as profiler:
+                with profiler.stage('first'):
+                    data = [0] * 100000
+                    del data
+                with profiler.stage('second'):
+                    data = [0] * 10000
+
+        self.assertGreaterEqual(profiler.stages[0]['Peak Memory'], 8 * 90000)
+        self.assertGreaterEqual(profiler.stages[1]['Peak Memory'], 8 * 9000)
+        self.assertLess(profiler.stages[1]['Peak Memory'], 8 * 90000)
+
+    def test_nodes_visited(self):
+        symbol = {'Kind': 'Constant'}
+        with profiling.Profiler() as profiler:
+            with profiler.stage('parse'):
+                binary_operation(literal(1, symbol), '+', literal(2, symbol), symbol)
+
+        self.assertEqual(profiler.stages[0]['Counters'], {'Nodes Visited': 3})
+
+    def test_no_profiler(self):
+        with profiling.stage(None, 'stage'):
+            pass
+
+    def test_trace(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'trace.json')
+            with profiling.Profiler(trace_path=path) as profiler:
+                with profiler.stage('stage'):
+                    profiling.count('Nodes Visited', 5)
+
+            with open(path) as f:
+                events = json.load(f)['traceEvents']
+
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['name'], 'stage')
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertEqual(events[0]['args']['Nodes Visited'], 5)
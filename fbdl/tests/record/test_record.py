@@ -0,0 +1,79 @@
+import copy
+import pickle
+import unittest
+
+from fbdl.record import Element, Symbol
+from fbdl.refdict import RefDict
+
+
+class TestRecord(unittest.TestCase):
+    def setUp(self):
+        self.symbol = Symbol('0x1', 'Constant', 3, 'A')
+
+    def test_items(self):
+        self.symbol['Value'] = 1
+        self.assertEqual(
+            self.symbol.items(),
+            [
+                ('Id', '0x1'),
+                ('Kind', 'Constant'),
+                ('Line Number', 3),
+                ('Name', 'A'),
+                ('Value', 1),
+            ],
+        )
+        self.assertEqual(len(self.symbol), 5)
+        self.assertEqual(self.symbol.value, 1)
+
+    def test_missing_key(self):
+        self.assertNotIn('Count', self.symbol)
+        self.assertEqual(self.symbol.get('Count'), None)
+        self.assertEqual(self.symbol.pop('Count', None), None)
+        with self.assertRaises(KeyError):
+            self.symbol['Count']
+        with self.assertRaises(KeyError):
+            del self.symbol['Count']
+
+    def test_unknown_key(self):
+        self.assertNotIn('Foo', self.symbol)
+        self.assertEqual(self.symbol.get('Foo', 0), 0)
+        with self.assertRaises(KeyError):
+            self.symbol['Foo'] = 1
+
+    def test_pop(self):
+        elem = Element('config', {})
+        elem['Previous Type'] = 'config'
+        self.assertEqual(elem.pop('Previous Type'), 'config')
+        self.assertNotIn('Previous Type', elem)
+
+    def test_copy(self):
+        elem = Element('block', {})
+        elem['Elements'] = {}
+        other = elem.copy()
+        other['Count'] = 2
+        self.assertIs(other['Elements'], elem['Elements'])
+        self.assertNotIn('Count', elem)
+
+    def test_equal_to_dict(self):
+        self.assertEqual(
+            Element('status', {'width': 8}),
+            {'Base Type': 'status', 'Properties': {'width': 8}},
+        )
+        self.assertNotEqual(Element('status', {}), Element('config', {}))
+
+    def test_pickle_dictionary_form(self):
+        block = Symbol('0x2', 'Element Type Definition', 1, 'B')
+        block['Symbols'] = {'A': self.symbol}
+        self.symbol['Parent'] = RefDict(block)
+
+        self.assertEqual(block.__getstate__(), block.to_dict())
+
+        loaded = pickle.loads(pickle.dumps(block))
+        self.assertEqual(loaded['Name'], 'B')
+        self.assertIs(loaded['Symbols']['A']['Parent'].d, loaded)
+
+    def test_deepcopy(self):
+        elem = Element('config', {'width': 8})
+        other = copy.deepcopy(elem)
+        other['Properties']['width'] = 4
+        self.assertEqual(elem['Properties']['width'], 8)
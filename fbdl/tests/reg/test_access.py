@@ -0,0 +1,46 @@
+import unittest
+
+from fbdl.reg import access
+
+
+class TestAccess(unittest.TestCase):
+    def test_single(self):
+        a = access.single(32, 4, 8)
+        self.assertEqual(
+            a.to_dict(),
+            {'Address': 4, 'Count': 1, 'Strategy': 'Single', 'Mask': (7, 0)},
+        )
+
+    def test_linear(self):
+        a = access.single(32, 4, 40)
+        self.assertEqual(a['Count'], 2)
+        self.assertEqual(a['Strategy'], 'Linear')
+        self.assertEqual(a['Mask'], (7, 0))
+
+    def test_multiple(self):
+        a = access.array(32, 7, 0, 8)
+        self.assertEqual(
+            a.to_dict(),
+            {
+                'Address': 0,
+                'Count': 2,
+                'Strategy': 'Multiple',
+                'Accesses per Item': 1,
+                'Items per Access': 4,
+            },
+        )
+        self.assertNotIn('Mask', a)
+        self.assertIsNone(a.get('Mask'))
+        with self.assertRaises(KeyError):
+            a['Mask']
+
+    def test_bunch(self):
+        a = access.array(32, 5, 0, 40)
+        self.assertEqual(a['Strategy'], 'Bunch')
+        self.assertEqual(a['Count'], 7)
+        self.assertEqual(a['Bunch Size'], 4)
+        self.assertEqual(a['Accesses per Bunch'], 5)
+
+    def test_repr(self):
+        a = access.single(32, 0, 32)
+        self.assertEqual(repr(a), repr(a.to_dict()))
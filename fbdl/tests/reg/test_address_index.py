@@ -0,0 +1,108 @@
+import unittest
+
+from fbdl.reg import reg
+from fbdl.reg.address_index import AddressIndex
+from fbdl.tests.utils import enter_session, status
+
+try:
+    from fbdl.reg import address_map
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def hits(index, addr):
+    return [(h['Path'], h['Indices'], h['Mask']) for h in index.lookup(addr)]
+
+
+class TestAddressIndex(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+        inner = {
+            'Base Type': 'block',
+            'Count': 3,
+            'Elements': {'s': status(8), 'arr': status(40, 3), 'm': status(8, 5)},
+        }
+        outer = {
+            'Base Type': 'block',
+            'Count': 2,
+            'Elements': {'in': inner, 'c': status(4), 'w': status(40)},
+        }
+        self.bus = {
+            'main': {
+                'Base Type': 'bus',
+                'Properties': {'width': 32},
+                'Elements': {'o': outer, 'x': status(12)},
+            }
+        }
+        reg.registerify(self.bus, 'compact')
+        self.index = AddressIndex(self.bus)
+
+    def test_bus_registers(self):
+        self.assertEqual(hits(self.index, 0), [('main.x_uuid_x', (), (31, 0))])
+        self.assertEqual(hits(self.index, 2), [('main.x', (), (11, 0))])
+        self.assertEqual(hits(self.index, 3), [])
+
+    def test_packed_register(self):
+        # Status 'c' fills the tail of the wide status 'w'.
+        self.assertEqual(
+            hits(self.index, 97),
+            [('main.o.w', (1,), (7, 0)), ('main.o.c', (1,), (11, 8))],
+        )
+
+    def test_nested_arrays(self):
+        self.assertEqual(
+            hits(self.index, 81),
+            [
+                ('main.o.in.arr', (0, 1, 0), (7, 0)),
+                ('main.o.in.arr', (0, 1, 1), (31, 8)),
+            ],
+        )
+        self.assertEqual(
+            hits(self.index, 124),
+            [
+                ('main.o.in.m', (1, 2, 0), (7, 0)),
+                ('main.o.in.m', (1, 2, 1), (15, 8)),
+                ('main.o.in.m', (1, 2, 2), (23, 16)),
+                ('main.o.in.m', (1, 2, 3), (31, 24)),
+            ],
+        )
+
+    def test_func_parameters(self):
+        params = {'a': status(8), 'b': status(8)}
+        for param in params.values():
+            param['Base Type'] = 'param'
+        bus = {
+            'main': {
+                'Base Type': 'bus',
+                'Properties': {'width': 32},
+                'Elements': {'f': {'Base Type': 'func', 'Elements': params}},
+            }
+        }
+        reg.registerify(bus, 'compact')
+        self.assertEqual(
+            hits(AddressIndex(bus), 2),
+            [('main.f.a', (), (7, 0)), ('main.f.b', (), (15, 8))],
+        )
+
+    def test_lookup_many(self):
+        results = self.index.lookup_many([2, 3, 2])
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0], results[2])
+        self.assertEqual(results[1], [])
+
+    def test_lookup_many_independent_results(self):
+        results = self.index.lookup_many([2, 2])
+        results[0][0]['Path'] = 'changed'
+        results[0].append(None)
+        self.assertEqual(results[1], self.index.lookup(2))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_consistent_with_address_map(self):
+        addr_map = address_map.address_map(self.bus)
+        for addr, path_id, high, low in zip(
+            *(addr_map[field] for field in address_map.FIELDS)
+        ):
+            path = addr_map['Paths'][path_id]
+            masks = [h[2] for h in hits(self.index, int(addr)) if h[0] == path]
+            self.assertIn((int(high), int(low)), masks)
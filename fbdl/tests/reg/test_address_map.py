@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from fbdl.reg import address_map, reg
+from fbdl.tests.utils import enter_session, status
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def rows(addr_map, path):
+    path_id = addr_map['Paths'].index(path)
+    selected = addr_map['Path Id'] == path_id
+    return [
+        (int(a), int(h), int(l))
+        for a, h, l in zip(
+            addr_map['Address'][selected],
+            addr_map['Mask High'][selected],
+            addr_map['Mask Low'][selected],
+        )
+    ]
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestAddressMap(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+        inner = {
+            'Base Type': 'block',
+            'Count': 3,
+            'Elements': {'s': status(8), 'arr': status(40, 3)},
+        }
+        outer = {
+            'Base Type': 'block',
+            'Count': 2,
+            'Elements': {'in': inner, 'c': status(4)},
+        }
+        self.bus = {
+            'main': {
+                'Base Type': 'bus',
+                'Properties': {'width': 32},
+                'Elements': {'o': outer, 'x': status(12)},
+            }
+        }
+        reg.registerify(self.bus, 'compact')
+
+    def test_nested_block_arrays(self):
+        addr_map = address_map.address_map(self.bus)
+
+        self.assertEqual(rows(addr_map, 'main.x'), [(2, 11, 0)])
+        self.assertEqual(rows(addr_map, 'main.o.c'), [(64, 3, 0), (96, 3, 0)])
+        self.assertEqual(
+            [a for a, _, _ in rows(addr_map, 'main.o.in.s')],
+            [76, 84, 92, 108, 116, 124],
+        )
+
+        # Items of the bunch array are split into registers.
+        arr = rows(addr_map, 'main.o.in.arr')
+        self.assertEqual(len(arr), 6 * 3 * 2)
+        self.assertEqual(
+            arr[:6],
+            [(72, 31, 0), (73, 7, 0), (73, 31, 8), (74, 15, 0), (74, 31, 16), (75, 23, 0)],
+        )
+
+    def test_sorted_by_address(self):
+        addr_map = address_map.address_map(self.bus)
+        self.assertTrue(numpy.all(numpy.diff(addr_map['Address']) >= 0))
+
+    def test_save(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'map.npz')
+            address_map.save(self.bus, path)
+            with numpy.load(path) as saved:
+                self.assertEqual(list(saved['paths'])[0], 'main.x')
+                self.assertEqual(len(saved['address']), len(saved['mask_low']))
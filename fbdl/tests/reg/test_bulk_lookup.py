@@ -0,0 +1,70 @@
+import unittest
+
+from fbdl.reg.iters import AddressSpace, RegisterArray
+
+
+class TestRegisterArrayBulkLookup(unittest.TestCase):
+    def test_single(self):
+        ra = RegisterArray(32, 4, 10, 20)
+        self.assertEqual(list(ra.addresses()), [10, 11, 12, 13])
+        self.assertEqual(list(ra.addresses([3, 1])), [13, 11])
+        high, low = ra.masks([0, 2])
+        self.assertEqual(list(high), [19, 19])
+        self.assertEqual(list(low), [0, 0])
+
+    def test_multiple(self):
+        ra = RegisterArray(32, 7, 100, 8)
+        self.assertEqual(list(ra.addresses()), [100, 100, 100, 100, 101, 101, 101])
+        high, low = ra.masks([0, 3, 4, 6])
+        self.assertEqual(list(high), [7, 31, 7, 23])
+        self.assertEqual(list(low), [0, 24, 0, 16])
+
+    def test_bunch(self):
+        ra = RegisterArray(32, 5, 10, 40)
+        self.assertEqual(ra.strategy, 'bunch')
+        self.assertEqual(ra.bunch_size, 4)
+        self.assertEqual(ra.accesses_per_bunch, 5)
+        self.assertEqual(ra.registers_count, 7)
+        self.assertEqual(ra[0], ((10, (31, 0)), (11, (7, 0))))
+        self.assertEqual(ra[1], ((11, (31, 8)), (12, (15, 0))))
+        self.assertEqual(ra[3], ((13, (31, 24)), (14, (31, 0))))
+        self.assertEqual(ra[4], ((15, (31, 0)), (16, (7, 0))))
+        self.assertEqual(list(ra.addresses([1, 3, 4])), [11, 13, 15])
+        high, low = ra.masks([1, 3])
+        self.assertEqual(list(high), [47, 63])
+        self.assertEqual(list(low), [8, 24])
+        self.assertEqual(list(ra.bunches()), [(10, 5, 0, 4), (15, 2, 4, 1)])
+
+    def test_items(self):
+        self.assertEqual(RegisterArray(32, 4, 10, 20)[2], ((12, (19, 0)),))
+        self.assertEqual(RegisterArray(32, 7, 100, 8)[5], ((101, (15, 8)),))
+
+    def test_index_out_of_range(self):
+        ra = RegisterArray(32, 4, 0, 8)
+        with self.assertRaises(IndexError):
+            ra.addresses([4])
+        with self.assertRaises(IndexError):
+            ra.masks([-1])
+
+    def test_negative_index(self):
+        ra = RegisterArray(32, 5, 10, 40)
+        self.assertEqual(ra[-1], ra[4])
+        self.assertEqual(ra[-5], ra[0])
+        with self.assertRaises(IndexError):
+            ra[-6]
+        self.assertEqual(RegisterArray(32, 7, 100, 8)[-2], ((101, (15, 8)),))
+
+
+class TestAddressSpaceBulkLookup(unittest.TestCase):
+    def test_beginnings(self):
+        space = AddressSpace(64, 4, 16)
+        self.assertEqual(list(space.beginnings()), [64, 80, 96, 112])
+        self.assertEqual(list(space.beginnings([2, 0])), [96, 64])
+        self.assertEqual(space.beginnings([3])[0], space[3][0])
+
+    def test_negative_index(self):
+        space = AddressSpace(64, 4, 16)
+        self.assertEqual(space[-1], (112, 127))
+        self.assertEqual(space[-4], space[0])
+        with self.assertRaises(IndexError):
+            space[-5]
@@ -0,0 +1,61 @@
+import copy
+import unittest
+
+from fbdl.reg import access, digest
+from fbdl.tests.utils import status
+
+
+def bus(*widths):
+    elements = {f"s{i}": status(w, atomic=False) for i, w in enumerate(widths)}
+    return {
+        'main': {'Base Type': 'bus', 'Properties': {'width': 32}, 'Elements': elements}
+    }
+
+
+class TestDigest(unittest.TestCase):
+    def test_equal_trees(self):
+        self.assertEqual(digest.digest(bus(1, 2)), digest.digest(bus(1, 2)))
+
+    def test_different_trees(self):
+        digests = {
+            digest.digest(bus(1, 2)),
+            digest.digest(bus(2, 1)),
+            digest.digest(bus(1, 2, 3)),
+            digest.digest(bus(1, 2.0)),
+            digest.digest(bus(1, True)),
+        }
+        self.assertEqual(len(digests), 5)
+
+    def test_boundaries_are_encoded(self):
+        a = {'Base Type': 'status', 'Doc': ['ab', 'c']}
+        b = {'Base Type': 'status', 'Doc': ['a', 'bc']}
+        self.assertNotEqual(digest.digest({'s': a}), digest.digest({'s': b}))
+        self.assertNotEqual(digest.digest({'s': a}), digest.digest({'s': a, '': a}))
+
+    def test_shared_blocks(self):
+        s = status(8)
+        inner = {'Base Type': 'block', 'Elements': {'s': s}}
+        shared = {'a': inner, 'b': inner}
+        copied = {'a': inner, 'b': copy.deepcopy(inner)}
+        self.assertEqual(digest.digest(shared), digest.digest(copied))
+
+    def test_chunks(self):
+        elements = {f"s{i}": status(i) for i in range(2 * digest.CHUNK_SIZE + 1)}
+        changed = dict(elements)
+        changed[f"s{digest.CHUNK_SIZE}"] = status(0)
+        self.assertNotEqual(digest.digest(elements), digest.digest(changed))
+
+    def test_access(self):
+        a = {'Base Type': 'status', 'Access': access.single(32, 2, 8)}
+        b = {'Base Type': 'status', 'Access': access.single(32, 3, 8)}
+        self.assertNotEqual(digest.digest({'s': a}), digest.digest({'s': b}))
+
+    def test_uuid(self):
+        self.assertLess(digest.uuid(bus(1), 8), 2 ** 8)
+        self.assertEqual(digest.uuid(bus(1), 64) & 0xFF, digest.uuid(bus(1), 8))
+        # Encoding must not change between Python versions and runs.
+        self.assertEqual(digest.uuid(bus(1, 2), 32), 0xA2D5B45B)
+
+    def test_unknown_type(self):
+        with self.assertRaises(TypeError):
+            digest.digest({'s': {'Base Type': 'status', 'Doc': object()}})
@@ -0,0 +1,173 @@
+import unittest
+
+from fbdl.reg import packing, reg
+from fbdl.tests.utils import enter_session
+
+
+def field(width, base_type='status', **properties):
+    properties['width'] = width
+    return {'Base Type': base_type, 'Properties': properties}
+
+
+def layout(funcs):
+    return [(f['Access']['Address'], f['Access']['Mask']) for f in funcs]
+
+
+class TestPacking(unittest.TestCase):
+    def test_compact(self):
+        funcs = [field(20), field(8), field(12), field(24)]
+        addr = packing.pack(funcs, 32, 'compact', 2)
+        self.assertEqual(addr, 4)
+        self.assertEqual(
+            layout(funcs), [(3, (19, 0)), (2, (31, 24)), (3, (31, 20)), (2, (23, 0))]
+        )
+
+    def test_block_aligned(self):
+        funcs = [field(3), field(8), field(5), field(7), field(12)]
+        addr = packing.pack(funcs, 32, 'block-aligned', 0)
+        self.assertEqual(addr, 2)
+        self.assertEqual(
+            layout(funcs),
+            [(1, (10, 8)), (0, (23, 16)), (1, (4, 0)), (0, (30, 24)), (0, (11, 0))],
+        )
+
+    def test_full_align(self):
+        funcs = [field(1), field(1), field(40)]
+        addr = packing.pack(funcs, 32, 'full-align', 0)
+        self.assertEqual(addr, 4)
+        self.assertEqual(layout(funcs), [(0, (0, 0)), (1, (0, 0)), (2, (7, 0))])
+
+    def test_wide_tail_is_shared(self):
+        funcs = [field(40), field(8)]
+        self.assertEqual(packing.pack(funcs, 32, 'compact', 0), 2)
+        self.assertEqual(layout(funcs), [(0, (7, 0)), (1, (15, 8))])
+
+    def test_atomic_is_not_shared(self):
+        funcs = [field(40, atomic=True), field(4, atomic=True), field(8)]
+        self.assertEqual(packing.pack(funcs, 32, 'compact', 0), 4)
+        self.assertEqual(layout(funcs), [(0, (7, 0)), (2, (3, 0)), (3, (7, 0))])
+
+    def test_types_and_once_are_not_mixed(self):
+        funcs = [field(8), field(8, 'config'), field(8, once=True), field(8)]
+        self.assertEqual(packing.pack(funcs, 32, 'compact', 0), 3)
+        self.assertEqual(funcs[0]['Access']['Address'], funcs[3]['Access']['Address'])
+
+    def test_groups_are_consecutive(self):
+        funcs = [
+            field(30, groups=['a']),
+            field(4),
+            field(30, groups=['a', 'b']),
+            field(2, groups=['b']),
+            field(30),
+        ]
+        self.assertEqual(packing.pack(funcs, 32, 'compact', 0), 4)
+        # Group members are placed in order of declaration.
+        self.assertEqual(
+            layout([funcs[0], funcs[2], funcs[3]]),
+            [(0, (29, 0)), (1, (29, 0)), (1, (31, 30))],
+        )
+        self.assertEqual(layout([funcs[4], funcs[1]]), [(2, (29, 0)), (3, (3, 0))])
+
+    def test_invalid_strategy(self):
+        with self.assertRaises(Exception):
+            packing.pack([field(1)], 32, 'sparse', 0)
+
+    def test_many_functionalities(self):
+        funcs = [field(1 + i % 31) for i in range(200000)]
+        addr = packing.pack(funcs, 32, 'compact', 0)
+        total = sum(f['Properties']['width'] for f in funcs)
+        self.assertLessEqual(addr, total // 32 + 2)
+
+
+class TestDefaultLayout(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+
+    def test_own_registers_in_order_of_declaration(self):
+        bus = {
+            'main': {
+                'Base Type': 'bus',
+                'Properties': {'width': 32},
+                'Elements': {
+                    'a': field(4),
+                    'b': {
+                        'Base Type': 'status',
+                        'Count': 3,
+                        'Properties': {'width': 8},
+                    },
+                    'c': field(40),
+                    'd': field(4),
+                },
+            }
+        }
+        reg.registerify(bus)
+
+        elements = bus['main']['Elements']
+        self.assertEqual(
+            [(n, elements[n]['Access']['Address']) for n in 'abcd'],
+            [('a', 2), ('b', 3), ('c', 4), ('d', 6)],
+        )
+
+    def test_statuses_before_other_functionalities(self):
+        bus = {
+            'main': {
+                'Base Type': 'bus',
+                'Properties': {'width': 32},
+                'Elements': {
+                    'c': field(4, 'config'),
+                    'a': field(4),
+                    'm': field(4, 'mask'),
+                    'b': field(4, groups=['g']),
+                },
+            }
+        }
+        reg.registerify(bus)
+
+        elements = bus['main']['Elements']
+        self.assertEqual(
+            [(n, elements[n]['Access']['Address']) for n in 'abcm'],
+            [('a', 2), ('b', 3), ('c', 4), ('m', 5)],
+        )
+
+    def test_func_parameters(self):
+        func = {
+            'Base Type': 'func',
+            'Properties': {},
+            'Elements': {
+                'x': field(8, 'param'),
+                'y': field(8, 'param'),
+            },
+        }
+        bus = {
+            'main': {
+                'Base Type': 'bus',
+                'Properties': {'width': 32},
+                'Elements': {'f': func, 'a': field(4)},
+            }
+        }
+        reg.registerify(bus, 'compact')
+
+        params = bus['main']['Elements']['f']['Elements']
+        self.assertEqual(layout(params.values()), [(3, (7, 0)), (3, (15, 8))])
+        self.assertEqual(bus['main']['Sizes']['Own'], 4)
+        # Instance might be shared, so it is not modified.
+        self.assertNotIn('Access', func['Elements']['x'])
+
+    def test_func_parameters_array(self):
+        param = field(8, 'param')
+        param['Count'] = 2
+        bus = {
+            'main': {
+                'Base Type': 'bus',
+                'Properties': {'width': 32},
+                'Elements': {
+                    'f': {
+                        'Base Type': 'func',
+                        'Properties': {},
+                        'Elements': {'x': param},
+                    }
+                },
+            }
+        }
+        with self.assertRaisesRegex(Exception, "Parameter 'x' of func 'f'"):
+            reg.registerify(bus)
@@ -0,0 +1,79 @@
+import unittest
+
+from fbdl import session
+from fbdl.reg import reg
+from fbdl.tests.utils import enter_session, status
+
+
+class TestSharedInstances(unittest.TestCase):
+    def setUp(self):
+        enter_session(self)
+
+    def test_shared_block(self):
+        inner = {'Base Type': 'block', 'Elements': {'s': status(8)}}
+        outer = {'Base Type': 'block', 'Elements': {'a': inner, 'b': inner}}
+        bus = {
+            'main': {
+                'Base Type': 'bus',
+                'Properties': {'width': 32},
+                'Elements': {'x': outer, 'y': outer},
+            }
+        }
+
+        reg.registerify(bus)
+
+        elements = bus['main']['Elements']
+        spaces = set()
+        for outer_name in ['x', 'y']:
+            outer = elements[outer_name]
+            spaces.add(outer['Address Space'][0])
+            for inner_name in ['a', 'b']:
+                inner = outer['Elements'][inner_name]
+                spaces.add(inner['Address Space'][0])
+                self.assertEqual(inner['Elements']['s']['Access']['Address'], 0)
+
+        # Every placement of shared blocks gets its own address space.
+        self.assertEqual(len(spaces), 6)
+
+    def test_instances_not_modified(self):
+        inner = {'Base Type': 'block', 'Elements': {'s': status(8)}}
+        main = {
+            'Base Type': 'bus',
+            'Properties': {'width': 32},
+            'Elements': {'a': inner, 'c': status(4)},
+        }
+
+        with session.Session() as s:
+            s.instances = {'inner': inner, 'main': main}
+            first = reg.registerify({'main': main})
+            second = reg.registerify({'main': main})
+
+        self.assertEqual(list(main['Elements']), ['a', 'c'])
+        self.assertNotIn('Access', main['Elements']['c'])
+        self.assertNotIn('Sizes', inner)
+        self.assertNotIn('Access', inner['Elements']['s'])
+
+        # Registerified copy of the block is reused, but placed again.
+        a1, a2 = first['main']['Elements']['a'], second['main']['Elements']['a']
+        self.assertIs(a1['Elements']['s'], a2['Elements']['s'])
+        self.assertEqual(a1['Address Space'], a2['Address Space'])
+
+    def test_reused_blocks_not_placed(self):
+        inner = {'Base Type': 'block', 'Elements': {'s': status(8)}}
+        main = {
+            'Base Type': 'bus',
+            'Properties': {'width': 32},
+            'Elements': {'a': inner},
+        }
+
+        with session.Session() as s:
+            s.instances = {'inner': inner, 'main': main}
+            first = reg.registerify({'main': main})
+            second = reg.registerify({'main': main})
+
+        self.assertNotIn('Address Space', s.registerified[id(inner)][1])
+        # UUID does not depend on previous registerifications.
+        self.assertEqual(
+            first['main']['Elements']['x_uuid_x']['Properties']['default'],
+            second['main']['Elements']['x_uuid_x']['Properties']['default'],
+        )
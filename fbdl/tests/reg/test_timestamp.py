@@ -0,0 +1,16 @@
+import os
+import unittest
+from unittest import mock
+
+from fbdl.reg import reg
+
+
+class TestTimestamp(unittest.TestCase):
+    def test_source_date_epoch(self):
+        with mock.patch.dict(os.environ, {'SOURCE_DATE_EPOCH': '1600000000'}):
+            self.assertEqual(reg.get_timestamp(), 1600000000)
+
+    def test_invalid_source_date_epoch(self):
+        with mock.patch.dict(os.environ, {'SOURCE_DATE_EPOCH': 'yesterday'}):
+            with self.assertRaises(Exception):
+                reg.get_timestamp()
@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+
+from fbdl import serve
+
+
+class TestUpdate(unittest.TestCase):
+    def setUp(self):
+        self.server = serve.Server('/prj/bus.fbd')
+
+        self.file = {'Path': '/prj/lib/a.fbd'}
+        self.server.packages = mock.Mock()
+        self.server.complete = True
+        self.server.mtimes = {'/prj/bus.fbd': 1, self.file['Path']: 1}
+        self.mtime = 1
+
+        self.patch('_files', side_effect=lambda: iter([(self.file, {})]))
+        self.patch('_files_added', return_value=False)
+        self.patch('_mtime', side_effect=lambda path: self.mtime)
+        self.patch('_parse_packages')
+        self.compile = self.patch('compile')
+        self.instantiate = self.patch('_instantiate')
+
+    def patch(self, name, **kwargs):
+        patcher = mock.patch.object(self.server, name, **kwargs)
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def test_reparse_error_then_fix(self):
+        self.mtime = 2
+        with mock.patch.object(
+            self.server, '_reparse', side_effect=Exception("Found errors")
+        ):
+            with self.assertRaisesRegex(Exception, "Found errors"):
+                self.server.update()
+        self.assertFalse(self.server.complete)
+
+        # State after the failed reparse is not consistent, so the fix is not reparsed.
+        self.mtime = 3
+        with mock.patch.object(self.server, '_reparse') as reparse:
+            self.assertTrue(self.server.update())
+            reparse.assert_not_called()
+        self.compile.assert_called_once()
+
+    def test_instantiation_error(self):
+        self.mtime = 2
+        self.instantiate.side_effect = Exception("Division by zero")
+        with mock.patch.object(self.server, '_reparse', return_value=set()):
+            with self.assertRaisesRegex(Exception, "Division by zero"):
+                self.server.update()
+        self.assertFalse(self.server.complete)
@@ -0,0 +1,52 @@
+import threading
+import unittest
+
+from fbdl import expr
+from fbdl import idgen
+from fbdl import session
+
+
+class TestSession(unittest.TestCase):
+    def test_independent_id_counters(self):
+        with session.Session():
+            first = idgen.generate()
+            with session.Session():
+                self.assertEqual(idgen.generate(), first)
+            self.assertEqual(int(idgen.generate(), 16), int(first, 16) + 1)
+
+    def test_reentrant(self):
+        s = session.Session()
+        with s:
+            with s:
+                self.assertIs(session.current(), s)
+                idgen.generate()
+            self.assertIs(session.current(), s)
+            self.assertEqual(s.current_id, idgen.FIRST_ID)
+
+    def test_no_session(self):
+        with self.assertRaises(Exception):
+            session.current()
+
+    def test_change_context(self):
+        with session.Session() as s:
+            expr.change_context()
+            expr.change_context()
+            self.assertEqual(s.context, 2)
+
+    def test_threads(self):
+        ids = {}
+        barrier = threading.Barrier(4)
+
+        def run(n):
+            with session.Session():
+                barrier.wait()
+                ids[n] = [idgen.generate() for _ in range(100)]
+
+        threads = [threading.Thread(target=run, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for n in range(1, 4):
+            self.assertEqual(ids[n], ids[0])
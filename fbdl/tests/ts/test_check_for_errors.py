@@ -0,0 +1,19 @@
+import unittest
+
+from fbdl import ts
+from fbdl.tests.utils import NodeMock
+
+
+class TreeMock:
+    def __init__(self, has_error):
+        self.root_node = NodeMock(has_error=has_error)
+
+    def walk(self):
+        raise AssertionError("Tree without errors must not be traversed.")
+
+
+class TestCheckForErrors(unittest.TestCase):
+    def test_no_errors(self):
+        parser = ts.ParserBase()
+        parser.tree = TreeMock(False)
+        parser.check_for_errors()
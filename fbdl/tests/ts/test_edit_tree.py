@@ -0,0 +1,39 @@
+import unittest
+
+from fbdl import ts
+
+
+class TreeMock:
+    def edit(self, **kwargs):
+        self.kwargs = kwargs
+
+
+class TestEditTree(unittest.TestCase):
+    def edit(self, old_code, new_code):
+        tree = TreeMock()
+        ts.edit_tree(tree, old_code, new_code)
+        return tree.kwargs
+
+    def test_change_in_line(self):
+        edit = self.edit(b"const A = 1\nconst B = 2\n", b"const A = 1\nconst B = 30\n")
+        self.assertEqual(edit['start_byte'], 22)
+        self.assertEqual(edit['old_end_byte'], 23)
+        self.assertEqual(edit['new_end_byte'], 24)
+        self.assertEqual(edit['start_point'], (1, 10))
+        self.assertEqual(edit['old_end_point'], (1, 11))
+        self.assertEqual(edit['new_end_point'], (1, 12))
+
+    def test_line_removed(self):
+        edit = self.edit(b"const A = 1\nconst B = 2\n", b"const B = 2\n")
+        self.assertEqual(edit['start_byte'], 6)
+        self.assertEqual(edit['old_end_byte'], 18)
+        self.assertEqual(edit['new_end_byte'], 6)
+        self.assertEqual(edit['start_point'], (0, 6))
+        self.assertEqual(edit['old_end_point'], (1, 6))
+        self.assertEqual(edit['new_end_point'], (0, 6))
+
+    def test_no_change(self):
+        edit = self.edit(b"const A = 1\n", b"const A = 1\n")
+        self.assertEqual(edit['start_byte'], 12)
+        self.assertEqual(edit['old_end_byte'], 12)
+        self.assertEqual(edit['new_end_byte'], 12)
@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from fbdl import ts
+
+
+class TestLibraryOutdated(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+        self.grammar_path = os.path.join(self.dir.name, 'grammar')
+        os.makedirs(os.path.join(self.grammar_path, 'src', 'tree_sitter'))
+        self.library_path = os.path.join(self.dir.name, ts.LIBRARY_NAME)
+
+        for patcher in [
+            mock.patch.object(ts, 'GRAMMAR_PATH', self.grammar_path),
+            mock.patch.object(ts, 'LIBRARY_PATH', self.library_path),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def touch(self, path, mtime):
+        with open(path, 'w'):
+            pass
+        os.utime(path, (mtime, mtime))
+
+    def source(self, name):
+        return os.path.join(self.grammar_path, 'src', name)
+
+    def test_missing_library(self):
+        self.assertTrue(ts._library_outdated())
+
+    def test_up_to_date(self):
+        self.touch(self.source('parser.c'), 100)
+        self.touch(self.library_path, 200)
+        self.assertFalse(ts._library_outdated())
+
+    def test_scanner_changed(self):
+        self.touch(self.source('parser.c'), 100)
+        self.touch(self.source('scanner.c'), 300)
+        self.touch(self.library_path, 200)
+        self.assertTrue(ts._library_outdated())
+
+    def test_header_changed(self):
+        self.touch(self.source('parser.c'), 100)
+        self.touch(self.source(os.path.join('tree_sitter', 'parser.h')), 300)
+        self.touch(self.library_path, 200)
+        self.assertTrue(ts._library_outdated())
+
+
+class TestLibraryLocation(unittest.TestCase):
+    def test_in_package(self):
+        package_dir = os.path.dirname(os.path.abspath(ts.__file__))
+        self.assertEqual(os.path.dirname(ts.LIBRARY_PATH), package_dir)
+        self.assertEqual(os.path.basename(ts.LIBRARY_PATH), ts.LIBRARY_NAME)
+
+    def test_import_with_library(self):
+        package_dir = os.path.dirname(os.path.abspath(ts.__file__))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            copy_dir = os.path.join(tmp_dir, 'fbdl')
+            shutil.copytree(
+                package_dir,
+                copy_dir,
+                ignore=shutil.ignore_patterns('__pycache__', 'tests'),
+            )
+            # Content is irrelevant, the library must not be imported as a module.
+            with open(os.path.join(copy_dir, ts.LIBRARY_NAME), 'wb') as f:
+                f.write(b'not a module')
+
+            result = subprocess.run(
+                [sys.executable, '-c', 'import fbdl'],
+                cwd=tmp_dir,
+                env=dict(os.environ, PYTHONPATH=os.pathsep.join([tmp_dir] + sys.path)),
+                capture_output=True,
+            )
+
+        self.assertEqual(result.returncode, 0, result.stderr.decode())
@@ -0,0 +1,56 @@
+"""
+Module with utilities shared by tests.
+"""
+from fbdl import session
+from fbdl.expr import ExprDict
+
+
+def enter_session(test_case):
+    """Run the test case within its own session."""
+    s = session.Session()
+    s.__enter__()
+    test_case.addCleanup(s.__exit__, None, None, None)
+    return s
+
+
+class NodeMock:
+    """Mock of the tree-sitter node."""
+
+    def __init__(self, type='', string='', has_error=False):
+        self.type = type
+        self.string = string
+        self.has_error = has_error
+
+
+class ParserMock:
+    def get_node_string(self, node):
+        return node.string
+
+
+parser = ParserMock()
+
+
+def literal(val, symbol):
+    e = ExprDict(parser, NodeMock('decimal_literal', str(val)), symbol)
+    e.value = val
+    return e
+
+
+def identifier(name, symbol):
+    return ExprDict(parser, NodeMock('identifier', name), symbol)
+
+
+def binary_operation(left, operator, right, symbol):
+    e = ExprDict(parser, NodeMock('binary_operation', ''), symbol)
+    e['Left'] = left
+    e['Operator'] = operator
+    e['Right'] = right
+    return e
+
+
+def status(width, count=None, **properties):
+    """Make instance of the status, as returned by the instantiation."""
+    s = {'Base Type': 'status', 'Properties': {'width': width, **properties}}
+    if count is not None:
+        s['Count'] = count
+    return s
@@ -1,7 +1,10 @@
 """
 Module for code utilizing tree-sitter.
 """
+import hashlib
+import logging as log
 import os
+import threading
 
 dirname = '/'.join(os.path.dirname(os.path.abspath(__file__)).split('/')[:-1])
 
@@ -10,19 +13,26 @@ import sys
 
 this_module = sys.modules[__name__]
 
-from tree_sitter import Language, Parser, TreeCursor
+# Library is placed within the package, so that it is installed together with it.
+# Its name must not be importable, 'fbdl.so' would shadow the fbdl.py module.
+LIBRARY_NAME = 'fbdl-grammar.so'
+LIBRARY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), LIBRARY_NAME)
+GRAMMAR_PATH = dirname + '/submodules/tree-sitter-fbdl/'
 
-Language.build_library(
-    dirname + '/build/fbdl.so', [dirname + '/submodules/tree-sitter-fbdl/']
-)
-FBDLANG = Language(dirname + '/build/fbdl.so', 'fbdl')
-
-ts_parser = Parser()
-ts_parser.set_language(FBDLANG)
+# Language is loaded on first use, so that importing the module stays cheap.
+# It is shared by all threads, parsers are not thread-safe, so each thread has its own.
+ts_language = None
+_language_lock = threading.Lock()
+_local = threading.local()
 
 from . import expr
 from . import idgen
+from . import pre
+from . import profiling
+from . import session
+from .cache import ParseCache, reassign_ids
 from .packages import Packages
+from .record import Symbol
 from .refdict import RefDict
 from .validation import *
 
@@ -38,6 +48,10 @@ class ParserBase:
         return f"File '{self.this_file['Path']}', line {node.start_point[0] + 1}."
 
     def check_for_errors(self):
+        # Tree is traversed only to locate errors.
+        if not self.tree.root_node.has_error:
+            return
+
         msg = ""
         for node in traverse_tree(self.tree):
             if node.type == 'ERROR':
@@ -69,6 +83,8 @@ class Parser(ParserBase):
 
 class ParserFromNode(ParserBase):
     def __init__(self, parser, node):
+        if profiling.enabled:
+            profiling.count('Nodes Visited')
         self.tree = parser.tree
         self.cursor = node.walk()
         self.code = parser.code
@@ -100,59 +116,343 @@ def traverse_tree(tree):
                 retracing = False
 
 
-def parse(packages):
-    for pkg_name, pkgs in packages.items():
-        for pkg in pkgs:
-            for f in pkg['Files']:
-                f['Parent'] = RefDict(pkg)
-                parse_file(f, pkg, packages)
+def build_library(path=LIBRARY_PATH, grammar_path=GRAMMAR_PATH):
+    """Build the grammar library. The library is rebuilt only if the grammar is newer."""
+    from tree_sitter import Language
+
+    Language.build_library(path, [grammar_path])
+
+
+def _library_outdated():
+    """Check if the library is missing or older than any of the grammar sources.
+
+    Sources include the generated parser, external scanners and headers.
+    """
+    if not os.path.exists(LIBRARY_PATH):
+        return True
+
+    # Grammar sources are not available if the library was built at install time.
+    src_path = os.path.join(GRAMMAR_PATH, 'src')
+    if not os.path.isdir(src_path):
+        return False
+
+    library_mtime = os.path.getmtime(LIBRARY_PATH)
+    for dir_path, _, files in os.walk(src_path):
+        for f in files:
+            if f.endswith(('.c', '.cc', '.h')):
+                if os.path.getmtime(os.path.join(dir_path, f)) > library_mtime:
+                    return True
+
+    return False
+
+
+def get_language():
+    """Get the tree-sitter language. The grammar library is built if it is missing or outdated."""
+    global ts_language
+
+    with _language_lock:
+        if ts_language is None:
+            import tree_sitter
+
+            if _library_outdated():
+                build_library()
+
+            ts_language = tree_sitter.Language(LIBRARY_PATH, 'fbdl')
+
+    return ts_language
+
+
+def get_parser():
+    """Get the tree-sitter parser of the current thread."""
+    parser = getattr(_local, 'parser', None)
+
+    if parser is None:
+        import tree_sitter
+
+        parser = tree_sitter.Parser()
+        parser.set_language(get_language())
+        _local.parser = parser
+
+    return parser
+
+
+def grammar_version():
+    """Get version of the grammar. It is the hash of the grammar library."""
+    if _library_outdated():
+        build_library()
+
+    with open(LIBRARY_PATH, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def parse(packages, cache_dir=None, jobs=1, cache=None):
+    """
+    Parameters
+    ----------
+    packages
+        Package dictionary.
+    cache_dir
+        Path to the directory for the parse cache. If None, the cache is not used.
+    jobs
+        Number of processes parsing files in parallel.
+    cache
+        Parse cache shared with other compilations. If provided, cache_dir is ignored.
+    """
+    if cache is None and cache_dir:
+        cache = ParseCache(cache_dir, grammar_version())
+
+    if jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(jobs) as executor:
+            parse_packages(packages, cache, executor=executor)
+    else:
+        parse_packages(packages, cache)
 
     packages.check()
 
 
-def parse_file(this_file, this_pkg, packages):
+def parse_packages(packages, cache=None, parsed=None, executor=None):
+    """Parse the main package and all packages it transitively imports.
+
+    Packages are parsed in breadth-first order of imports.
+    If executor is provided, files of packages at the same import depth
+    are parsed in parallel. Results are merged in the same order as in case
+    of sequential parsing, so ids and error messages do not depend on the executor.
+
+    Parameters
+    ----------
+    parsed
+        Dictionary with results of previous parse_file() calls, key is the file path.
+        Files present in the dictionary are not parsed again.
+
+    Returns
+    -------
+        Dictionary with results of parse_file() calls, key is the file path.
+    """
+    if parsed is None:
+        parsed = {}
+
+    main_pkg = packages['main'][0]
+    pending = [main_pkg]
+    visited = {main_pkg['Id']}
+    while pending:
+        files = []
+        for pkg in pending:
+            for f in pkg['Files']:
+                if f['Path'] not in parsed:
+                    f['Parent'] = RefDict(pkg)
+                    files.append((f, pkg))
+
+        if executor is None:
+            for f, pkg in files:
+                parsed[f['Path']] = parse_file(f, pkg, packages, cache)
+        else:
+            parsed.update(_parse_files_in_parallel(files, packages, cache, executor))
+
+        level = pending
+        pending = []
+        for pkg in level:
+            for f in pkg['Files']:
+                for _, import_ in f.get('Imports', {}).items():
+                    imported_pkg = import_['Package']
+                    if imported_pkg['Id'] not in visited:
+                        visited.add(imported_pkg['Id'])
+                        pending.append(imported_pkg.d)
+
+    return parsed
+
+
+def _parse_code_in_worker(code, path):
+    # Ids are reassigned by the parent process, so the session is discarded.
+    with session.Session():
+        symbols, imports, _ = parse_code(code, {'Path': path}, None, None)
+    return symbols, imports
+
+
+def _parse_files_in_parallel(files, packages, cache, executor):
+    from concurrent.futures import Future
+
+    codes = []
+    entries = []
+    for f, _ in files:
+        code = pre.read_file(f['Path'])
+        entry = None
+        if cache is not None:
+            entry = cache.load(code)
+        if entry is None:
+            entry = executor.submit(_parse_code_in_worker, code, f['Path'])
+        codes.append(code)
+        entries.append(entry)
+
+    parsed = {}
+    for (f, pkg), code, entry in zip(files, codes, entries):
+        if isinstance(entry, Future):
+            symbols, imports = entry.result()
+            if profiling.enabled:
+                profiling.count('Files Parsed')
+            if cache is not None:
+                cache.store(code, symbols, imports)
+        else:
+            symbols, imports = entry
+        # Symbols were not created by this process.
+        reassign_ids(symbols)
+
+        add_file_symbols(f, pkg, packages, symbols, imports)
+        parsed[f['Path']] = (code, None)
+
+    return parsed
+
+
+def parse_file(this_file, this_pkg, packages, cache=None, previous=None):
+    """
+    Parameters
+    ----------
+    previous
+        Tuple with the code and the tree returned by the previous parse of the file.
+        If provided, the file is parsed incrementally.
+
+    Returns
+    -------
+        Tuple with the code and the tree. Tree is None if symbols were taken from the cache.
+    """
+    code = pre.read_file(this_file['Path'])
+
+    old_tree = None
+    if previous is not None and previous[1] is not None:
+        old_tree = previous[1]
+        edit_tree(old_tree, previous[0], code)
+
+    entry = None
+    if cache is not None:
+        entry = cache.load(code)
+
+    tree = None
+    # Only code that passed the checks is cached, so the checks are not repeated.
+    if entry is not None:
+        log.debug("Using cached symbols for file '%s'.", this_file['Path'])
+        symbols, imports = entry
+        reassign_ids(symbols)
+    else:
+        symbols, imports, tree = parse_code(
+            code, this_file, this_pkg, packages, old_tree
+        )
+        if profiling.enabled:
+            profiling.count('Files Parsed')
+        if cache is not None:
+            cache.store(code, symbols, imports)
+
+    add_file_symbols(this_file, this_pkg, packages, symbols, imports)
+
+    return code, tree
+
+
+def add_file_symbols(this_file, this_pkg, packages, symbols, imports):
+    """Add symbols and imports of the parsed file to the file and package dictionaries."""
     if 'Symbols' not in this_pkg:
         this_pkg['Symbols'] = {}
 
     this_file['Symbols'] = {}
+    this_file.pop('Imports', None)
+
+    for as_, path_pattern in imports:
+        add_import(as_, path_pattern, this_file, packages)
+
+    for _, symbol in symbols.items():
+        symbol['Parent'] = RefDict(this_file)
+        this_file['Symbols'][symbol['Name']] = symbol
+
+        if symbol['Name'] in this_pkg['Symbols']:
+            raise Exception(
+                f"Symbol '{symbol['Name']}' defined at least twice in package '{this_pkg['Path']}'."
+            )
+
+        this_pkg['Symbols'][symbol['Name']] = RefDict(symbol)
+
+
+def _point(code, byte):
+    row = code.count(b'\n', 0, byte)
+    column = byte - (code.rfind(b'\n', 0, byte) + 1)
+    return (row, column)
+
+
+def edit_tree(tree, old_code, new_code):
+    """Inform the tree about the difference between the old and the new code.
+
+    The difference is described as a single edit spanning from the first
+    to the last changed byte.
+    """
+    start = 0
+    end = min(len(old_code), len(new_code))
+    while start < end and old_code[start] == new_code[start]:
+        start += 1
+
+    old_end = len(old_code)
+    new_end = len(new_code)
+    while (
+        old_end > start
+        and new_end > start
+        and old_code[old_end - 1] == new_code[new_end - 1]
+    ):
+        old_end -= 1
+        new_end -= 1
+
+    tree.edit(
+        start_byte=start,
+        old_end_byte=old_end,
+        new_end_byte=new_end,
+        start_point=_point(old_code, start),
+        old_end_point=_point(old_code, old_end),
+        new_end_point=_point(new_code, new_end),
+    )
+
+
+def parse_code(code, this_file, this_pkg, packages, old_tree=None):
+    """Parse file code. Indent of the code is checked before parsing.
 
-    this_file['Handle'].seek(0)
-    code = bytes(this_file['Handle'].read(), 'utf8')
+    Returns
+    -------
+        Tuple with symbols dictionary, list of import statements and the tree.
+        Import statement is a tuple with the import name and the path pattern.
+    """
+    pre.check_indent(code, this_file['Path'])
 
-    tree = ts_parser.parse(code)
+    symbols = {}
+    imports = []
+
+    if old_tree is None:
+        tree = get_parser().parse(code)
+    else:
+        tree = get_parser().parse(code, old_tree)
     parser = Parser(tree, code, this_file, this_pkg, packages)
     parser.check_for_errors()
 
     if parser.goto_first_child() == False:
-        return
+        return symbols, imports, tree
 
     while True:
+        if profiling.enabled:
+            profiling.count('Nodes Visited')
         node_type = parser.node.type
         # Imports have to be handled in different way, as they are not classical symbols.
         if node_type == 'single_import_statement':
-            parse_single_import_statement(parser)
+            imports.append(parse_single_import_statement(parser))
         elif node_type == 'comment':
             pass
         else:
             for symbol in getattr(this_module, 'parse_' + node_type)(parser):
-                if symbol['Name'] in this_file['Symbols']:
+                if symbol['Name'] in symbols:
                     raise Exception(
                         f"Symbol '{symbol['Name']}' defined at least twice in file '{this_file['Path']}'.\n"
-                        + f"First occurrence line {this_file['Symbols'][symbol['Name']]['Line Number']}, second line {symbol['Line Number']}."
-                    )
-                symbol['Parent'] = RefDict(this_file)
-                this_file['Symbols'][symbol['Name']] = symbol
-
-                if symbol['Name'] in this_pkg['Symbols']:
-                    raise Exception(
-                        f"Symbol '{symbol['Name']}' defined at least twice in package '{this_pkg['Path']}'."
+                        + f"First occurrence line {symbols[symbol['Name']]['Line Number']}, second line {symbol['Line Number']}."
                     )
-
-                this_pkg['Symbols'][symbol['Name']] = RefDict(symbol)
+                symbols[symbol['Name']] = symbol
 
         if not parser.goto_next_sibling():
             break
 
+    return symbols, imports, tree
+
 
 def parse_argument_list(parser, symbol):
     args = []
@@ -199,12 +499,12 @@ def parse_argument_list(parser, symbol):
 
 
 def parse_element_anonymous_instantiation(parser):
-    symbol = {
-        'Id': idgen.generate(),
-        'Kind': 'Element Anonymous Instantiation',
-        'Line Number': parser.node.start_point[0] + 1,
-        'Name': parser.get_node_string(parser.node.children[0]),
-    }
+    symbol = Symbol(
+        idgen.generate(),
+        'Element Anonymous Instantiation',
+        parser.node.start_point[0] + 1,
+        parser.get_node_string(parser.node.children[0]),
+    )
 
     if parser.node.children[1].type == '[':
         symbol['Count'] = expr.build_expression(parser, parser.node.children[2], symbol)
@@ -274,12 +574,12 @@ def parse_element_body(parser, symbol):
 
 
 def parse_element_type_definition(parser):
-    symbol = {
-        'Id': idgen.generate(),
-        'Kind': 'Element Type Definition',
-        'Line Number': parser.node.start_point[0] + 1,
-        'Name': parser.get_node_string(parser.node.children[1]),
-    }
+    symbol = Symbol(
+        idgen.generate(),
+        'Element Type Definition',
+        parser.node.start_point[0] + 1,
+        parser.get_node_string(parser.node.children[1]),
+    )
 
     type_node = None
     for node in parser.node.children[2:]:
@@ -327,12 +627,12 @@ def parse_element_type_definition(parser):
 
 
 def parse_element_definitive_instantiation(parser):
-    symbol = {
-        'Id': idgen.generate(),
-        'Kind': 'Element Definitive Instantiation',
-        'Line Number': parser.node.start_point[0] + 1,
-        'Name': parser.get_node_string(parser.node.children[0]),
-    }
+    symbol = Symbol(
+        idgen.generate(),
+        'Element Definitive Instantiation',
+        parser.node.start_point[0] + 1,
+        parser.get_node_string(parser.node.children[0]),
+    )
 
     if parser.node.children[1].type == '[':
         symbol['Count'] = expr.build_expression(parser, parser.node.children[2], symbol)
@@ -385,12 +685,12 @@ def parse_multi_constant_definition(parser):
     symbols = []
 
     for i in range(len(parser.node.children) // 3):
-        symbol = {
-            'Id': idgen.generate(),
-            'Kind': 'Constant',
-            'Line Number': parser.node.children[i * 3 + 1].start_point[0] + 1,
-            'Name': parser.get_node_string(parser.node.children[i * 3 + 1]),
-        }
+        symbol = Symbol(
+            idgen.generate(),
+            'Constant',
+            parser.node.children[i * 3 + 1].start_point[0] + 1,
+            parser.get_node_string(parser.node.children[i * 3 + 1]),
+        )
 
         expression = expr.build_expression(
             parser, parser.node.children[i * 3 + 3], symbol
@@ -454,12 +754,12 @@ def parse_propery_assignment(parser, symbol):
 
 
 def parse_single_constant_definition(parser):
-    symbol = {
-        'Id': idgen.generate(),
-        'Kind': 'Constant',
-        'Line Number': parser.node.children[1].start_point[0] + 1,
-        'Name': parser.get_node_string(parser.node.children[1]),
-    }
+    symbol = Symbol(
+        idgen.generate(),
+        'Constant',
+        parser.node.children[1].start_point[0] + 1,
+        parser.get_node_string(parser.node.children[1]),
+    )
 
     expression = expr.build_expression(parser, parser.node.children[3], symbol)
     symbol['Value'] = expression
@@ -475,21 +775,29 @@ def parse_single_import_statement(parser):
         path_pattern = parser.get_node_string(parser.node.children[2])[1:-1]
         as_ = parser.get_node_string(parser.node.children[1])
 
+    return as_, path_pattern
+
+
+def add_import(as_, path_pattern, this_file, packages):
     actual_name = path_pattern.split('/')[-1]
     if actual_name.startswith('fbd-'):
         actual_name = actual_name[4:]
 
+    pkg = packages.get_ref_to_pkg(path_pattern)
+    if 'Files' not in pkg:
+        pre.load_package(pkg, packages)
+
     import_ = {
         'Actual Name': actual_name,
-        'Package': RefDict(parser.packages.get_ref_to_pkg(path_pattern)),
+        'Package': RefDict(pkg),
     }
 
-    if 'Imports' not in parser.this_file:
-        parser.this_file['Imports'] = {}
+    if 'Imports' not in this_file:
+        this_file['Imports'] = {}
 
-    if as_ in parser.this_file['Imports']:
+    if as_ in this_file['Imports']:
         raise Exception(
-            f"At least two packages imported as '{as_}' in file '{parser.this_file['Path']}'."
+            f"At least two packages imported as '{as_}' in file '{this_file['Path']}'."
         )
 
-    parser.this_file['Imports'][as_] = import_
+    this_file['Imports'][as_] = import_
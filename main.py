@@ -2,12 +2,17 @@
 
 import argparse
 import logging as log
-from pprint import pformat
 import sys
 
+from fbdl import dump
 from fbdl import pre
+from fbdl import profiling
+from fbdl import serve
+from fbdl import session
 from fbdl import ts
 from fbdl.inst import inst
+from fbdl.reg import address_map
+from fbdl.reg import packing
 from fbdl.reg import reg
 
 VERSION = "0.2.0"
@@ -27,27 +32,94 @@ def parse_cmd_line_args():
 
     parser.add_argument('-d', help="Log debug messages.", action='store_true')
 
+    parser.add_argument(
+        '-c',
+        '--cache-dir',
+        help="Cache parsed files in given directory and reuse them in next runs.",
+        metavar='dir_path',
+    )
+
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        help="Number of processes parsing files in parallel.",
+        type=int,
+        default=1,
+        metavar='N',
+    )
+
+    parser.add_argument(
+        '-s',
+        '--serve',
+        help="Keep running and recompile whenever any of the files changes. "
+        + "Dumps are rewritten after each compilation.",
+        action='store_true',
+    )
+
+    parser.add_argument(
+        '--profile',
+        help="Log wall time, peak memory and counters of each compilation stage.",
+        action='store_true',
+    )
+
+    parser.add_argument(
+        '--cprofile',
+        help="Save cProfile statistics of the compilation to a file. Implies --profile.",
+        metavar='file_path',
+    )
+
+    parser.add_argument(
+        '--trace',
+        help="Save Chrome trace events of compilation stages to a file. Implies --profile.",
+        metavar='file_path',
+    )
+
+    parser.add_argument(
+        '--reproducible',
+        help="Derive ids from paths and names instead of the discovery order. "
+        + "Set the SOURCE_DATE_EPOCH environment variable to fix the timestamp.",
+        action='store_true',
+    )
+
+    parser.add_argument(
+        '--packing',
+        help="Strategy of packing functionalities into registers. Default: full-align.",
+        choices=packing.STRATEGIES,
+        default='full-align',
+    )
+
     parser.add_argument(
         '-p',
         help="Dump packages dictionary to a file.",
-        type=argparse.FileType('w'),
         metavar='file_path',
     )
 
     parser.add_argument(
         '-i',
         help="Dump instantiation dictionary to a file.",
-        type=argparse.FileType('w'),
         metavar='file_path',
     )
 
     parser.add_argument(
         '-r',
         help="Dump registerified dictionary to a file.",
-        type=argparse.FileType('w'),
         metavar='file_path',
     )
 
+    parser.add_argument(
+        '-m',
+        help="Save flattened address map of the registerified bus to a NumPy .npz file.",
+        metavar='file_path',
+    )
+
+    parser.add_argument(
+        '-f',
+        '--format',
+        help="Format of dumps. Default: python.",
+        choices=dump.FORMATS,
+        default='python',
+    )
+
     return parser.parse_args()
 
 
@@ -61,21 +133,62 @@ def main():
         level=log_level, format="%(levelname)s: %(message)s", stream=sys.stderr
     )
 
-    packages = pre.prepare_packages(cmd_line_args.main)
-    ts.parse(packages)
+    if cmd_line_args.serve:
+        server = serve.Server(
+            cmd_line_args.main,
+            cmd_line_args.cache_dir,
+            cmd_line_args.packing,
+            cmd_line_args.reproducible,
+        )
+        server.serve(lambda server: rewrite_dumps(server, cmd_line_args))
+        return
+
+    with session.Session(content_ids=cmd_line_args.reproducible):
+        if cmd_line_args.profile or cmd_line_args.cprofile or cmd_line_args.trace:
+            with profiling.Profiler(
+                cmd_line_args.cprofile, cmd_line_args.trace
+            ) as profiler:
+                compile(cmd_line_args, profiler)
+            log.info("Compilation profile:\n" + profiler.report())
+        else:
+            compile(cmd_line_args)
+
+
+def compile(cmd_line_args, profiler=None):
+    with profiling.stage(profiler, 'pre.prepare_packages'):
+        packages = pre.prepare_packages(cmd_line_args.main)
+    with profiling.stage(profiler, 'ts.parse'):
+        ts.parse(packages, cmd_line_args.cache_dir, cmd_line_args.jobs)
     if cmd_line_args.p:
-        cmd_line_args.p.write(pformat(packages) + '\n')
-        cmd_line_args.p.close()
+        dump.dump(packages, cmd_line_args.p, cmd_line_args.format)
 
-    bus = inst.instantiate(packages)
+    with profiling.stage(profiler, 'Packages.evaluate'):
+        packages.evaluate()
+
+    with profiling.stage(profiler, 'inst.instantiate'):
+        bus = inst.instantiate(packages)
     if cmd_line_args.i:
-        cmd_line_args.i.write(pformat(bus) + '\n')
-        cmd_line_args.i.close()
+        dump.dump(bus, cmd_line_args.i, cmd_line_args.format)
 
-    registerified_bus = reg.registerify(bus)
+    with profiling.stage(profiler, 'reg.registerify'):
+        registerified_bus = reg.registerify(bus, cmd_line_args.packing)
     if cmd_line_args.r:
-        cmd_line_args.r.write(pformat(registerified_bus) + '\n')
-        cmd_line_args.r.close()
+        dump.dump(registerified_bus, cmd_line_args.r, cmd_line_args.format)
+    if cmd_line_args.m:
+        address_map.save(registerified_bus, cmd_line_args.m)
+
+
+def rewrite_dumps(server, cmd_line_args):
+    dumps = (
+        (cmd_line_args.p, server.packages),
+        (cmd_line_args.i, server.bus),
+        (cmd_line_args.r, server.registerified_bus),
+    )
+    for path, obj in dumps:
+        if path:
+            dump.dump(obj, path, cmd_line_args.format)
+    if cmd_line_args.m:
+        address_map.save(server.registerified_bus, cmd_line_args.m)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+#!/bin/python3
+
+# Script for benchmarking compilation stages on synthetic buses.
+# Must be run from projects root.
+#
+# Example:
+#   ./scripts/benchmark.py --packages 20 --depth 4 -o bench.json
+#   ./scripts/benchmark.py --packages 20 --depth 4 --compare bench.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from fbdl import pre
+from fbdl import session
+from fbdl import ts
+from fbdl.inst import inst
+from fbdl.reg import reg
+
+STAGES = (
+    'pre.prepare_packages',
+    'ts.parse',
+    'Packages.evaluate',
+    'inst.instantiate',
+    'reg.registerify',
+)
+
+
+def parse_cmd_line_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark compilation stages on synthetic buses."
+    )
+
+    parser.add_argument('--packages', help="Number of packages.", type=int, default=10)
+    parser.add_argument('--depth', help="Block nesting depth.", type=int, default=3)
+    parser.add_argument(
+        '--arrays', help="Number of status arrays per block.", type=int, default=4
+    )
+    parser.add_argument(
+        '--array-size', help="Number of items in arrays.", type=int, default=8
+    )
+    parser.add_argument(
+        '--params', help="Number of parametrized types per package.", type=int, default=2
+    )
+    parser.add_argument(
+        '--chain', help="Length of the constants chain per package.", type=int, default=50
+    )
+    parser.add_argument(
+        '--repeat', help="Number of measurements of each stage.", type=int, default=5
+    )
+    parser.add_argument(
+        '-o', help="Save results to a JSON file.", metavar='file_path'
+    )
+    parser.add_argument(
+        '--compare', help="Compare results with a JSON file.", metavar='file_path'
+    )
+    parser.add_argument(
+        '--threshold',
+        help="Slowdown ratio reported as regression. Default: 1.2.",
+        type=float,
+        default=1.2,
+    )
+
+    return parser.parse_args()
+
+
+def generate_package(args, i):
+    lines = ["const K0 = 1"]
+    for c in range(1, args.chain):
+        lines.append(f"const K{c} = K{c - 1} + 1")
+    lines.append("")
+
+    for p in range(args.params):
+        lines.append(f"type Status{p}(W = {p + 1}) status")
+        lines.append("\twidth = W")
+        lines.append("")
+
+    for d in range(args.depth):
+        lines.append(f"type Block{d} block")
+        for a in range(args.arrays):
+            if args.params:
+                type_ = f"Status{a % args.params}({a % 16 + 1})"
+            else:
+                type_ = "status"
+            lines.append(f"\ts{a} [{args.array_size}]{type_}")
+        lines.append("\tc status")
+        lines.append(f"\t\twidth = K{args.chain - 1} % 32 + 1")
+        if d:
+            lines.append(f"\tsub [2]Block{d - 1}")
+        lines.append("")
+
+    return '\n'.join(lines)
+
+
+def generate_main(args):
+    lines = [f'import "pkg{i}"' for i in range(args.packages)]
+    lines.append("")
+    lines.append("main bus")
+    for i in range(args.packages):
+        lines.append(f"\tb{i} pkg{i}.Block{args.depth - 1}")
+    lines.append("")
+
+    return '\n'.join(lines)
+
+
+def generate(args, path):
+    """Generate synthetic bus in the given directory."""
+    for i in range(args.packages):
+        pkg_dir = os.path.join(path, 'fbd', f'pkg{i}')
+        os.makedirs(pkg_dir)
+        with open(os.path.join(pkg_dir, 'pkg.fbd'), 'w') as f:
+            f.write(generate_package(args, i))
+
+    with open(os.path.join(path, 'bus.fbd'), 'w') as f:
+        f.write(generate_main(args))
+
+
+def measure_once():
+    times = {}
+
+    with session.Session():
+        start = time.perf_counter()
+        packages = pre.prepare_packages('bus.fbd')
+        times['pre.prepare_packages'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        ts.parse(packages)
+        times['ts.parse'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        packages.evaluate()
+        times['Packages.evaluate'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bus = inst.instantiate(packages)
+        times['inst.instantiate'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reg.registerify(bus)
+        times['reg.registerify'] = time.perf_counter() - start
+
+    return times
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print comparison of results. Return True if any stage regressed."""
+    if baseline['Parameters'] != results['Parameters']:
+        print("Warning: compared results were measured with different parameters.")
+
+    regression = False
+    print(f"{'Stage':<24}{'Baseline [s]':>14}{'Current [s]':>14}{'Ratio':>8}")
+    for stage in STAGES:
+        old = baseline['Min'].get(stage)
+        new = results['Min'][stage]
+        if not old:
+            print(f"{stage:<24}{'-':>14}{new:>14.4f}{'-':>8}")
+            continue
+        ratio = new / old
+        mark = ''
+        if ratio > threshold:
+            mark = ' REGRESSION'
+            regression = True
+        print(f"{stage:<24}{old:>14.4f}{new:>14.4f}{ratio:>8.2f}{mark}")
+
+    return regression
+
+
+def main():
+    args = parse_cmd_line_args()
+
+    params = {
+        'Packages': args.packages,
+        'Depth': args.depth,
+        'Arrays': args.arrays,
+        'Array Size': args.array_size,
+        'Parametrized Types': args.params,
+        'Constants Chain': args.chain,
+    }
+    results = {
+        'Commit': get_commit(),
+        'Python': platform.python_version(),
+        'Parameters': params,
+        'Times': {stage: [] for stage in STAGES},
+    }
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        generate(args, tmp_dir)
+        os.chdir(tmp_dir)
+        # Do not let user packages influence the measurements.
+        os.environ.pop('FBDPATH', None)
+        try:
+            for _ in range(args.repeat):
+                for stage, t in measure_once().items():
+                    results['Times'][stage].append(t)
+        finally:
+            os.chdir(cwd)
+
+    results['Min'] = {stage: min(times) for stage, times in results['Times'].items()}
+
+    for stage in STAGES:
+        print(f"{stage:<24}{results['Min'][stage]:>10.4f} s")
+
+    if args.o:
+        with open(args.o, 'w') as f:
+            json.dump(results, f, indent=4)
+            f.write('\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,27 @@
+import os
+
 from setuptools import setup
+from setuptools.command.build_py import build_py
 
 import setuptools
 
-setuptools.setup()
+
+class BuildPy(build_py):
+    """Build the grammar library at install time, so that it is not built on first parse."""
+
+    def run(self):
+        super().run()
+
+        try:
+            from tree_sitter import Language
+        except ImportError:
+            self.warn("tree_sitter not found, grammar library will be built on first parse")
+            return
+
+        Language.build_library(
+            os.path.join(self.build_lib, 'fbdl', 'fbdl-grammar.so'),
+            ['submodules/tree-sitter-fbdl/'],
+        )
+
+
+setuptools.setup(cmdclass={'build_py': BuildPy})